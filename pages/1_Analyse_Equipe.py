@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.patches import Wedge
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
@@ -23,7 +24,15 @@ from utils.data_loader import (
     load_teams,
     load_events,
     load_filtered_events,
+    load_normalized_events,
 )
+from utils.expected_threat import load_xt_rankings
+from utils.shots import load_season_shots, build_xg_timeline, summarize_team_xg
+from utils.expected_points import load_expected_points
+from utils.ratings import load_team_ratings, get_rating_timeline
+from utils.team_style import load_team_style, STYLE_METRICS
+from utils.zones import ZONE18_X_EDGES, ZONE18_Y_EDGES, N_ZONE18_ROWS, N_ZONE18_COLUMNS, count_by_zone, zone18_grid
+from utils.pass_sonar import load_pass_sonars, get_sonar_rows, get_sonar
 
 # Configuration de la page
 st.set_page_config(
@@ -121,12 +130,13 @@ try:
     ]
 
     # Onglets pour les différentes analyses
-    tab1, tab2, tab3, tab4 = st.tabs(
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(
         [
             "Classement & Performance",
             "Comparaison d'Équipes",
             "Heatmaps & Zones d'Action",
             "Corrélations Statistiques",
+            "Profils de Jeu",
         ]
     )
 
@@ -232,6 +242,105 @@ try:
         with col4:
             st.metric("Défaites", team_stats["losses"])
 
+        # Points attendus (xPts) : simulation Monte-Carlo des scores à partir de l'xG de chaque tir
+        st.subheader("Classement aux points attendus (xPts)")
+        match_xpts, xpts_table, projection = load_expected_points(competition_id, season_id)
+        if xpts_table.empty:
+            st.info("Aucun tir disponible pour simuler les points attendus.")
+        else:
+            st.dataframe(
+                xpts_table[["team", "matches", "points", "xpts", "points_minus_xpts", "xg_for", "xg_against", "xg_difference"]]
+                .round(2)
+                .rename(columns={
+                    "team": "Équipe", "matches": "Matchs", "points": "Points", "xpts": "xPts",
+                    "points_minus_xpts": "Points - xPts", "xg_for": "xG pour", "xg_against": "xG contre",
+                    "xg_difference": "Diff. xG",
+                })
+            )
+
+            fig = px.scatter(
+                xpts_table,
+                x="xpts",
+                y="points",
+                text="team",
+                labels={"xpts": "Points attendus (xPts)", "points": "Points réels"},
+                title="Points réels vs points attendus",
+            )
+            limit = max(xpts_table["xpts"].max(), xpts_table["points"].max()) + 2
+            fig.add_shape(type="line", x0=0, y0=0, x1=limit, y1=limit, line=dict(dash="dash", color="grey"))
+            fig.update_traces(textposition="top center")
+            st.plotly_chart(fig, use_container_width=True)
+
+            # xPts match par match pour l'équipe sélectionnée
+            team_xpts = match_xpts[(match_xpts["home_team"] == selected_team1) | (match_xpts["away_team"] == selected_team1)].copy()
+            is_home = team_xpts["home_team"] == selected_team1
+            team_xpts["Adversaire"] = team_xpts["away_team"].where(is_home, team_xpts["home_team"])
+            team_xpts["Score"] = (
+                team_xpts["home_score"].astype(int).astype(str) + " - " + team_xpts["away_score"].astype(int).astype(str)
+            )
+            team_xpts["xG pour"] = team_xpts["home_xg"].where(is_home, team_xpts["away_xg"])
+            team_xpts["xG contre"] = team_xpts["away_xg"].where(is_home, team_xpts["home_xg"])
+            team_xpts["Victoire (%)"] = team_xpts["home_win"].where(is_home, team_xpts["away_win"]) * 100
+            team_xpts["Nul (%)"] = team_xpts["draw"] * 100
+            team_xpts["xPts"] = team_xpts["home_xpts"].where(is_home, team_xpts["away_xpts"])
+            with st.expander(f"Points attendus match par match de {selected_team1}"):
+                st.dataframe(
+                    team_xpts[["Adversaire", "Score", "xG pour", "xG contre", "Victoire (%)", "Nul (%)", "xPts"]].round(2)
+                )
+
+            # Projection de fin de saison sur les matchs restants
+            if projection["remaining_matches"].sum() > 0:
+                st.subheader("Projection de fin de saison")
+                st.dataframe(
+                    projection.round(1).rename(columns={
+                        "team": "Équipe", "points": "Points actuels", "remaining_matches": "Matchs restants",
+                        "projected_points": "Points projetés", "projected_min": "Bas (5 %)",
+                        "projected_max": "Haut (95 %)", "title_probability": "Titre (%)",
+                    })
+                )
+
+        # Force des équipes (Elo) et résultats selon le niveau de l'adversaire
+        st.subheader("Classement Elo")
+        elo_table, elo_history, opponent_table = load_team_ratings(competition_id, season_id)
+        if elo_table.empty:
+            st.info("Aucun match joué pour calculer les notes Elo.")
+        else:
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                st.dataframe(
+                    elo_table.round(0).rename(columns={"team": "Équipe", "rating": "Elo", "tier": "Niveau"})
+                )
+            with col2:
+                timeline = get_rating_timeline(elo_history, selected_team1)
+                fig = px.line(
+                    timeline,
+                    x="match_date",
+                    y="rating",
+                    markers=True,
+                    hover_data=["opponent"],
+                    labels={"match_date": "Date", "rating": "Elo", "opponent": "Adversaire"},
+                    title=f"Évolution de la note Elo de {selected_team1}",
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+            team_results = opponent_table[opponent_table["team"] == selected_team1].merge(
+                elo_history[["match_id", "home_score", "away_score"]], on="match_id"
+            )
+            goals_for = team_results["home_score"].where(team_results["is_home"], team_results["away_score"])
+            goals_against = team_results["away_score"].where(team_results["is_home"], team_results["home_score"])
+            team_results["points"] = np.select([goals_for > goals_against, goals_for == goals_against], [3, 1], default=0)
+            by_tier = team_results.groupby("opponent_tier", observed=False)["points"].agg(["size", "mean"]).reset_index()
+            fig = px.bar(
+                by_tier,
+                x="opponent_tier",
+                y="mean",
+                text="size",
+                labels={"opponent_tier": "Niveau de l'adversaire", "mean": "Points par match", "size": "Matchs"},
+                title=f"Points par match de {selected_team1} selon le niveau de l'adversaire",
+            )
+            fig.update_traces(texttemplate="%{text} matchs", textposition="outside")
+            st.plotly_chart(fig, use_container_width=True)
+
     # Onglet 2: Comparaison entre Équipes
     # Onglet 2: Comparaison entre Équipes
     with tab2:
@@ -388,6 +497,24 @@ try:
                 title=f"Distribution de {stat_type} par match",
             )
             st.plotly_chart(fig, use_container_width=True)
+
+        # Progression du ballon valorisée par l'Expected Threat (xT)
+        st.subheader("Progression du ballon : Expected Threat (xT)")
+        _, xt_teams = load_xt_rankings(competition_id, season_id)
+        if xt_teams.empty:
+            st.info("Aucune donnée xT disponible pour cette compétition.")
+        else:
+            xt_teams = xt_teams.sort_values("xt_per_match", ascending=False)
+            xt_teams["selected"] = xt_teams["team"].isin([selected_team1, selected_team2])
+            fig = px.bar(
+                xt_teams,
+                x="team",
+                y="xt_per_match",
+                color="selected",
+                labels={"team": "Équipe", "xt_per_match": "xT par match", "selected": "Équipe sélectionnée"},
+                title="xT généré par match (passes et conduites)",
+            )
+            st.plotly_chart(fig, use_container_width=True)
     # Onglet 3: Heatmaps et Zones d'Action
     with tab3:
         st.markdown("<h2 class='sub-header'>Heatmaps et Zones d'Action</h2>", unsafe_allow_html=True)
@@ -458,6 +585,119 @@ try:
 
         st.pyplot(fig)
 
+        # Répartition sur la grille 18 zones : bincount sur les identifiants calculés à la normalisation
+        st.subheader("Répartition sur les 18 zones")
+        event_types = {"Passes": "Pass", "Tirs": "Shot", "Récupérations": "Ball Recovery", "Pertes de balle": "Miscontrol"}
+        zone_events = load_normalized_events(selected_match_id)
+        zone_events = zone_events[(zone_events["team"] == selected_team1) & (zone_events["type"] == event_types[event_type])]
+        zone_counts = zone18_grid(count_by_zone(zone_events["zone18"], N_ZONE18_ROWS * N_ZONE18_COLUMNS))
+        fig = px.imshow(
+            zone_counts,
+            text_auto=True,
+            color_continuous_scale="YlOrRd",
+            x=[f"{int(start)}-{int(end)}" for start, end in zip(ZONE18_X_EDGES[:-1], ZONE18_X_EDGES[1:])],
+            y=["Gauche", "Axe", "Droite"],
+            labels={"x": "Longueur du terrain (sens de l'attaque →)", "y": "Couloir", "color": "Actions"},
+            title=f"{event_type} de {selected_team1} par zone",
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Sonars de passes sur la saison : histogrammes précalculés, il ne reste qu'à dessiner les secteurs
+        st.subheader("Sonars de passes (saison)")
+        sonar_mode = st.radio("Sonars", options=["Par joueur", "Par zone"], horizontal=True)
+        if sonar_mode == "Par joueur":
+            team_sonars = load_pass_sonars(competition_id, season_id, "player")
+            sonar_rows = get_sonar_rows(team_sonars, selected_team1).nlargest(11, "passes") if team_sonars else pd.DataFrame()
+            sonar_radius = 8.0
+        else:
+            team_sonars = load_pass_sonars(competition_id, season_id, "zone")
+            sonar_rows = get_sonar_rows(team_sonars, selected_team1) if team_sonars else pd.DataFrame()
+            # Sonars placés au centre de chaque zone de la grille 18 zones
+            if not sonar_rows.empty:
+                zone_rows, zone_columns = np.divmod(sonar_rows["zone18"].astype(int), N_ZONE18_COLUMNS)
+                sonar_rows = sonar_rows.assign(
+                    x=(ZONE18_X_EDGES[zone_columns] + ZONE18_X_EDGES[zone_columns + 1]) / 2,
+                    y=(ZONE18_Y_EDGES[zone_rows] + ZONE18_Y_EDGES[zone_rows + 1]) / 2,
+                )
+            sonar_radius = 9.0
+
+        if sonar_rows.empty:
+            st.info(f"Aucune passe dans le jeu enregistrée pour {selected_team1}.")
+        else:
+            pitch = Pitch(pitch_type="statsbomb", line_zorder=2, pitch_color="#22312b", line_color="#efefef")
+            fig, ax = pitch.draw(figsize=(12, 8))
+            completion_colors = plt.get_cmap("RdYlGn")
+            completion_norm = plt.Normalize(0.5, 1.0)
+            for entity in sonar_rows.itertuples():
+                sonar = get_sonar(team_sonars, entity.row)
+                for sector in sonar[sonar["passes"] > 0].itertuples():
+                    ax.add_patch(Wedge(
+                        (entity.x, entity.y), sonar_radius * sector.share, sector.theta1, sector.theta2,
+                        facecolor=completion_colors(completion_norm(sector.completion)),
+                        edgecolor="#22312b", linewidth=0.5, alpha=0.9, zorder=3,
+                    ))
+                if sonar_mode == "Par joueur":
+                    pitch.annotate(
+                        entity.player, (entity.x, entity.y + sonar_radius + 1), ax=ax,
+                        ha="center", va="center", fontsize=8, color="white", zorder=4,
+                    )
+            fig.colorbar(plt.cm.ScalarMappable(norm=completion_norm, cmap=completion_colors), ax=ax, shrink=0.6, label="Réussite des passes")
+            ax.set_title(f"Sonars de passes de {selected_team1} (longueur des secteurs : volume relatif, sens de l'attaque →)")
+            st.pyplot(fig)
+
+        # xG cumulé et carte des tirs du match, à partir des tirs extraits une fois par saison
+        st.subheader("Tirs et xG du match")
+        season_shots = load_season_shots(competition_id, season_id)
+        selected_match = team1_matches[team1_matches["match_id"] == selected_match_id].iloc[0]
+        match_teams = [selected_match["home_team"], selected_match["away_team"]]
+
+        if season_shots.empty:
+            st.info("Aucun tir disponible pour cette compétition.")
+        else:
+            timeline = build_xg_timeline(season_shots, selected_match_id, match_teams)
+            fig = px.line(
+                timeline,
+                x="minute",
+                y="cumulative_xg",
+                color="team",
+                line_shape="hv",
+                labels={"minute": "Minute", "cumulative_xg": "xG cumulé", "team": "Équipe"},
+                title="Évolution de l'xG cumulé",
+            )
+            goals = timeline[timeline["is_goal"]]
+            fig.add_trace(
+                go.Scatter(
+                    x=goals["minute"],
+                    y=goals["cumulative_xg"],
+                    mode="markers",
+                    marker=dict(size=12, symbol="star", color="gold", line=dict(width=1, color="black")),
+                    text=goals["player"],
+                    name="But",
+                )
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Carte des tirs : l'équipe à domicile attaque vers la droite, l'adversaire vers la gauche
+            match_shots = season_shots[season_shots["match_id"] == selected_match_id]
+            pitch = Pitch(pitch_type="statsbomb", line_zorder=2, pitch_color="#22312b", line_color="#efefef")
+            fig, ax = pitch.draw(figsize=(12, 8))
+            for team, color in zip(match_teams, ["#00A1D6", "#FFD700"]):
+                team_shots = match_shots[match_shots["team"] == team]
+                x = team_shots["x"] if team == match_teams[0] else 120 - team_shots["x"]
+                y = team_shots["y"] if team == match_teams[0] else 80 - team_shots["y"]
+                pitch.scatter(
+                    x, y,
+                    s=team_shots["xg"] * 1500 + 50,
+                    c=np.where(team_shots["is_goal"], color, "none"),
+                    edgecolors=color,
+                    linewidth=2,
+                    label=f"{team} ({team_shots['xg'].sum():.2f} xG)",
+                    ax=ax,
+                )
+            ax.legend(loc="upper center", ncol=2)
+            st.pyplot(fig)
+
+
     # Onglet 4: Corrélations Statistiques
     with tab4:
         st.markdown("<h2 class='sub-header'>Corrélations Statistiques</h2>", unsafe_allow_html=True)
@@ -521,7 +761,7 @@ try:
                     elif y_var == "Occasions créées":
                         y_value += team_events[team_events["type"] == "Shot"].shape[0]
                     elif y_var == "xG (Expected Goals)":
-                        y_value += team_events["shot_statsbomb_xg"].sum()
+                        y_value += season_team_xg.get((match_id, team), 0)
                     elif y_var == "Points":
                         points = 0
                         if match["home_team"] == team:
@@ -534,6 +774,8 @@ try:
 
             return pd.DataFrame(data)
 
+        # xG par équipe et par match, lu dans les tirs de la saison plutôt que dans les événements
+        season_team_xg = summarize_team_xg(load_season_shots(competition_id, season_id)).set_index(["match_id", "team"])["xg"]
         correlation_data = extract_correlation_data(matches, x_variable, y_variable)
 
         # Créer le diagramme de dispersion
@@ -573,6 +815,67 @@ try:
             unsafe_allow_html=True,
         )
 
+    # Onglet 5: Profils de Jeu (ACP + k-means sur les métriques de style de la saison)
+    with tab5:
+        st.markdown("<h2 class='sub-header'>Profils de Jeu</h2>", unsafe_allow_html=True)
+        st.info("Chaque équipe est décrite par une trentaine de métriques de style, centrées-réduites puis projetées sur les deux premiers axes d'une ACP. Les groupes sont formés par k-means.")
+
+        n_clusters = st.slider("Nombre de groupes", min_value=2, max_value=6, value=4)
+        style = load_team_style(competition_id, season_id, n_clusters)
+        if not style:
+            st.warning("Pas assez d'équipes ou de données pour construire la carte des profils de jeu.")
+        else:
+            style_teams = style["teams"]
+            loadings = style["loadings"]
+            explained = style["explained"]
+
+            def describe_axis(axis: str) -> str:
+                """Résume un axe par ses métriques les plus positives et les plus négatives."""
+                ordered = loadings[axis].sort_values()
+                return f"{STYLE_METRICS[ordered.index[-1]]} ↔ {STYLE_METRICS[ordered.index[0]]}"
+
+            style_teams = style_teams.assign(
+                selected=style_teams["team"].isin([selected_team1, selected_team2]).map({True: 16, False: 10})
+            )
+            fig = px.scatter(
+                style_teams,
+                x="pc1",
+                y="pc2",
+                color="cluster_label",
+                size="selected",
+                text="team",
+                labels={
+                    "pc1": f"Axe 1 ({explained[0] * 100:.0f} %)",
+                    "pc2": f"Axe 2 ({explained[1] * 100:.0f} %)" if len(explained) > 1 else "Axe 2",
+                    "cluster_label": "Groupe",
+                },
+                title="Carte des profils de jeu de la ligue",
+            )
+            fig.update_traces(textposition="top center")
+            st.plotly_chart(fig, use_container_width=True)
+
+            st.markdown(f"**Axe 1** : {describe_axis('pc1')}")
+            if "pc2" in loadings.columns:
+                st.markdown(f"**Axe 2** : {describe_axis('pc2')}")
+
+            # Profil détaillé des équipes sélectionnées face à la moyenne de la ligue
+            style_table = style["table"][list(STYLE_METRICS)]
+            profile = pd.DataFrame({
+                selected_team1: style_table.loc[selected_team1] if selected_team1 in style_table.index else np.nan,
+                selected_team2: style_table.loc[selected_team2] if selected_team2 in style_table.index else np.nan,
+                "Moyenne de la ligue": style_table.mean(),
+            }).rename(index=STYLE_METRICS).round(2)
+            profile = profile.loc[:, ~profile.columns.duplicated()]
+            st.dataframe(profile, use_container_width=True)
+
+            st.dataframe(
+                style_teams[["team", "cluster", "cluster_label"]]
+                .sort_values(["cluster", "team"])
+                .rename(columns={"team": "Équipe", "cluster": "Groupe", "cluster_label": "Profil"}),
+                use_container_width=True,
+                hide_index=True,
+            )
+
 except Exception as e:
     st.error(f"Une erreur s'est produite: {e}")
     st.info("Assurez-vous d'avoir accès aux données StatsBomb et que les API sont correctement configurées.")
\ No newline at end of file
@@ -19,6 +19,21 @@ from utils.data_loader import (
     load_players,
     load_events,
 )
+from utils.expected_threat import load_xt_rankings
+from utils.shots import load_season_shots
+from utils.match_stats import CONTEXT_SPLITS, load_split_tables, get_split
+from utils.percentiles import (
+    MIN_MINUTES,
+    PER90_METRICS,
+    load_player_season_table,
+    load_percentile_index,
+    get_player_percentiles,
+)
+from utils.similarity import load_similarity_index, find_similar_players
+from utils.player_index import load_player_index, search_players
+from utils.chance_creation import CHANCE_COLUMNS, load_season_chance_creation
+from utils.pass_sonar import load_pass_sonars, get_sonar_rows, get_sonar
+from utils.passes import PASS_LENGTH_CLASSES
 
 # Configuration de la page
 st.set_page_config(
@@ -111,11 +126,47 @@ try:
         options=player_options,
         index=0 if player_options else None,
     )
-    selected_player2 = st.sidebar.selectbox(
-        "Sélectionner un joueur pour comparaison",
-        options=["Aucun"] + player_options,
+
+    # Les joueurs sont identifiés par (player_id, competition_id, season_id) plutôt que par leur nom
+    player_ids = players.set_index("player_name")["player_id"] if "player_id" in players.columns else pd.Series(dtype=float)
+    player1_key = (float(player_ids.get(selected_player1, np.nan)), competition_id, season_id)
+    season_names = competition_options.set_index(["competition_id", "season_id"])["display_name"]
+
+    comparison_mode = st.sidebar.radio(
+        "Mode de comparaison",
+        options=["Même équipe", "Inter-clubs"],
         index=0,
     )
+    if comparison_mode == "Même équipe":
+        selected_player2 = st.sidebar.selectbox(
+            "Sélectionner un joueur pour comparaison",
+            options=["Aucun"] + player_options,
+            index=0,
+        )
+        player2_key = (
+            (float(player_ids.get(selected_player2, np.nan)), competition_id, season_id)
+            if selected_player2 != "Aucun" else None
+        )
+    else:
+        # Recherche par préfixe dans l'index global (toutes équipes, toutes saisons déjà chargées)
+        player_index = load_player_index(competition_id, season_id)
+        player_query = st.sidebar.text_input("Rechercher un joueur (toutes équipes)")
+        search_results = search_players(player_index, player_query)
+        result_labels = [
+            f"{row.player} ({row.team}, {season_names.get((row.competition_id, row.season_id), row.season_id)})"
+            for row in search_results.itertuples()
+        ]
+        selected_label = st.sidebar.selectbox(
+            "Sélectionner un joueur pour comparaison",
+            options=["Aucun"] + result_labels,
+            index=0,
+        )
+        if selected_label == "Aucun":
+            selected_player2, player2_key = "Aucun", None
+        else:
+            result = search_results.iloc[result_labels.index(selected_label)]
+            selected_player2 = result["player"]
+            player2_key = (float(result["player_id"]), result["competition_id"], result["season_id"])
 
     # Chargement des matchs
     matches = load_matches(competition_id, season_id)
@@ -149,43 +200,31 @@ try:
             # Statistiques clés
             st.markdown("<h3>Statistiques clés</h3>", unsafe_allow_html=True)
 
-            def calculate_player_stats(player_name, matches):
-                goals = 0
-                assists = 0
-                passes_completed = 0
-                shots = 0
-                duels_won = 0
-                minutes_played = 0
-
-                for _, match in matches.iterrows():
-                    match_id = match["match_id"]
-                    events = load_events(match_id)
-                    player_events = events[events["player"] == player_name]
-
-                    goals += player_events[
-                        (player_events["type"] == "Shot") & 
-                        (player_events["shot_outcome"] == "Goal")
-                    ].shape[0]
-                    assists += player_events[player_events["type"] == "Assist"].shape[0]
-                    passes_completed += player_events[
-                        (player_events["type"] == "Pass") & (player_events["pass_outcome"] == "Complete")
-                    ].shape[0]
-                    shots += player_events[player_events["type"] == "Shot"].shape[0]
-                    duels_won += player_events[
-                        (player_events["type"] == "Duel") & (player_events["duel_outcome"] == "Won")
-                    ].shape[0]
-                    minutes_played += player_events["duration"].sum()
-
+            # Statistiques lues dans les tables saison (temps de jeu réel) et dans les actions créatrices
+            def calculate_player_stats(player_key):
+                player_id, player_competition_id, player_season_id = player_key
+                season_players = load_player_season_table(player_competition_id, player_season_id)
+                rows = season_players[season_players["player_id"] == player_id] if not season_players.empty else season_players
+                if rows.empty:
+                    return {"goals": 0, "assists": 0, "key_passes": 0, "shots": 0, "matches": 0, "minutes_played": 0, "sca": 0, "gca": 0}
+                row = rows.iloc[0]
+                _, chance_creation = load_season_chance_creation(player_competition_id, player_season_id)
+                created = (
+                    chance_creation.loc[chance_creation["player_id"] == player_id, CHANCE_COLUMNS].sum()
+                    if not chance_creation.empty else pd.Series(0, index=CHANCE_COLUMNS)
+                )
                 return {
-                    "goals": goals,
-                    "assists": assists,
-                    "passes_completed": passes_completed,
-                    "shots": shots,
-                    "duels_won": duels_won,
-                    "minutes_played": minutes_played,
+                    "goals": int(row["goals"]),
+                    "assists": int(created["assists"]),
+                    "key_passes": int(created["key_passes"]),
+                    "shots": int(row["shots"]),
+                    "matches": int(row["matches"]),
+                    "minutes_played": int(round(row["minutes"])),
+                    "sca": int(created["sca"]),
+                    "gca": int(created["gca"]),
                 }
 
-            player_stats = calculate_player_stats(selected_player1, team_matches)
+            player_stats = calculate_player_stats(player1_key)
 
             # Afficher les métriques principales
             col1, col2, col3, col4 = st.columns(4)
@@ -206,7 +245,7 @@ try:
             with col3:
                 st.markdown(f"""
                 <div class='metric-container'>
-                    <div class='metric-value'>{len(team_matches)}</div>
+                    <div class='metric-value'>{player_stats.get('matches', 0)}</div>
                     <div class='metric-label'>Matchs joués</div>
                 </div>
                 """, unsafe_allow_html=True)
@@ -247,7 +286,7 @@ try:
                     </div>
                     """, unsafe_allow_html=True)
                 with col4:
-                    key_passes_per_90 = round(player_stats.get("passes_completed", 0) * 90 / player_stats["minutes_played"], 2)
+                    key_passes_per_90 = round(player_stats.get("key_passes", 0) * 90 / player_stats["minutes_played"], 2)
                     st.markdown(f"""
                     <div class='metric-container'>
                         <div class='metric-value'>{key_passes_per_90}</div>
@@ -255,148 +294,260 @@ try:
                     </div>
                     """, unsafe_allow_html=True)
 
+                # Actions créant un tir (SCA) ou un but (GCA) : les deux actions offensives précédant chaque tir
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown(f"""
+                    <div class='metric-container'>
+                        <div class='metric-value'>{round(player_stats["sca"] * 90 / player_stats["minutes_played"], 2)}</div>
+                        <div class='metric-label'>SCA / 90 min</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+                with col2:
+                    st.markdown(f"""
+                    <div class='metric-container'>
+                        <div class='metric-value'>{round(player_stats["gca"] * 90 / player_stats["minutes_played"], 2)}</div>
+                        <div class='metric-label'>GCA / 90 min</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+            # Carte des tirs du joueur sur la saison
+            st.markdown("<h4>Carte des tirs</h4>", unsafe_allow_html=True)
+            season_shots = load_season_shots(competition_id, season_id)
+            player_shots = season_shots[season_shots["player_id"] == player1_key[0]] if not season_shots.empty else season_shots
+            if player_shots.empty:
+                st.info(f"Aucun tir enregistré pour {selected_player1}.")
+            else:
+                pitch = VerticalPitch(pitch_type="statsbomb", half=True, line_zorder=2, pitch_color="#22312b", line_color="#efefef")
+                fig, ax = pitch.draw(figsize=(8, 6))
+                pitch.scatter(
+                    player_shots["x"], player_shots["y"],
+                    s=player_shots["xg"] * 1500 + 50,
+                    c=np.where(player_shots["is_goal"], "#FFD700", "none"),
+                    edgecolors="#FFD700",
+                    linewidth=2,
+                    ax=ax,
+                )
+                ax.set_title(
+                    f"{len(player_shots)} tirs, {int(player_shots['is_goal'].sum())} buts, {player_shots['xg'].sum():.2f} xG"
+                )
+                st.pyplot(fig)
+
+            # Sonar de passes : histogramme polaire des directions, calculé pour tous les joueurs de la saison
+            st.markdown("<h4>Sonar de passes</h4>", unsafe_allow_html=True)
+            player_sonars = load_pass_sonars(competition_id, season_id, "player")
+            sonar_rows = (
+                get_sonar_rows(player_sonars, selected_team, player_id=player1_key[0]) if player_sonars else pd.DataFrame()
+            )
+            if sonar_rows.empty:
+                st.info(f"Aucune passe dans le jeu enregistrée pour {selected_player1}.")
+            else:
+                sonar = get_sonar(player_sonars, int(sonar_rows["row"].iloc[0]))
+                fig = go.Figure(
+                    go.Barpolar(
+                        r=sonar["passes"],
+                        theta=sonar["angle"],
+                        width=sonar["theta2"] - sonar["theta1"],
+                        marker=dict(
+                            color=sonar["completion"] * 100,
+                            colorscale="RdYlGn",
+                            cmin=50,
+                            cmax=100,
+                            colorbar=dict(title="Réussite (%)"),
+                            line=dict(color="white", width=1),
+                        ),
+                        customdata=sonar[["mean_length"] + PASS_LENGTH_CLASSES],
+                        hovertemplate=(
+                            "%{r:.0f} passes<br>Longueur moyenne : %{customdata[0]:.1f} yards"
+                            "<br>Courtes / moyennes / longues : %{customdata[1]:.0f} / %{customdata[2]:.0f} / %{customdata[3]:.0f}"
+                            "<extra></extra>"
+                        ),
+                    )
+                )
+                # Sens de l'attaque vers le haut, droite du joueur à droite
+                fig.update_layout(
+                    polar=dict(angularaxis=dict(rotation=90, direction="clockwise", showticklabels=False)),
+                    title=f"{int(sonar['passes'].sum())} passes dans le jeu (attaque vers le haut)",
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+            # Classement de la progression du ballon par l'xT (modèle ajusté sur la compétition)
+            st.markdown("<h4>Progression du ballon (xT) - joueurs de l'équipe</h4>", unsafe_allow_html=True)
+            xt_players, _ = load_xt_rankings(competition_id, season_id)
+            if xt_players.empty:
+                st.info("Aucune donnée xT disponible pour cette compétition.")
+            else:
+                team_xt = xt_players[xt_players["team"] == selected_team].head(10)
+                fig = px.bar(
+                    team_xt.sort_values("xt_total"),
+                    x=["xt_pass", "xt_carry"],
+                    y="player",
+                    orientation="h",
+                    labels={"value": "xT apporté", "player": "Joueur", "variable": "Action"},
+                    title=f"xT apporté par les passes et conduites - {selected_team}",
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+            # Classement de la compétition sur les actions progressives, lu dans la table saison par joueur
+            st.markdown("<h4>Meneurs de la progression du ballon (par 90 minutes)</h4>", unsafe_allow_html=True)
+            progression_labels = {
+                "progressive_passes": "Passes progressives",
+                "progressive_carries": "Conduites progressives",
+                "progressive_receptions": "Réceptions progressives",
+            }
+            progression_metric = st.selectbox(
+                "Action progressive", options=list(progression_labels), format_func=progression_labels.get
+            )
+            league_players = load_player_season_table(competition_id, season_id)
+            if league_players.empty:
+                st.info("Aucune donnée de progression disponible pour cette compétition.")
+            else:
+                leaders = (
+                    league_players[league_players["minutes"] >= MIN_MINUTES]
+                    .nlargest(15, f"{progression_metric}_p90")
+                    .sort_values(f"{progression_metric}_p90")
+                )
+                fig = px.bar(
+                    leaders,
+                    x=f"{progression_metric}_p90",
+                    y="player",
+                    color=leaders["team"] == selected_team,
+                    orientation="h",
+                    hover_data=["team", "minutes", progression_metric],
+                    labels={
+                        f"{progression_metric}_p90": f"{progression_labels[progression_metric]} par 90",
+                        "player": "Joueur", "team": "Équipe", "minutes": "Minutes",
+                        progression_metric: "Total", "color": selected_team,
+                    },
+                    title=f"{progression_labels[progression_metric]} par 90 minutes (au moins {MIN_MINUTES} minutes)",
+                )
+                fig.update_layout(showlegend=False)
+                st.plotly_chart(fig, use_container_width=True)
+
     # Onglet 2: Comparaison de Joueurs
     with tab2:
         st.markdown("<h2 class='sub-header'>Comparaison de Joueurs</h2>", unsafe_allow_html=True)
 
-        # Graphique radar pour comparer les joueurs
-        st.subheader("Graphique Radar: Comparaison des performances")
-        categories = [
-            "Buts",
-            "Passes décisives",
-            "Passes progressives",
-            "Tirs",
-            "Duels gagnés",
-            "Interceptions",
-        ]
-
-        # Extraire les statistiques réelles pour chaque joueur
-        def get_player_statistics(player_name, matches):
-            goals = 0
-            assists = 0
-            progressive_passes = 0
-            shots = 0
-            duels_won = 0
-            interceptions = 0
-
-            for _, match in matches.iterrows():
-                match_id = match["match_id"]
-                events = load_events(match_id)
-                player_events = events[events["player"] == player_name]
-
-                # Calculer les statistiques
-                goals += player_events[
-                    (player_events["type"] == "Shot") & 
-                    (player_events["shot_outcome"] == "Goal")
-                ].shape[0]
-
-                assists += player_events[player_events["type"] == "Assist"].shape[0]
-                progressive_passes += player_events[
-                    (player_events["type"] == "Pass") & (player_events["pass_outcome"] == "Complete")
-                ].shape[0]
-                shots += player_events[player_events["type"] == "Shot"].shape[0]
-                duels_won += player_events[
-                    (player_events["type"] == "Duel") & (player_events["duel_outcome"] == "Won")
-                ].shape[0]
-                interceptions += player_events[player_events["type"] == "Interception"].shape[0]
-
-            return [goals, assists, progressive_passes, shots, duels_won, interceptions]
-
-        player1_values = get_player_statistics(selected_player1, team_matches)
-        if selected_player2 != "Aucun":
-            player2_values = get_player_statistics(selected_player2, team_matches)
-            comparison_name = selected_player2
+        # Graphique radar : percentiles par 90 minutes face aux joueurs du même groupe de postes
+        st.subheader("Graphique Radar: Percentiles face aux joueurs du même poste")
+        percentile_index = load_percentile_index(competition_id, season_id)
+        categories = list(PER90_METRICS.values())
+
+        def get_season_row(player_key):
+            # Table saison mise en cache de la compétition du joueur, lue par identifiant
+            player_id, player_competition_id, player_season_id = player_key
+            season_players = load_player_season_table(player_competition_id, player_season_id)
+            if season_players.empty:
+                return None
+            rows = season_players[season_players["player_id"] == player_id]
+            return rows.iloc[0] if not rows.empty else None
+
+        player1_row = get_season_row(player1_key)
+        comparison_name = selected_player2 if selected_player2 != "Aucun" else "Médiane du poste"
+        if player1_row is None:
+            st.info(f"Aucun temps de jeu enregistré pour {selected_player1}.")
         else:
-            # Utiliser la moyenne du poste (données fictives pour l'exemple)
-            player2_values = [np.mean(player1_values)] * len(categories)
-            comparison_name = "Moyenne du poste"
-
-        # Normaliser les valeurs pour le graphique radar
-        max_values = [max(player1_values[i], player2_values[i]) for i in range(len(categories))]
-        if any(max_val == 0 for max_val in max_values):
-            st.warning("Certaines catégories ont des valeurs nulles. Elles seront ignorées dans le graphique radar.")
-            max_values = [max_val if max_val != 0 else 1 for max_val in max_values]
-
-        player1_values_norm = [player1_values[i] / max_values[i] for i in range(len(categories))]
-        player2_values_norm = [player2_values[i] / max_values[i] for i in range(len(categories))]
-
-        # Créer le graphique radar
-        fig = go.Figure()
-        fig.add_trace(
-            go.Scatterpolar(
-                r=player1_values_norm,
-                theta=categories,
-                fill="toself",
-                name=selected_player1,
+            player1_values = get_player_percentiles(percentile_index, player1_row)
+            player2_row = get_season_row(player2_key) if player2_key is not None else None
+            if player2_row is not None:
+                # Percentiles calculés face aux joueurs du même poste dans la compétition du joueur 1
+                player2_values = get_player_percentiles(percentile_index, player2_row)
+            else:
+                # Référence : le joueur médian du groupe de postes
+                player2_values = pd.Series(50.0, index=player1_values.index)
+                comparison_name = "Médiane du poste"
+
+            st.caption(
+                f"{selected_player1} : {player1_row['position_group'] or 'poste inconnu'}, "
+                f"{player1_row['minutes']:.0f} minutes. Référence : joueurs du même groupe de postes "
+                f"ayant joué au moins {MIN_MINUTES} minutes."
             )
-        )
-        fig.add_trace(
-            go.Scatterpolar(
-                r=player2_values_norm,
-                theta=categories,
-                fill="toself",
-                name=comparison_name,
+
+            fig = go.Figure()
+            for name, values in [(selected_player1, player1_values), (comparison_name, player2_values)]:
+                fig.add_trace(
+                    go.Scatterpolar(
+                        r=values.fillna(0).tolist(),
+                        theta=categories,
+                        fill="toself",
+                        name=name,
+                        hovertemplate="%{theta}: %{r:.0f}e percentile<extra></extra>",
+                    )
+                )
+            fig.update_layout(
+                polar=dict(
+                    radialaxis=dict(
+                        visible=True,
+                        range=[0, 100],
+                    )
+                ),
+                showlegend=True,
             )
-        )
-        fig.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 1],
+            st.plotly_chart(fig, use_container_width=True)
+
+            per90_table = pd.DataFrame({
+                "Par 90 minutes": [player1_row[f"{metric}_p90"] for metric in PER90_METRICS],
+                "Percentile": player1_values.to_numpy(),
+            }, index=categories)
+            st.dataframe(per90_table.round(2))
+
+            # Joueurs similaires : cosinus sur les profils par 90 standardisés, toutes saisons chargées confondues
+            st.subheader(f"Joueurs similaires à {selected_player1}")
+            col1, col2 = st.columns(2)
+            with col1:
+                n_similar = st.slider("Nombre de joueurs", min_value=5, max_value=20, value=10)
+            with col2:
+                same_position = st.checkbox("Même groupe de postes uniquement", value=True)
+            similarity_index = load_similarity_index(competition_id, season_id)
+            similar_players = find_similar_players(
+                similarity_index, player1_row["player_id"], competition_id, season_id, n_similar, same_position
+            )
+            if similar_players.empty:
+                st.info(f"{selected_player1} n'a pas assez joué (moins de {MIN_MINUTES} minutes) pour la recherche de similarité.")
+            else:
+                similar_players["Saison"] = season_names.reindex(
+                    pd.MultiIndex.from_frame(similar_players[["competition_id", "season_id"]])
+                ).to_numpy()
+                st.dataframe(
+                    similar_players[["player", "team", "Saison", "position_group", "minutes", "similarity"]]
+                    .round(1)
+                    .rename(columns={
+                        "player": "Joueur", "team": "Équipe", "position_group": "Poste",
+                        "minutes": "Minutes", "similarity": "Similarité (%)",
+                    })
                 )
-            ),
-            showlegend=True,
-        )
-        st.plotly_chart(fig, use_container_width=True)
 
         # Boîte à moustaches pour analyser les variations de performance
         st.subheader("Boîte à moustaches: Analyse des variations de performance")
+        boxplot_stats = {
+            "Buts": "goals",
+            "Passes décisives": "assists",
+            "Passes réussies": "passes_completed",
+            "Passes progressives": "progressive_passes",
+            "Tirs": "shots",
+            "Duels gagnés": "duels_won",
+            "Interceptions": "interceptions",
+        }
         stat_type = st.selectbox(
             "Sélectionner une statistique",
-            options=["Buts", "Passes décisives", "Passes progressives", "Tirs", "Duels gagnés", "Interceptions"],
+            options=list(boxplot_stats),
             index=0,
         )
 
-        # Extraire les données réelles pour la boîte à moustaches
-        def extract_boxplot_data(player_name, matches, stat_type):
-            data = []
-            for _, match in matches.iterrows():
-                match_id = match["match_id"]
-                events = load_events(match_id)
-                player_events = events[events["player"] == player_name]
-
-                if stat_type == "Buts":
-                    data.append( player_events[
-                    (player_events["type"] == "Shot") & 
-                    (player_events["shot_outcome"] == "Goal")
-                ].shape[0])
-                    
-                elif stat_type == "Passes décisives":
-                    data.append(player_events[player_events["type"] == "Assist"].shape[0])
-                elif stat_type == "Passes progressives":
-                    data.append(
-                        player_events[
-                            (player_events["type"] == "Pass") & (player_events["pass_outcome"] == "Complete")
-                        ].shape[0]
-                    )
-                elif stat_type == "Tirs":
-                    data.append(player_events[player_events["type"] == "Shot"].shape[0])
-                elif stat_type == "Duels gagnés":
-                    data.append(
-                        player_events[
-                            (player_events["type"] == "Duel") & (player_events["duel_outcome"] == "Won")
-                        ].shape[0]
-                    )
-                elif stat_type == "Interceptions":
-                    data.append(player_events[player_events["type"] == "Interception"].shape[0])
-
-            return data
-
-        player1_data = extract_boxplot_data(selected_player1, team_matches, stat_type)
-        if selected_player2 != "Aucun":
-            player2_data = extract_boxplot_data(selected_player2, team_matches, stat_type)
+        # Valeurs par match lues dans les statistiques par match de la saison du joueur
+        def extract_boxplot_data(player_key, stat_type):
+            player_id, player_competition_id, player_season_id = player_key
+            tables = load_split_tables(player_competition_id, player_season_id)
+            if not tables:
+                return []
+            match_stats = tables["match_stats"]
+            return match_stats.loc[match_stats["player_id"] == player_id, boxplot_stats[stat_type]].tolist()
+
+        player1_data = extract_boxplot_data(player1_key, stat_type)
+        if player2_key is not None:
+            player2_data = extract_boxplot_data(player2_key, stat_type)
         else:
-            player2_data = [np.mean(player1_data)] * len(player1_data)
+            player2_data = [np.mean(player1_data)] * len(player1_data) if player1_data else []
 
         # Créer le dataframe pour la boîte à moustaches
         boxplot_data = pd.DataFrame(
@@ -421,44 +572,36 @@ try:
 
         # Graphique en courbes pour suivre la progression
         st.subheader(f"Progression de {selected_player1} sur plusieurs matchs")
+        progression_stats = {
+            "Buts": ("match_stats", "goals"),
+            "Passes décisives": ("chance_creation", "assists"),
+            "Actions créant un tir (SCA)": ("chance_creation", "sca"),
+            "Actions créant un but (GCA)": ("chance_creation", "gca"),
+            "Tirs": ("match_stats", "shots"),
+            "Duels gagnés": ("match_stats", "duels_won"),
+            "Interceptions": ("match_stats", "interceptions"),
+        }
         stat_to_track = st.selectbox(
             "Sélectionner une statistique à suivre",
-            options=["Buts", "Passes décisives", "Tirs", "Duels gagnés", "Interceptions"],
+            options=list(progression_stats),
             index=0,
         )
 
-        # Extraire les données réelles pour la progression
-        def extract_progression_data(player_name, matches, stat_type):
-            data = []
-            match_dates = []
-            for _, match in matches.iterrows():
-                match_id = match["match_id"]
-                events = load_events(match_id)
-                player_events = events[events["player"] == player_name]
-
-                if stat_type == "Buts":
-                    data.append(player_events[
-                    (player_events["type"] == "Shot") & 
-                    (player_events["shot_outcome"] == "Goal")
-                ].shape[0])
-                elif stat_type == "Passes décisives":
-                    data.append(player_events[player_events["type"] == "Assist"].shape[0])
-                elif stat_type == "Tirs":
-                    data.append(player_events[player_events["type"] == "Shot"].shape[0])
-                elif stat_type == "Duels gagnés":
-                    data.append(
-                        player_events[
-                            (player_events["type"] == "Duel") & (player_events["duel_outcome"] == "Won")
-                        ].shape[0]
-                    )
-                elif stat_type == "Interceptions":
-                    data.append(player_events[player_events["type"] == "Interception"].shape[0])
-
-                match_dates.append(match["match_date"])
-
-            return match_dates, data
-
-        match_dates, stat_values = extract_progression_data(selected_player1, team_matches, stat_to_track)
+        # Valeurs par match lues dans les tables de la saison (0 pour les matchs sans action du joueur)
+        def extract_progression_data(player_key, matches, stat_type):
+            player_id, player_competition_id, player_season_id = player_key
+            source, column = progression_stats[stat_type]
+            if source == "match_stats":
+                tables = load_split_tables(player_competition_id, player_season_id)
+                table = tables["match_stats"] if tables else pd.DataFrame(columns=["match_id", "player_id", column])
+            else:
+                _, table = load_season_chance_creation(player_competition_id, player_season_id)
+                if table.empty:
+                    table = pd.DataFrame(columns=["match_id", "player_id", column])
+            values = table[table["player_id"] == player_id].groupby("match_id")[column].sum()
+            return matches["match_date"].tolist(), matches["match_id"].map(values).fillna(0).tolist()
+
+        match_dates, stat_values = extract_progression_data(player1_key, team_matches, stat_to_track)
 
         # Créer le dataframe pour le graphique en courbes
         progression_data = pd.DataFrame(
@@ -495,19 +638,78 @@ try:
     with tab4:
         st.markdown("<h2 class='sub-header'>Analyse Contextuelle</h2>", unsafe_allow_html=True)
 
+        # Découpages contextuels lus dans les tables précalculées de la saison
+        split_tables = load_split_tables(competition_id, season_id)
+        col1, col2 = st.columns(2)
+        with col1:
+            split = st.radio(
+                "Découper selon",
+                options=list(CONTEXT_SPLITS),
+                format_func=CONTEXT_SPLITS.get,
+                horizontal=True,
+            )
+        with col2:
+            stat_labels = {
+                "goals": "Buts", "xg": "xG", "shots": "Tirs", "assists": "Passes décisives", "key_passes": "Passes clés",
+                "passes": "Passes", "passes_completed": "Passes réussies", "duels_won": "Duels gagnés",
+                "interceptions": "Interceptions", "recoveries": "Récupérations", "pressures": "Pressions",
+                "actions": "Actions",
+            }
+            context_stat = st.selectbox(
+                "Statistique", options=list(stat_labels), format_func=stat_labels.get, key="context_stat"
+            )
+
+        player_split = get_split(split_tables, split, selected_team, player1_key[0])
+        team_split = get_split(split_tables, split, selected_team)
+        if player_split.empty:
+            st.info(f"Aucune donnée contextuelle pour {selected_player1}.")
+        else:
+            # Moyenne par match pour les contextes de match ; total pour l'état du score, qui varie pendant le match
+            per_match = split != "game_state"
+            player_split["value"] = player_split[context_stat] / player_split["matches"] if per_match else player_split[context_stat]
+            player_split["team_share"] = (
+                player_split[context_stat]
+                / player_split[split].map(team_split.set_index(split)[context_stat]).astype(float).replace(0, np.nan)
+                * 100
+            )
+            fig = px.bar(
+                player_split,
+                x=split,
+                y="value",
+                text="matches",
+                hover_data={"team_share": ":.1f"},
+                labels={
+                    split: CONTEXT_SPLITS[split],
+                    "value": f"{stat_labels[context_stat]} par match" if per_match else stat_labels[context_stat],
+                    "matches": "Matchs",
+                    "team_share": "Part de l'équipe (%)",
+                },
+                title=f"{stat_labels[context_stat]} de {selected_player1} — {CONTEXT_SPLITS[split].lower()}",
+            )
+            fig.update_traces(texttemplate="%{text} matchs", textposition="outside")
+            st.plotly_chart(fig, use_container_width=True)
+
+            st.dataframe(
+                player_split[[split, "matches"] + [stat for stat in stat_labels]]
+                .round(2)
+                .rename(columns={split: CONTEXT_SPLITS[split], "matches": "Matchs", **stat_labels})
+            )
+
+        st.subheader("Zones d'action")
+
         # Heatmap des zones d'action
         pitch = Pitch(pitch_type="statsbomb", line_zorder=2)
         fig, ax = pitch.draw(figsize=(12, 8))
 
         # Extraire les positions des actions
-        def extract_heatmap_data(player_name, matches):
+        def extract_heatmap_data(player_id, matches):
             x_coords = []
             y_coords = []
 
             for _, match in matches.iterrows():
                 match_id = match["match_id"]
                 events = load_events(match_id)
-                player_events = events[events["player"] == player_name]
+                player_events = events[events["player_id"] == player_id]
 
                 for _, event in player_events.iterrows():
                     if "location" in event and isinstance(event["location"], list):
@@ -516,7 +718,7 @@ try:
 
             return x_coords, y_coords
 
-        x_coords, y_coords = extract_heatmap_data(selected_player1, team_matches)
+        x_coords, y_coords = extract_heatmap_data(player1_key[0], team_matches)
         pitch.kdeplot(x_coords, y_coords, ax=ax, cmap="YlOrRd", shade=True, levels=100)
         st.pyplot(fig)
 
@@ -5,7 +5,6 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
-from statsbombpy import sb
 from mplsoccer import Pitch, VerticalPitch
 import sys
 import os
@@ -18,6 +17,7 @@ from utils.data_loader import (
     load_teams,
     load_events,
 )
+from utils.formations import collect_team_formations, load_match_formations, summarize_formations, WINDOW_MINUTES
 
 # Configuration de la page
 st.set_page_config(
@@ -202,78 +202,96 @@ try:
     with tab2:
         st.markdown("<h2 class='sub-header'>Schéma Tactique</h2>", unsafe_allow_html=True)
 
-        # Sélection de la formation
-        formation = st.selectbox(
-            "Sélectionner une formation",
-            options=["4-3-3", "4-4-2", "3-5-2", "4-2-3-1", "5-3-2"],
-            index=0,
-        )
+        # Systèmes détectés : gabarit le plus proche des positions médianes par fenêtre de 15 minutes
+        formations = collect_team_formations(team_matches["match_id"], selected_team)
+        if formations.empty:
+            st.info("Pas assez d'événements pour détecter les systèmes de jeu de cette équipe.")
+        else:
+            match_labels = team_matches.assign(
+                label=team_matches["match_date"].astype(str) + " : " + team_matches["home_team"] + " vs " + team_matches["away_team"]
+            ).set_index("match_id")["label"]
+
+            st.subheader("Systèmes de jeu sur la saison")
+            summary = summarize_formations(formations)
+            season_shape = (
+                formations.groupby(["match_id", "formation"]).size().rename("windows").reset_index()
+                .assign(minutes=lambda frame: frame["windows"] * WINDOW_MINUTES)
+            )
+            season_shape["match"] = season_shape["match_id"].map(match_labels)
+            fig = px.bar(
+                season_shape.sort_values("match"),
+                x="match",
+                y="minutes",
+                color="formation",
+                labels={"match": "Match", "minutes": "Minutes", "formation": "Système"},
+                title=f"Systèmes détectés par match - {selected_team}",
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            declared = formations.groupby("match_id")["declared_formation"].first()
+            summary_table = pd.DataFrame({
+                "Match": summary["match_id"].map(match_labels),
+                "Système annoncé": summary["match_id"].map(declared),
+                "Système principal détecté": summary["main_formation"],
+                "Changements de système": summary["changes"],
+            }).sort_values("Match")
+            st.dataframe(summary_table, use_container_width=True, hide_index=True)
+
+            # Détail d'un match : système par fenêtre et positions médianes
+            st.subheader("Évolution du système pendant un match")
+            selected_match_id = st.selectbox(
+                "Sélectionner un match",
+                options=summary["match_id"].tolist(),
+                format_func=lambda match_id: match_labels.get(match_id, str(match_id)),
+                key="formation_match",
+            )
+            match_formations, match_positions = load_match_formations(selected_match_id)
+            match_formations = match_formations[match_formations["team"] == selected_team]
+            st.dataframe(
+                pd.DataFrame({
+                    "Minute": match_formations["start_minute"].astype(int),
+                    "Système détecté": match_formations["formation"],
+                    "Système annoncé": match_formations["declared_formation"],
+                    "Joueurs positionnés": match_formations["players"],
+                    "Écart au gabarit": match_formations["cost"].round(3),
+                }),
+                use_container_width=True,
+                hide_index=True,
+            )
 
-        # Créer un terrain de football
-        pitch = Pitch(pitch_type="statsbomb", line_zorder=2, pitch_color="#22312b", line_color="#efefef")
-        fig, ax = pitch.draw(figsize=(12, 8))
-        
-  
-        def place_players(ax, formation, team_name, matches):
-            for _, match in matches.iterrows():
-                match_id = match["match_id"]
-                lineup = sb.lineups(match_id=match_id)
-                team_lineup = lineup.get(team_name, pd.DataFrame())
-
-                # Vérification de la structure de "team_lineup"
-                print(team_lineup.columns)  # Pour vérifier les colonnes disponibles
-                
-                # On s'assure que "location" est présent et est sous forme de liste ou de dictionnaire
-                if "location" not in team_lineup.columns:
-                    print(f"Pas de données de location pour le match {match_id}")
-                    continue
-                
-                # Si la colonne "location" est présente, nous traitons les positions des joueurs
-                if formation == "4-3-3":
-                    # Gardien
-                    goalkeeper = team_lineup[team_lineup["jersey_number"] == 1].iloc[0]
-                    goalkeeper_x, goalkeeper_y = goalkeeper["location"]
-                    ax.plot(goalkeeper_x, goalkeeper_y, 'ro', markersize=12)
-                    ax.text(goalkeeper_x, goalkeeper_y - 5, "GK", fontsize=10, ha='center')
-
-                    # Défenseurs
-                    defenders = team_lineup[(team_lineup["position"] == "Defender") & (team_lineup["jersey_number"] != 1)]
-                    for _, defender in defenders.iterrows():
-                        defender_x, defender_y = defender["location"]
-                        ax.plot(defender_x, defender_y, 'bo', markersize=12)
-                        ax.text(defender_x, defender_y - 5, f"DEF{defender['jersey_number']}", fontsize=10, ha='center')
-
-                    # Milieux
-                    midfielders = team_lineup[(team_lineup["position"] == "Midfielder") & (team_lineup["jersey_number"] != 1)]
-                    for _, midfielder in midfielders.iterrows():
-                        midfielder_x, midfielder_y = midfielder["location"]
-                        ax.plot(midfielder_x, midfielder_y, 'go', markersize=12)
-                        ax.text(midfielder_x, midfielder_y - 5, f"MID{midfielder['jersey_number']}", fontsize=10, ha='center')
-
-                    # Attaquants
-                    forwards = team_lineup[(team_lineup["position"] == "Forward") & (team_lineup["jersey_number"] != 1)]
-                    for _, forward in forwards.iterrows():
-                        forward_x, forward_y = forward["location"]
-                        ax.plot(forward_x, forward_y, 'yo', markersize=12)
-                        ax.text(forward_x, forward_y - 5, f"FW{forward['jersey_number']}", fontsize=10, ha='center')
-
-                # Ajoutez d'autres formations ici si nécessaire
-
-            return fig
-
-
-        fig = place_players(ax, formation, selected_team, team_matches)
-        st.pyplot(fig)
+            start_minute = st.select_slider(
+                "Fenêtre de 15 minutes",
+                options=match_formations["start_minute"].astype(int).tolist(),
+                key="formation_window",
+            )
+            window = match_formations[match_formations["start_minute"].astype(int) == start_minute].iloc[0]
+            window_positions = match_positions[
+                (match_positions["team"] == selected_team)
+                & (match_positions["period"] == window["period"])
+                & (match_positions["window"] == window["window"])
+            ]
+
+            pitch = Pitch(pitch_type="statsbomb", line_zorder=2, pitch_color="#22312b", line_color="#efefef")
+            fig, ax = pitch.draw(figsize=(12, 8))
+            pitch.scatter(
+                window_positions["x"], window_positions["y"],
+                s=window_positions["events"] * 40, color="#1E88E5", edgecolors="white", zorder=3, ax=ax
+            )
+            for _, player in window_positions.iterrows():
+                pitch.annotate(
+                    str(player["player"]).split()[-1], (player["x"], player["y"] - 4),
+                    color="white", fontsize=10, ha="center", ax=ax
+                )
+            ax.set_title(f"{selected_team} - {window['formation']} ({start_minute}e-{start_minute + WINDOW_MINUTES}e minute)", color="black")
+            st.pyplot(fig)
 
-        # Ajouter une légende au schéma tactique
         st.markdown("""
         <div class='card'>
-            <h3>Légende du Schéma Tactique</h3>
-            <p>Gardien (GK): Red point</p>
-            <p>Défenseurs (DEF): Blue points</p>
-            <p>Milieux (MID): Green points</p>
-            <p>Attaquants (FW): Yellow points</p>
-            <p>Cette visualisation montre la position des joueurs sur le terrain selon la formation sélectionnée.</p>
+            <h3>Lecture du Schéma Tactique</h3>
+            <p>Pour chaque fenêtre de 15 minutes, la position médiane des joueurs de champ est calculée à partir de leurs actions.</p>
+            <p>Le nuage de positions est comparé à chaque système de référence par une affectation optimale joueurs × postes.</p>
+            <p>Le système retenu est celui dont l'écart moyen au gabarit est le plus faible.</p>
+            <p>La taille des points indique le nombre d'actions du joueur dans la fenêtre.</p>
         </div>
         """, unsafe_allow_html=True)
 
@@ -14,7 +14,43 @@ from mplsoccer import Pitch, VerticalPitch
 
 # Ajouter le répertoire parent au chemin pour importer les fonctions utilitaires
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.data_loader import load_competitions, load_matches, load_teams, load_events, load_filtered_events
+from utils.data_loader import (
+    load_competitions,
+    load_matches,
+    load_teams,
+    load_events,
+    load_filtered_events,
+    load_normalized_events,
+    load_season_events,
+    GAME_STATES,
+)
+from utils.passes import PASS_LENGTH_CLASSES, PASS_DIRECTIONS
+from utils.zones import CHANNELS, count_by_zone, N_ZONE18_COLUMNS, N_ZONE18_ROWS
+from utils.spatial_index import load_season_spatial_index, query_rectangle, query_zone18, get_zone18_bounds
+from utils.possession import (
+    load_possession_chains,
+    load_season_possession_chains,
+    compute_possession_share,
+    CHAIN_OUTCOMES,
+)
+from utils.sequence_mining import load_sequence_state, get_top_sequences, TOKEN_MODES, MIN_NGRAM, MAX_NGRAM
+from utils.possession_search import load_possession_index, find_similar_possessions, get_possession_path
+from utils.set_pieces import load_set_piece_tables, get_team_set_pieces, SET_PIECES, DELIVERY_ZONES, FIRST_CONTACTS
+from utils.transitions import load_match_transitions, load_season_transitions, summarize_transitions
+from utils.defensive import (
+    load_match_defensive_metrics,
+    load_season_defensive_metrics,
+    aggregate_defensive_metrics,
+    DEFENSIVE_ZONES,
+)
+from utils.pass_network import (
+    load_pass_network,
+    get_network_edges,
+    load_match_centrality,
+    load_season_centrality,
+    aggregate_centrality,
+    CENTRALITY_COLUMNS,
+)
 
 # Configuration de la page
 st.set_page_config(
@@ -126,13 +162,21 @@ try:
         options=["Match complet", "1ère mi-temps", "2ème mi-temps"],
         index=0
     )
+
+    # L'état du score est calculé à la normalisation : filtrer ne coûte qu'un masque
+    selected_game_states = st.sidebar.multiselect(
+        "État du score (équipe qui agit)",
+        options=GAME_STATES,
+        default=GAME_STATES
+    )
     
     # Onglets pour les différentes analyses
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "Analyse de Possession", 
         "Analyse des Passes",
         "Analyse Défensive",
-        "Analyse des Transitions"
+        "Analyse des Transitions",
+        "Coups de Pied Arrêtés"
     ])
     
     # Onglet 1: Analyse de Possession
@@ -142,54 +186,156 @@ try:
         # Statistiques de possession
         st.subheader("Statistiques de possession")
 
-        # Fonction pour calculer la possession globale
-        def calculate_possession(team_name, matches):
-            possession_data = []
+        # Possession calculée à partir de la durée des séquences de possession
+        match_chains = load_possession_chains(selected_match_id)
+        match_share = compute_possession_share(match_chains)
 
-            for _, match in matches.iterrows():
-                match_id = match["match_id"]
-                events = load_events(match_id)  # Charger les événements du match
-                team_events = events[events["team"] == team_name]
-                
-                possession_time = 0  # Initialisation du temps de possession
+        # Affichage des métriques de possession
+        st.subheader("Possession globale")
+        col1, col2, col3 = st.columns([2, 1, 2])
+        with col1:
+            st.metric(f"Possession {selected_match_home} (%)", round(match_share.get(selected_match_home, 0), 2))
+        with col2:
+            st.markdown("<div style='text-align: center; padding-top: 20px;'>vs</div>", unsafe_allow_html=True)
+        with col3:
+            st.metric(f"Possession {selected_match_away} (%)", round(match_share.get(selected_match_away, 0), 2))
 
-                # Boucle à travers les événements et calculer la possession
-                for _, event in team_events.iterrows():
-                    if event["type"] == "Pass" or event["type"] == "Carry":
-                        possession_time += 1  # Exemple d'attribution d'une unité de temps pour chaque événement
+        # Séquences de possession : les questions de séquence deviennent des filtres sur la table
+        st.subheader("Séquences de possession")
+        chain_scope = st.radio(
+            "Périmètre des séquences",
+            options=["Match sélectionné", "Toute la saison"],
+            horizontal=True
+        )
+        chains = match_chains if chain_scope == "Match sélectionné" else load_season_possession_chains(competition_id, season_id)
 
-                # Calculer la possession en pourcentage
-                total_event_time = len(team_events)
-                possession_percentage = (possession_time / total_event_time) * 100 if total_event_time > 0 else 0
-                possession_data.append(possession_percentage)
+        if chains.empty:
+            st.warning("Aucune séquence de possession disponible.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                selected_outcomes = st.multiselect(
+                    "Issue de la séquence",
+                    options=CHAIN_OUTCOMES,
+                    default=["But", "Tir"]
+                )
+            with col2:
+                min_chain_passes = st.slider("Nombre minimum de passes", min_value=0, max_value=20, value=0)
 
-            return possession_data
+            team_chains = chains[
+                (chains["team"] == selected_team)
+                & chains["outcome"].isin(selected_outcomes)
+                & (chains["passes"] >= min_chain_passes)
+            ]
 
-        # Calcul de la possession pour chaque match (sans notion de période)
-        home_possession = calculate_possession(
-            team_name=selected_match_home, 
-            matches=team_matches[team_matches["home_team"] == selected_match_home]
-        )
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Séquences", len(team_chains))
+            with col2:
+                st.metric("Passes par séquence", round(team_chains["passes"].mean(), 1) if not team_chains.empty else 0)
+            with col3:
+                st.metric("Durée moyenne (sec)", round(team_chains["duration"].mean(), 1) if not team_chains.empty else 0)
+            with col4:
+                st.metric("xG générés", round(team_chains["xg"].sum(), 2))
 
-        away_possession = calculate_possession(
-            team_name=selected_match_away, 
-            matches=team_matches[team_matches["away_team"] == selected_match_away]
-        )
+            st.dataframe(
+                team_chains[[
+                    "match_id", "possession", "period", "play_pattern", "start_time", "duration",
+                    "start_x", "start_y", "end_x", "end_y", "passes", "outcome", "xg"
+                ]].round(2),
+                use_container_width=True
+            )
 
-        # Affichage des métriques de possession
-        st.subheader("Possession globale")
-        col1, col2, col3 = st.columns([2, 1, 2])
+        # Enchaînements fréquents : n-grammes comptés match par match dans un sketch de taille fixe
+        st.subheader("Enchaînements fréquents")
+        col1, col2, col3 = st.columns(3)
         with col1:
-            home_possession = round(np.mean(home_possession), 2)
-            st.metric("Possession à domicile (%)", home_possession)
+            token_mode = st.radio("Jetons", options=list(TOKEN_MODES), horizontal=True, key="sequence_tokens")
         with col2:
-            st.markdown("<div style='text-align: center; padding-top: 20px;'>vs</div>", unsafe_allow_html=True)
+            ngram_length = st.selectbox(
+                "Longueur de l'enchaînement",
+                options=["Toutes"] + list(range(MIN_NGRAM, MAX_NGRAM + 1)),
+                index=2,
+                key="sequence_length"
+            )
         with col3:
-            away_possession = round(np.mean(away_possession), 2)
-            st.metric("Possession à l'extérieur (%)", away_possession)
+            top_k = st.slider("Nombre d'enchaînements", min_value=5, max_value=50, value=15, key="sequence_top")
 
-        # ⚠️ Retirer le graphique "par période" car la période est supprimée
-        # Tu peux le remplacer par un graphique global si tu veux
+        sequence_state = load_sequence_state(competition_id, season_id, token_mode)
+        top_sequences = get_top_sequences(
+            sequence_state,
+            selected_team,
+            token_mode,
+            length=None if ngram_length == "Toutes" else ngram_length,
+            k=top_k
+        )
+        if top_sequences.empty:
+            st.warning("Aucun enchaînement disponible pour cette équipe.")
+        else:
+            fig = px.bar(
+                top_sequences.iloc[::-1],
+                x="per_match",
+                y="sequence",
+                orientation="h",
+                labels={"per_match": "Occurrences par match", "sequence": ""},
+                title=f"Enchaînements les plus fréquents sur la saison - {selected_team}"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption("Comptes estimés par un count-min sketch : ils peuvent légèrement surestimer les enchaînements rares.")
+
+        # Possessions similaires : plus proches voisins dans la matrice des possessions encodées de la saison
+        st.subheader("Possessions similaires")
+        possession_index = load_possession_index(competition_id, season_id)
+        query_chains = match_chains[match_chains["team"] == selected_team] if not match_chains.empty else match_chains
+        if not possession_index or query_chains.empty:
+            st.warning("Aucune possession disponible pour la recherche.")
+        else:
+            query_chains = query_chains.sort_values(["shots", "passes"], ascending=False)
+            possession_labels = pd.Series(
+                (query_chains["start_time"] // 60).astype(int).astype(str) + "e min - "
+                + query_chains["play_pattern"].astype(str) + " - "
+                + query_chains["passes"].astype(int).astype(str) + " passes - "
+                + query_chains["outcome"],
+                index=query_chains["possession"].to_numpy()
+            )
+            selected_possession = st.selectbox(
+                "Possession de référence",
+                options=possession_labels.index.tolist(),
+                format_func=possession_labels.get,
+                key="similar_possession"
+            )
+            exclude_match = st.checkbox("Exclure les possessions du même match", value=True, key="similar_exclude")
+            similar = find_similar_possessions(
+                possession_index, selected_match_id, selected_possession, k=20, exclude_match=exclude_match
+            )
+            if similar.empty:
+                st.info("Aucune possession comparable trouvée.")
+            else:
+                reference_row = np.flatnonzero(
+                    (possession_index["chains"]["match_id"] == selected_match_id).to_numpy()
+                    & (possession_index["chains"]["possession"] == selected_possession).to_numpy()
+                )[0]
+                reference_path = get_possession_path(possession_index, reference_row)
+
+                # Une mini-carte par possession : trajet de référence en gris, possession similaire en couleur
+                pitch = Pitch(pitch_type="statsbomb", line_color="#9e9e9e", linewidth=0.8)
+                fig, axs = pitch.draw(nrows=4, ncols=5, figsize=(16, 10))
+                for ax, result in zip(axs.flat, similar.itertuples()):
+                    path = get_possession_path(possession_index, result.row)
+                    pitch.plot(reference_path[:, 0], reference_path[:, 1], color="#bdbdbd", linewidth=1.5, ax=ax)
+                    pitch.plot(path[:, 0], path[:, 1], color="#1E88E5", linewidth=2, ax=ax)
+                    pitch.scatter(path[0, 0], path[0, 1], s=30, color="#1E88E5", ax=ax)
+                    pitch.scatter(path[-1, 0], path[-1, 1], s=30, color="#E53935", marker="X" if result.outcome in ["But", "Tir"] else "o", ax=ax)
+                    ax.set_title(f"{result.team} · {int(result.start_time // 60)}e · {result.outcome}", fontsize=9)
+                for ax in list(axs.flat)[len(similar):]:
+                    ax.remove()
+                st.pyplot(fig)
+
+                st.dataframe(
+                    similar[["match_id", "team", "period", "play_pattern", "start_time", "duration", "passes", "xg", "outcome", "distance"]].round(2),
+                    use_container_width=True,
+                    hide_index=True
+                )
 
         # Carte de chaleur de la possession
         st.subheader("Carte de chaleur de la possession")
@@ -252,15 +398,19 @@ try:
         # Statistiques de passes
         st.subheader("Statistiques de passes")
         
-        st.write(team_matches["home_team"])
+        # Passes du match sélectionné, classées lors de la normalisation des événements
+        match_events = load_normalized_events(selected_match_id)
+        match_events = match_events[match_events["game_state"].isin(selected_game_states)]
+        match_passes = match_events[match_events["type"] == "Pass"]
+        pass_counts = match_passes.groupby("team")["pass_completed"].agg(["size", "sum"])
 
-        # Générer des données fictives pour les passes team_events[team_events["type"] == "Pass"].shape[0]
-        home_passes = np.mean(team_matches[team_matches["home_team"] == selected_team]["pass"])
-        away_passes = np.mean(team_matches[team_matches["away_team"] == selected_team]["pass"])
-        home_accuracy = round(np.mean(team_matches[team_matches["home_team"] == selected_team]["pass_accuracy"]) * 100, 2)
-        away_accuracy = round(np.mean(team_matches[team_matches["away_team"] == selected_team]["pass_accuracy"]) * 100, 2)
+        home_passes = int(pass_counts["size"].get(selected_match_home, 0))
+        away_passes = int(pass_counts["size"].get(selected_match_away, 0))
+        home_completed = int(pass_counts["sum"].get(selected_match_home, 0))
+        away_completed = int(pass_counts["sum"].get(selected_match_away, 0))
+        home_accuracy = round(home_completed / home_passes * 100, 2) if home_passes else 0
+        away_accuracy = round(away_completed / away_passes * 100, 2) if away_passes else 0
 
-        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -269,8 +419,8 @@ try:
                 <h3>{selected_match_home}</h3>
                 <p><strong>Passes totales:</strong> {home_passes}</p>
                 <p><strong>Précision des passes:</strong> {home_accuracy}%</p>
-                <p><strong>Passes réussies:</strong> {int(home_passes * home_accuracy / 100)}</p>
-                <p><strong>Passes manquées:</strong> {int(home_passes * (100 - home_accuracy) / 100)}</p>
+                <p><strong>Passes réussies:</strong> {home_completed}</p>
+                <p><strong>Passes manquées:</strong> {home_passes - home_completed}</p>
             </div>
             """, unsafe_allow_html=True)
         
@@ -280,66 +430,101 @@ try:
                 <h3>{selected_match_away}</h3>
                 <p><strong>Passes totales:</strong> {away_passes}</p>
                 <p><strong>Précision des passes:</strong> {away_accuracy}%</p>
-                <p><strong>Passes réussies:</strong> {int(away_passes * away_accuracy / 100)}</p>
-                <p><strong>Passes manquées:</strong> {int(away_passes * (100 - away_accuracy) / 100)}</p>
+                <p><strong>Passes réussies:</strong> {away_completed}</p>
+                <p><strong>Passes manquées:</strong> {away_passes - away_completed}</p>
             </div>
             """, unsafe_allow_html=True)
         
         # Réseau de passes
         st.subheader("Réseau de passes")
-        
-        # Réseau de passes
-        st.subheader("Réseau de passes")
-        pitch = Pitch(pitch_type="statsbomb", line_zorder=2, pitch_color="#22312b", line_color="#efefef")
-        fig, ax = pitch.draw(figsize=(12, 8))
-
-        # Extraire les positions des passes
-        def extract_pass_network_data(team_name, matches):
-            x_coords = []
-            y_coords = []
-
-            for _, match in matches.iterrows():
-                match_id = match["match_id"]
-                events = load_events(match_id)
-                team_events = events[events["team"] == team_name]
+        network_scope = st.radio(
+            "Périmètre du réseau",
+            options=["Match sélectionné", "Tous les matchs de l'équipe"],
+            horizontal=True
+        )
+        if network_scope == "Match sélectionné":
+            network_match_ids = (selected_match_id,)
+        else:
+            network_match_ids = tuple(team_matches["match_id"].tolist())
 
-                for _, event in team_events.iterrows():
-                    if "location" in event and isinstance(event["location"], list):
-                        x_coords.append(event["location"][0])
-                        y_coords.append(event["location"][1])
+        network = load_pass_network(network_match_ids, selected_team)
 
-            return x_coords, y_coords
-
-        x_coords, y_coords = extract_pass_network_data(selected_team, team_matches)
+        col1, col2 = st.columns(2)
+        with col1:
+            n_players = st.slider("Nombre de joueurs affichés", min_value=5, max_value=20, value=11)
+        with col2:
+            min_passes = st.slider("Nombre minimum de passes par connexion", min_value=1, max_value=20, value=3)
 
-        # Dessiner les joueurs
-        for i, (x, y) in enumerate(zip(x_coords, y_coords)):
-            ax.plot(x, y, "bo", markersize=8)
-            ax.text(x, y - 5, str(i + 1), fontsize=8, ha="center")
+        # Les joueurs les plus impliqués forment les nœuds, les paires de passes forment les arêtes
+        positions = network["positions"].head(n_players)
+        edges = get_network_edges(network, players=positions.index, min_passes=min_passes)
 
-        # Dessiner les flèches de passes
-        pass_network = pd.DataFrame({"x": x_coords, "y": y_coords})
-        pass_network["dx"] = pass_network["x"].shift(-1) - pass_network["x"]
-        pass_network["dy"] = pass_network["y"].shift(-1) - pass_network["y"]
+        pitch = Pitch(pitch_type="statsbomb", line_zorder=2, pitch_color="#22312b", line_color="#efefef")
+        fig, ax = pitch.draw(figsize=(12, 8))
 
-        for _, row in pass_network.iterrows():
-            if row["dx"] != 0 and row["dy"] != 0:
-                ax.arrow(row["x"], row["y"], row["dx"], row["dy"], head_width=2, head_length=2, fc="blue", ec="blue", alpha=0.4, width=1)
+        if positions.empty:
+            st.warning("Aucune passe réussie disponible pour construire le réseau.")
+        else:
+            if not edges.empty:
+                pitch.lines(
+                    edges["x_start"], edges["y_start"], edges["x_end"], edges["y_end"],
+                    lw=1 + 9 * edges["passes"] / edges["passes"].max(),
+                    color="#00A1D6", alpha=0.6, zorder=1, ax=ax
+                )
+            pitch.scatter(
+                positions["x"], positions["y"],
+                s=300 + 1200 * positions["touches"] / positions["touches"].max(),
+                color="#FFD700", edgecolors="black", linewidth=1.5, zorder=3, ax=ax
+            )
+            for player_name, row in positions.iterrows():
+                pitch.annotate(
+                    player_name.split()[-1], xy=(row["x"], row["y"] - 4),
+                    color="white", fontsize=9, ha="center", va="center", zorder=4, ax=ax
+                )
 
-        ax.set_xlim(-5, pitch_length + 5)
-        ax.set_ylim(-5, pitch_width + 5)
         ax.set_title(f"Réseau de passes - {selected_team}")
-        ax.set_xlabel("Longueur du terrain (m)")
-        ax.set_ylabel("Largeur du terrain (m)")
-        ax.set_aspect("equal")
-
         st.pyplot(fig)
         
+        # Joueurs centraux du réseau (cache par match, agrégation sur la saison)
+        st.subheader("Joueurs centraux")
+        if network_scope == "Match sélectionné":
+            centrality = load_match_centrality(selected_match_id, selected_team)
+        else:
+            centrality = load_season_centrality(competition_id, season_id)
+            centrality = centrality[centrality["match_id"].isin(network_match_ids)] if not centrality.empty else centrality
+            centrality = aggregate_centrality(centrality)
+            centrality = centrality[centrality["team"] == selected_team]
+
+        if centrality.empty:
+            st.info("Aucune métrique de centralité disponible.")
+        else:
+            st.dataframe(
+                centrality.sort_values("betweenness", ascending=False)
+                .set_index("player")[CENTRALITY_COLUMNS]
+                .rename(columns={
+                    "degree": "Degré",
+                    "in_degree": "Passes reçues",
+                    "out_degree": "Passes données",
+                    "betweenness": "Intermédiarité",
+                    "eigenvector": "Vecteur propre",
+                    "clustering": "Clustering",
+                })
+                .round(3),
+                use_container_width=True
+            )
+
+        with st.expander("Classement de la compétition par intermédiarité"):
+            league_centrality = aggregate_centrality(load_season_centrality(competition_id, season_id))
+            st.dataframe(
+                league_centrality.head(20)[["player", "team", "matches", "betweenness", "eigenvector", "degree"]].round(3),
+                use_container_width=True
+            )
+        
         # Analyse du réseau de passes
         st.markdown("""
         <div class='card'>
             <h3>Analyse du réseau de passes</h3>
-            <p>Cette visualisation montre les connexions de passes entre les joueurs. L'épaisseur des flèches est proportionnelle au nombre de passes échangées entre les joueurs.</p>
+            <p>Cette visualisation montre les connexions de passes entre les joueurs. L'épaisseur des lignes est proportionnelle au nombre de passes échangées entre les joueurs et la taille des nœuds à leur implication.</p>
             <p>L'analyse du réseau de passes peut aider à :</p>
             <ul>
                 <li>Identifier les joueurs centraux dans la construction du jeu</li>
@@ -353,14 +538,31 @@ try:
         # Types de passes
         st.subheader("Types de passes")
         
-        # Générer des données fictives pour les types de passes
-        pass_types = ["Courtes", "Moyennes", "Longues", "Progressives", "Latérales", "Vers l'arrière", "Dernière passe"]
-        pass_counts = [np.random.randint(100, 300), np.random.randint(50, 150), np.random.randint(20, 60), 
-                      np.random.randint(30, 80), np.random.randint(50, 150), np.random.randint(30, 100), np.random.randint(5, 20)]
-        
+        pass_scope = st.radio(
+            "Périmètre des passes",
+            options=["Match sélectionné", "Tous les matchs de l'équipe"],
+            horizontal=True
+        )
+        if pass_scope == "Match sélectionné":
+            scope_events = match_events
+        else:
+            season_events = load_season_events(competition_id, season_id)
+            scope_events = season_events[
+                season_events["match_id"].isin(team_matches["match_id"])
+                & season_events["game_state"].isin(selected_game_states)
+            ]
+        team_passes = scope_events[(scope_events["type"] == "Pass") & (scope_events["team"] == selected_team)]
+
+        # Chaque catégorie est un simple comptage sur les colonnes de classification
+        length_counts = team_passes["pass_length_class"].value_counts().reindex(PASS_LENGTH_CLASSES, fill_value=0)
+        direction_counts = team_passes["pass_direction"].value_counts().reindex(PASS_DIRECTIONS, fill_value=0)
         pass_data = pd.DataFrame({
-            'Type de passe': pass_types,
-            'Nombre': pass_counts
+            'Type de passe': PASS_LENGTH_CLASSES + PASS_DIRECTIONS + ["Entrée dernier tiers", "Entrée surface", "Dernière passe"],
+            'Nombre': length_counts.tolist() + direction_counts.tolist() + [
+                int(team_passes["pass_into_final_third"].sum()),
+                int(team_passes["pass_into_box"].sum()),
+                int(team_passes["pass_key"].sum()),
+            ]
         })
         
         fig = px.bar(
@@ -408,15 +610,9 @@ try:
         ax.plot(11, pitch_width/2, marker='o', markersize=2, color='black')
         ax.plot(pitch_length - 11, pitch_width/2, marker='o', markersize=2, color='black')
         
-        # Générer des données fictives pour la heatmap des passes
-        # Simuler des points de départ de passes
-        x_start = np.concatenate([
-            np.random.normal(pitch_length/4, pitch_length/8, 200),  # Défense
-            np.random.normal(pitch_length/2, pitch_length/6, 400),  # Milieu
-            np.random.normal(3*pitch_length/4, pitch_length/8, 100)  # Attaque
-        ])
-        
-        y_start = np.random.normal(pitch_width/2, pitch_width/3, len(x_start))
+        # Points de départ des passes de l'équipe
+        x_start = team_passes["x"].dropna()
+        y_start = team_passes.loc[x_start.index, "y"]
         
         # Créer la heatmap
         heatmap = ax.hexbin(x_start, y_start, gridsize=30, cmap='YlOrRd', alpha=0.7)
@@ -431,6 +627,26 @@ try:
         
         # Afficher la heatmap
         st.pyplot(fig)
+
+        # Entrées dans le dernier tiers par couloir : bincount sur le couloir d'arrivée
+        st.subheader("Entrées dans le dernier tiers par couloir")
+        final_third_entries = team_passes[team_passes["pass_completed"] & team_passes["pass_into_final_third"]]
+        channel_data = pd.DataFrame({
+            "Couloir": CHANNELS,
+            "Passes": count_by_zone(final_third_entries["channel_end"], len(CHANNELS)),
+            "Passes progressives": count_by_zone(
+                team_passes.loc[team_passes["progressive_pass"], "channel_end"], len(CHANNELS)
+            ),
+        })
+        fig = px.bar(
+            channel_data,
+            x="Couloir",
+            y=["Passes", "Passes progressives"],
+            barmode="group",
+            labels={"value": "Nombre", "variable": ""},
+            title=f"Couloirs d'arrivée des entrées dans le dernier tiers et des passes progressives - {selected_team}",
+        )
+        st.plotly_chart(fig, use_container_width=True)
         
         # Métriques avancées de passes
         st.subheader("Métriques avancées de passes")
@@ -440,7 +656,7 @@ try:
         with col1:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(10, 30)}</div>
+                <div class='metric-value'>{int(team_passes["pass_key"].sum())}</div>
                 <div class='metric-label'>Passes clés</div>
             </div>
             """, unsafe_allow_html=True)
@@ -448,7 +664,7 @@ try:
         with col2:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(5, 15)}</div>
+                <div class='metric-value'>{int((team_passes["pass_into_box"] & team_passes["pass_completed"]).sum())}</div>
                 <div class='metric-label'>Passes dans la surface</div>
             </div>
             """, unsafe_allow_html=True)
@@ -456,7 +672,7 @@ try:
         with col3:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(20, 50)}</div>
+                <div class='metric-value'>{int(team_passes["progressive_pass"].sum())}</div>
                 <div class='metric-label'>Passes progressives</div>
             </div>
             """, unsafe_allow_html=True)
@@ -464,10 +680,74 @@ try:
         with col4:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(3, 10)}</div>
+                <div class='metric-value'>{round(team_passes["pass_xa"].sum(), 2)}</div>
                 <div class='metric-label'>Passes décisives attendues (xA)</div>
             </div>
             """, unsafe_allow_html=True)
+
+        # Exploration d'une zone : requête sur l'index spatial de la saison (pas de parcours complet)
+        st.subheader("Exploration d'une zone")
+        zone_mode = st.radio(
+            "Sélection",
+            options=["Zone de la grille", "Rectangle"],
+            horizontal=True,
+            key="zone_mode"
+        )
+        spatial_index = load_season_spatial_index(competition_id, season_id)
+        if zone_mode == "Zone de la grille":
+            corridor_names = ["Gauche", "Axe", "Droite"]
+            zone_labels = {
+                zone: f"{corridor_names[zone // N_ZONE18_COLUMNS]} · x {get_zone18_bounds(zone)[0]:.0f}-{get_zone18_bounds(zone)[1]:.0f}"
+                for zone in range(N_ZONE18_COLUMNS * N_ZONE18_ROWS)
+            }
+            selected_zone = st.selectbox(
+                "Zone",
+                options=list(zone_labels),
+                format_func=zone_labels.get,
+                index=N_ZONE18_COLUMNS * N_ZONE18_ROWS - 2,
+                key="drill_zone"
+            )
+            zone_rows = query_zone18(spatial_index, selected_zone)
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                x_range = st.slider("Longueur (x)", 0.0, 120.0, (80.0, 120.0), key="drill_x")
+            with col2:
+                y_range = st.slider("Largeur (y)", 0.0, 80.0, (18.0, 62.0), key="drill_y")
+            zone_rows = query_rectangle(spatial_index, x_range[0], x_range[1], y_range[0], y_range[1])
+
+        season_events = load_season_events(competition_id, season_id)
+        zone_events = season_events.iloc[zone_rows]
+        zone_events = zone_events[
+            (zone_events["team"] == selected_team)
+            & zone_events["match_id"].isin(team_matches["match_id"])
+            & zone_events["game_state"].isin(selected_game_states)
+        ]
+        zone_types = st.multiselect(
+            "Types d'action",
+            options=sorted(zone_events["type"].dropna().unique()),
+            default=[t for t in ["Pass", "Carry", "Shot", "Dribble"] if t in set(zone_events["type"])],
+            key="drill_types"
+        )
+        zone_events = zone_events[zone_events["type"].isin(zone_types)]
+        st.write(f"{len(zone_events)} actions de {selected_team} démarrées dans la zone")
+        if not zone_events.empty:
+            outcome = (
+                zone_events["pass_outcome"]
+                .combine_first(zone_events["shot_outcome"])
+                .combine_first(zone_events["dribble_outcome"])
+                .fillna("")
+            )
+            zone_table = pd.DataFrame({
+                "Match": zone_events["match_id"],
+                "Minute": zone_events["minute"],
+                "Joueur": zone_events["player"],
+                "Type": zone_events["type"],
+                "Issue": outcome,
+                "x": zone_events["x"].round(1),
+                "y": zone_events["y"].round(1),
+            })
+            st.dataframe(zone_table, use_container_width=True, hide_index=True)
     
     # Onglet 3: Analyse Défensive
     with tab3:
@@ -476,15 +756,32 @@ try:
         # Statistiques défensives
         st.subheader("Statistiques défensives")
         
-        # Générer des données fictives pour les statistiques défensives
+        defensive_scope = st.radio(
+            "Périmètre défensif",
+            options=["Match sélectionné", "Toute la saison"],
+            horizontal=True
+        )
+        if defensive_scope == "Match sélectionné":
+            defensive_metrics, defensive_actions = load_match_defensive_metrics(selected_match_id)
+        else:
+            defensive_metrics, defensive_actions = load_season_defensive_metrics(competition_id, season_id)
+
+        # Comptes sommés par équipe puis ratios recalculés (PPDA, tacles, hauteur du bloc)
+        defensive_summary = aggregate_defensive_metrics(defensive_metrics)
+        if selected_team in defensive_summary.index:
+            team_defense = defensive_summary.loc[selected_team].fillna(0)
+        else:
+            team_defense = pd.Series(0.0, index=defensive_summary.columns)
+        team_actions = defensive_actions[defensive_actions["team"] == selected_team] if not defensive_actions.empty else defensive_actions
+
         defensive_stats = {
-            'Tacles': np.random.randint(15, 30),
-            'Interceptions': np.random.randint(10, 25),
-            'Duels gagnés': np.random.randint(40, 70),
-            'Duels aériens gagnés': np.random.randint(15, 30),
-            'Dégagements': np.random.randint(15, 35),
-            'Blocs': np.random.randint(5, 15),
-            'Fautes commises': np.random.randint(8, 18)
+            'Tacles': int(team_defense['tackles']),
+            'Interceptions': int(team_defense['interceptions']),
+            'Duels gagnés': int(team_defense['duels_won']),
+            'Duels aériens gagnés': int(team_defense['aerials_won']),
+            'Dégagements': int(team_defense['clearances']),
+            'Blocs': int(team_defense['blocks']),
+            'Fautes commises': int(team_defense['fouls'])
         }
         
         col1, col2 = st.columns(2)
@@ -507,7 +804,7 @@ try:
                 <p><strong>Dégagements:</strong> {defensive_stats['Dégagements']}</p>
                 <p><strong>Blocs:</strong> {defensive_stats['Blocs']}</p>
                 <p><strong>Fautes commises:</strong> {defensive_stats['Fautes commises']}</p>
-                <p><strong>Taux de réussite des tacles:</strong> {np.random.randint(60, 85)}%</p>
+                <p><strong>Taux de réussite des tacles:</strong> {round(team_defense['tackle_success'], 1)}%</p>
             </div>
             """, unsafe_allow_html=True)
         
@@ -547,15 +844,9 @@ try:
         ax.plot(11, pitch_width/2, marker='o', markersize=2, color='black')
         ax.plot(pitch_length - 11, pitch_width/2, marker='o', markersize=2, color='black')
         
-        # Générer des données fictives pour la heatmap des actions défensives
-        # Simuler des points d'actions défensives
-        x_def = np.concatenate([
-            np.random.normal(pitch_length/4, pitch_length/6, 300),  # Défense
-            np.random.normal(pitch_length/2, pitch_length/8, 150),  # Milieu
-            np.random.normal(3*pitch_length/4, pitch_length/10, 50)  # Attaque
-        ])
-        
-        y_def = np.random.normal(pitch_width/2, pitch_width/3, len(x_def))
+        # Actions défensives réelles de l'équipe
+        x_def = team_actions["x"] if not team_actions.empty else pd.Series(dtype=float)
+        y_def = team_actions["y"] if not team_actions.empty else pd.Series(dtype=float)
         
         # Créer la heatmap
         heatmap = ax.hexbin(x_def, y_def, gridsize=30, cmap='Blues', alpha=0.7)
@@ -608,35 +899,31 @@ try:
         ax.plot(pitch_length - 11, pitch_width/2, marker='o', markersize=2, color='black')
         
         # Dessiner les zones de pression
-        # Zone de pression haute
-        high_press = patches.Rectangle((pitch_length/2, 0), pitch_length/2, pitch_width, 
+        # Zone de pression haute (tiers offensif)
+        high_press = patches.Rectangle((2*pitch_length/3, 0), pitch_length/3, pitch_width, 
                                       linewidth=0, edgecolor='none', facecolor='red', alpha=0.2)
         ax.add_patch(high_press)
         
-        # Zone de pression moyenne
-        mid_press = patches.Rectangle((pitch_length/4, 0), pitch_length/4, pitch_width, 
+        # Zone de pression moyenne (tiers médian)
+        mid_press = patches.Rectangle((pitch_length/3, 0), pitch_length/3, pitch_width, 
                                      linewidth=0, edgecolor='none', facecolor='yellow', alpha=0.2)
         ax.add_patch(mid_press)
         
-        # Zone de pression basse
-        low_press = patches.Rectangle((0, 0), pitch_length/4, pitch_width, 
+        # Zone de pression basse (tiers défensif)
+        low_press = patches.Rectangle((0, 0), pitch_length/3, pitch_width, 
                                      linewidth=0, edgecolor='none', facecolor='green', alpha=0.2)
         ax.add_patch(low_press)
         
         # Ajouter des annotations
-        ax.text(3*pitch_length/4, pitch_width/2, "Pression haute", fontsize=12, ha='center')
-        ax.text(3*pitch_length/8, pitch_width/2, "Pression moyenne", fontsize=12, ha='center')
-        ax.text(pitch_length/8, pitch_width/2, "Pression basse", fontsize=12, ha='center')
-        
-        # Générer des données fictives pour les récupérations
-        n_recoveries = 50
-        x_rec = np.concatenate([
-            np.random.normal(3*pitch_length/4, pitch_length/10, int(n_recoveries*0.3)),  # Pression haute
-            np.random.normal(3*pitch_length/8, pitch_length/10, int(n_recoveries*0.5)),  # Pression moyenne
-            np.random.normal(pitch_length/8, pitch_length/10, int(n_recoveries*0.2))     # Pression basse
-        ])
+        ax.text(5*pitch_length/6, pitch_width/2, "Pression haute", fontsize=12, ha='center')
+        ax.text(pitch_length/2, pitch_width/2, "Pression moyenne", fontsize=12, ha='center')
+        ax.text(pitch_length/6, pitch_width/2, "Pression basse", fontsize=12, ha='center')
         
-        y_rec = np.random.uniform(5, pitch_width-5, len(x_rec))
+        # Récupérations réelles de l'équipe
+        team_recoveries = team_actions[team_actions["is_recovery"]] if not team_actions.empty else team_actions
+        x_rec = team_recoveries["x"] if not team_recoveries.empty else pd.Series(dtype=float)
+        y_rec = team_recoveries["y"] if not team_recoveries.empty else pd.Series(dtype=float)
+        recoveries_by_zone = pd.cut(x_rec, bins=[0, 40, 80, 120], labels=DEFENSIVE_ZONES, include_lowest=True).value_counts()
         
         # Dessiner les points de récupération
         ax.scatter(x_rec, y_rec, color='blue', s=30, alpha=0.7, label='Récupérations')
@@ -660,7 +947,7 @@ try:
         with col1:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(10, 25)}</div>
+                <div class='metric-value'>{recoveries_by_zone.get('Offensif', 0)}</div>
                 <div class='metric-label'>Récupérations en zone haute</div>
             </div>
             """, unsafe_allow_html=True)
@@ -668,7 +955,7 @@ try:
         with col2:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(15, 30)}</div>
+                <div class='metric-value'>{recoveries_by_zone.get('Médian', 0)}</div>
                 <div class='metric-label'>Récupérations en zone moyenne</div>
             </div>
             """, unsafe_allow_html=True)
@@ -676,11 +963,59 @@ try:
         with col3:
             st.markdown(f"""
             <div class='metric-container'>
-                <div class='metric-value'>{np.random.randint(5, 15)}</div>
+                <div class='metric-value'>{recoveries_by_zone.get('Défensif', 0)}</div>
                 <div class='metric-label'>Récupérations en zone basse</div>
             </div>
             """, unsafe_allow_html=True)
         
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown(f"""
+            <div class='metric-container'>
+                <div class='metric-value'>{round(team_defense['ppda'], 2)}</div>
+                <div class='metric-label'>PPDA</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            st.markdown(f"""
+            <div class='metric-container'>
+                <div class='metric-value'>{int(team_defense['pressures'])} ({round(team_defense['pressure_regain_rate'], 1)}%)</div>
+                <div class='metric-label'>Pressions (récupération en 5 sec)</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            st.markdown(f"""
+            <div class='metric-container'>
+                <div class='metric-value'>{int(team_defense['high_turnovers'])}</div>
+                <div class='metric-label'>Récupérations hautes</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col4:
+            st.markdown(f"""
+            <div class='metric-container'>
+                <div class='metric-value'>{round(team_defense['action_height'], 1)} yards</div>
+                <div class='metric-label'>Hauteur moyenne des actions défensives</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # PPDA par zone pour toutes les équipes du périmètre
+        if not defensive_summary.empty:
+            ppda_by_zone = defensive_summary[[f"ppda_{zone}" for zone in DEFENSIVE_ZONES]]
+            ppda_by_zone.columns = DEFENSIVE_ZONES
+            fig = px.bar(
+                ppda_by_zone.reset_index().melt(id_vars="team", var_name="Zone", value_name="PPDA"),
+                x="team",
+                y="PPDA",
+                color="Zone",
+                barmode="group",
+                title="PPDA par zone (plus la valeur est basse, plus le pressing est intense)"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
         # Analyse des récupérations
         st.markdown("""
         <div class='card'>
@@ -708,14 +1043,40 @@ try:
         # Statistiques de transition
         st.subheader("Statistiques de transition")
         
-        # Générer des données fictives pour les transitions
+        col1, col2 = st.columns(2)
+        with col1:
+            transition_scope = st.radio(
+                "Périmètre des transitions",
+                options=["Match sélectionné", "Toute la saison"],
+                horizontal=True
+            )
+        with col2:
+            transition_window = st.slider(
+                "Fenêtre de transition (sec)", min_value=5, max_value=30, value=15
+            )
+
+        # Récupérations suivies d'un tir ou d'une entrée dans le dernier tiers
+        if transition_scope == "Match sélectionné":
+            transitions = load_match_transitions(selected_match_id, float(transition_window))
+        else:
+            transitions = load_season_transitions(competition_id, season_id, float(transition_window))
+
+        team_transitions = transitions[transitions["team"] == selected_team] if not transitions.empty else transitions
+        transition_summary = summarize_transitions(transitions)
+        if selected_team in transition_summary.index:
+            team_summary = transition_summary.loc[selected_team].fillna(0)
+        else:
+            team_summary = pd.Series(0.0, index=[
+                "counter_attacks", "final_third_entries", "goals", "mean_time", "success_rate", "mean_progression"
+            ])
+
         transition_stats = {
-            'Contre-attaques': np.random.randint(5, 15),
-            'Buts sur contre-attaque': np.random.randint(0, 3),
-            'Temps moyen de transition (sec)': round(np.random.uniform(6, 12), 1),
-            'Transitions réussies (%)': np.random.randint(40, 70),
-            'Récupérations suivies de tir': np.random.randint(3, 10),
-            'Distance moyenne de progression (m)': np.random.randint(25, 45)
+            'Contre-attaques': int(team_summary['counter_attacks']),
+            'Buts sur contre-attaque': int(team_summary['goals']),
+            'Temps moyen de transition (sec)': round(team_summary['mean_time'], 1),
+            'Transitions réussies (%)': round(team_summary['success_rate'], 1),
+            'Récupérations suivies d\'une entrée dans le dernier tiers': int(team_summary['final_third_entries']),
+            'Distance moyenne de progression (yards)': round(team_summary['mean_progression'], 1)
         }
         
         col1, col2 = st.columns(2)
@@ -735,8 +1096,8 @@ try:
             <div class='card'>
                 <h3>Efficacité des transitions</h3>
                 <p><strong>Transitions réussies:</strong> {transition_stats['Transitions réussies (%)']}%</p>
-                <p><strong>Récupérations suivies de tir:</strong> {transition_stats['Récupérations suivies de tir']}</p>
-                <p><strong>Distance moyenne de progression:</strong> {transition_stats['Distance moyenne de progression (m)']} m</p>
+                <p><strong>Récupérations suivies d'une entrée dans le dernier tiers:</strong> {transition_stats["Récupérations suivies d'une entrée dans le dernier tiers"]}</p>
+                <p><strong>Distance moyenne de progression:</strong> {transition_stats['Distance moyenne de progression (yards)']} yards</p>
             </div>
             """, unsafe_allow_html=True)
         
@@ -776,33 +1137,16 @@ try:
         ax.plot(11, pitch_width/2, marker='o', markersize=2, color='black')
         ax.plot(pitch_length - 11, pitch_width/2, marker='o', markersize=2, color='black')
         
-        # Simuler des transitions
-        n_transitions = 10
-        
-        # Points de départ des transitions (récupérations)
-        start_x = np.concatenate([
-            np.random.normal(pitch_length/4, pitch_length/10, int(n_transitions*0.6)),  # Défense
-            np.random.normal(pitch_length/2, pitch_length/10, int(n_transitions*0.4))   # Milieu
-        ])
-        
-        start_y = np.random.uniform(10, pitch_width-10, len(start_x))
-        
-        # Points d'arrivée des transitions (finalisations)
-        end_x = np.random.normal(pitch_length - 20, 10, len(start_x))
-        end_y = np.random.normal(pitch_width/2, pitch_width/4, len(start_x))
-        
-        # Dessiner les transitions
-        for i in range(len(start_x)):
-            # Point de départ (récupération)
-            ax.plot(start_x[i], start_y[i], 'bo', markersize=8)
-            
-            # Point d'arrivée (finalisation)
-            ax.plot(end_x[i], end_y[i], 'ro', markersize=8)
-            
-            # Flèche de transition
-            ax.arrow(start_x[i], start_y[i], 
-                    (end_x[i] - start_x[i])*0.9, (end_y[i] - start_y[i])*0.9,  # Réduire légèrement pour éviter de superposer le point d'arrivée
-                    head_width=2, head_length=2, fc='green', ec='green', alpha=0.6)
+        # Transitions réelles : du point de récupération au point de finalisation
+        arrows = team_transitions[team_transitions["is_transition"]] if not team_transitions.empty else team_transitions
+        if not arrows.empty:
+            ax.scatter(arrows["x"], arrows["y"], color='blue', s=50, zorder=3)
+            ax.scatter(arrows["end_x"], arrows["end_y"], color='red', s=50, zorder=3)
+            ax.quiver(
+                arrows["x"], arrows["y"],
+                (arrows["end_x"] - arrows["x"]) * 0.95, (arrows["end_y"] - arrows["y"]) * 0.95,
+                angles='xy', scale_units='xy', scale=1, color='green', alpha=0.6, width=0.003, zorder=2
+            )
         
         ax.set_xlim(-5, pitch_length + 5)
         ax.set_ylim(-5, pitch_width + 5)
@@ -838,9 +1182,7 @@ try:
         # Vitesse des transitions
         st.subheader("Vitesse des transitions")
         
-        # Générer des données fictives pour la vitesse des transitions
-        transition_times = np.random.normal(8, 2, 20)
-        transition_times = np.clip(transition_times, 4, 15)
+        transition_times = arrows["transition_time"] if not arrows.empty else pd.Series(dtype=float)
         
         fig = px.histogram(
             transition_times,
@@ -877,6 +1219,99 @@ try:
         </div>
         """, unsafe_allow_html=True)
 
+    # Onglet 5: Coups de pied arrêtés (tables de la saison calculées une fois et persistées)
+    with tab5:
+        st.markdown("<h2 class='sub-header'>Coups de Pied Arrêtés</h2>", unsafe_allow_html=True)
+
+        deliveries, set_piece_summary = load_set_piece_tables(competition_id, season_id)
+        if deliveries.empty:
+            st.warning("Aucune phase arrêtée disponible pour cette saison.")
+        else:
+            col1, col2 = st.columns(2)
+            with col1:
+                selected_set_piece = st.radio("Type de phase arrêtée", options=SET_PIECES, horizontal=True, key="set_piece_type")
+            with col2:
+                selected_side = st.radio("Côté", options=["Tous", "Gauche", "Droite"], horizontal=True, key="set_piece_side")
+
+            team_set_pieces = get_team_set_pieces(deliveries, selected_team, selected_set_piece)
+            against_set_pieces = get_team_set_pieces(deliveries, selected_team, selected_set_piece, against=True)
+            if selected_side != "Tous":
+                team_set_pieces = team_set_pieces[team_set_pieces["side"] == selected_side]
+                against_set_pieces = against_set_pieces[against_set_pieces["side"] == selected_side]
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Phases obtenues", len(team_set_pieces))
+            with col2:
+                st.metric("xG générés", round(team_set_pieces["xg"].sum(), 2))
+            with col3:
+                st.metric("Phases concédées", len(against_set_pieces))
+            with col4:
+                st.metric("xG concédés", round(against_set_pieces["xg"].sum(), 2))
+
+            # Zones d'arrivée et premier contact, pour et contre
+            zone_data = pd.DataFrame({
+                "Zone": DELIVERY_ZONES * 2,
+                "Part (%)": np.concatenate([
+                    team_set_pieces["delivery_zone"].value_counts(normalize=True).reindex(DELIVERY_ZONES, fill_value=0).to_numpy(),
+                    against_set_pieces["delivery_zone"].value_counts(normalize=True).reindex(DELIVERY_ZONES, fill_value=0).to_numpy(),
+                ]) * 100,
+                "Équipe": [selected_team] * len(DELIVERY_ZONES) + ["Adversaires"] * len(DELIVERY_ZONES),
+            })
+            fig = px.bar(
+                zone_data, x="Zone", y="Part (%)", color="Équipe", barmode="group",
+                title=f"Zones d'arrivée ({selected_set_piece}) - {selected_team}"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            contact_data = pd.DataFrame({
+                "Premier contact": FIRST_CONTACTS * 2,
+                "Part (%)": np.concatenate([
+                    team_set_pieces["first_contact"].value_counts(normalize=True).reindex(FIRST_CONTACTS, fill_value=0).to_numpy(),
+                    against_set_pieces["first_contact"].value_counts(normalize=True).reindex(FIRST_CONTACTS, fill_value=0).to_numpy(),
+                ]) * 100,
+                "Équipe": [selected_team] * len(FIRST_CONTACTS) + ["Adversaires"] * len(FIRST_CONTACTS),
+            })
+            fig = px.bar(
+                contact_data, x="Premier contact", y="Part (%)", color="Équipe", barmode="group",
+                title=f"Premier contact ({selected_set_piece}) - {selected_team}"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+            # Trajectoires des remises en jeu de l'équipe
+            st.subheader("Remises en jeu de l'équipe")
+            pitch = VerticalPitch(pitch_type="statsbomb", half=True, line_color="#424242")
+            fig, ax = pitch.draw(figsize=(10, 8))
+            contact_colors = dict(zip(FIRST_CONTACTS, ["#E53935", "#43A047", "#1E88E5", "#9E9E9E"]))
+            plotted = team_set_pieces.dropna(subset=["end_x", "end_y"])
+            for contact, color in contact_colors.items():
+                subset = plotted[plotted["first_contact"] == contact]
+                if subset.empty:
+                    continue
+                pitch.arrows(
+                    subset["x"], subset["y"], subset["end_x"], subset["end_y"],
+                    width=1.5, headwidth=4, color=color, alpha=0.6, label=contact, ax=ax
+                )
+            ax.legend(loc="lower left")
+            ax.set_title(f"{selected_set_piece} - {selected_team}")
+            st.pyplot(fig)
+
+            # Comparaison avec la ligue
+            st.subheader("Classement de la ligue")
+            league = set_piece_summary[set_piece_summary["set_piece"] == selected_set_piece]
+            st.dataframe(
+                league[[
+                    "team", "count", "per_match", "shots", "goals", "xg", "xg_per_set_piece",
+                    "count_against", "goals_against", "xg_against", "xg_against_per_set_piece",
+                ]].sort_values("xg", ascending=False).round(3).rename(columns={
+                    "team": "Équipe", "count": "Nombre", "per_match": "Par match", "shots": "Tirs", "goals": "Buts",
+                    "xg": "xG", "xg_per_set_piece": "xG par phase", "count_against": "Concédés",
+                    "goals_against": "Buts concédés", "xg_against": "xG concédés", "xg_against_per_set_piece": "xG concédés par phase",
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
 except Exception as e:
     st.error(f"Une erreur s'est produite: {e}")
     st.info("Assurez-vous d'avoir accès aux données StatsBomb et que les API sont correctement configurées.")
@@ -0,0 +1,126 @@
+#chance_creation
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events, SHOOTOUT_PERIOD
+
+# -----------------------------
+# ACTIONS CRÉANT UN TIR OU UN BUT (SCA / GCA)
+# -----------------------------
+
+# Nombre d'actions offensives créditées par tir
+SCA_PER_SHOT = 2
+
+DEAD_BALL_PASS_TYPES = ["Corner", "Free Kick", "Throw-in", "Goal Kick", "Kick Off"]
+
+SCA_TYPES = ["Passe en jeu", "Passe arrêtée", "Dribble", "Faute subie", "Tir"]
+
+CHANCE_COLUMNS = ["key_passes", "assists", "xa", "sca", "gca"]
+
+
+def get_sca_candidates(events: pd.DataFrame) -> pd.Series:
+    """Indique les actions offensives pouvant créer un tir : passe réussie, dribble réussi, faute subie ou tir."""
+    own = events["team"] == events["possession_team"]
+    return own & (
+        ((events["type"] == "Pass") & events["pass_outcome"].isna())
+        | ((events["type"] == "Dribble") & (events["dribble_outcome"] == "Complete"))
+        | (events["type"] == "Foul Won")
+        | (events["type"] == "Shot")
+    )
+
+
+def get_sca_type(events: pd.DataFrame) -> np.ndarray:
+    """Libellé du type d'action créatrice."""
+    is_pass = events["type"] == "Pass"
+    return np.select(
+        [
+            is_pass & events["pass_type"].isin(DEAD_BALL_PASS_TYPES),
+            is_pass,
+            events["type"] == "Dribble",
+            events["type"] == "Foul Won",
+        ],
+        ["Passe arrêtée", "Passe en jeu", "Dribble", "Faute subie"],
+        default="Tir",
+    )
+
+
+def find_shot_creating_actions(events: pd.DataFrame) -> pd.DataFrame:
+    """Attribue à chaque tir jusqu'à deux actions créatrices par jointures d'index, sans boucle sur les tirs.
+
+    La première action est la passe clé (`shot_key_pass_id`) si elle existe, sinon l'action candidate
+    qui précède le tir ; la seconde est l'action candidate qui précède la première. Les deux doivent
+    appartenir à la même possession et à la même équipe que le tir.
+    """
+    events = events.reset_index(drop=True)
+    rows = np.arange(len(events))
+    candidate_rows = rows[get_sca_candidates(events).to_numpy()]
+    is_shot = ((events["type"] == "Shot") & (events["period"] < SHOOTOUT_PERIOD)).to_numpy()
+    shot_rows = rows[is_shot]
+
+    def previous_candidate(before: np.ndarray) -> np.ndarray:
+        position = np.searchsorted(candidate_rows, before, side="left") - 1
+        return np.where(position >= 0, candidate_rows[np.maximum(position, 0)], -1)
+
+    row_of_id = pd.Series(rows, index=events["id"].to_numpy())
+    key_pass_rows = row_of_id.reindex(events["shot_key_pass_id"].to_numpy()[shot_rows]).to_numpy()
+    first = np.where(np.isnan(key_pass_rows), previous_candidate(shot_rows), np.nan_to_num(key_pass_rows, nan=-1)).astype(int)
+    creators = [first, previous_candidate(np.where(first >= 0, first, 0))]
+
+    match = events["match_id"].to_numpy()
+    possession = events["possession"].to_numpy()
+    team = events["team"].to_numpy()
+    frames = []
+    valid = np.ones(len(shot_rows), dtype=bool)
+    for order, creator in enumerate(creators[:SCA_PER_SHOT], start=1):
+        safe = np.maximum(creator, 0)
+        # Une action n'est retenue que si celles qui la suivent dans la chaîne le sont aussi
+        valid &= (
+            (creator >= 0)
+            & (match[safe] == match[shot_rows])
+            & (possession[safe] == possession[shot_rows])
+            & (team[safe] == team[shot_rows])
+        )
+        shots, actions = shot_rows[valid], safe[valid]
+        frames.append(pd.DataFrame({
+            "shot_id": events["id"].to_numpy()[shots],
+            "match_id": match[shots],
+            "team": team[shots],
+            "order": order,
+            "action_id": events["id"].to_numpy()[actions],
+            "player_id": events["player_id"].to_numpy()[actions],
+            "player": events["player"].to_numpy()[actions],
+            "sca_type": get_sca_type(events.iloc[actions]),
+            "xg": events["shot_statsbomb_xg"].fillna(0).to_numpy()[shots],
+            "is_goal": (events["shot_outcome"] == "Goal").to_numpy()[shots],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def aggregate_chance_creation(events: pd.DataFrame, actions: pd.DataFrame) -> pd.DataFrame:
+    """Retourne passes clés, passes décisives, xA, SCA et GCA par (match, équipe, joueur)."""
+    keys = ["match_id", "team", "player_id", "player"]
+    passes = events[events["type"] == "Pass"]
+    from_passes = passes.assign(is_assist=passes["pass_goal_assist"].eq(True)).groupby(keys).agg(
+        key_passes=("pass_key", "sum"),
+        assists=("is_assist", "sum"),
+        xa=("pass_xa", "sum"),
+    )
+    from_actions = actions.groupby(keys).agg(sca=("shot_id", "size"), gca=("is_goal", "sum"))
+    table = from_passes.join(from_actions, how="outer").fillna(0)
+    table = table[(table[CHANCE_COLUMNS] > 0).any(axis=1)]
+    return table.reset_index()
+
+
+@st.cache_data(persist="disk")
+def load_season_chance_creation(competition_id: int, season_id: int):
+    """Calcule (et persiste) les actions créatrices d'une saison et leur agrégation par joueur et par match."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        actions = find_shot_creating_actions(events)
+        return actions, aggregate_chance_creation(events, actions)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des actions créatrices : {e}")
+        return pd.DataFrame(), pd.DataFrame()
@@ -4,10 +4,17 @@ import numpy as np
 from statsbombpy import sb
 import streamlit as st
 
+from utils.passes import classify_passes
+from utils.progression import add_progression
+from utils.zones import add_zones
+
 # -----------------------------
 # FONCTIONS DE CHARGEMENT
 # -----------------------------
 
+# Durée de vie (secondes) de la liste des matchs : les nouveaux matchs arrivent sans vider le cache
+MATCHES_TTL = 60 * 60
+
 @st.cache_data
 def load_competitions():
     """Charge la liste des compétitions disponibles dans StatsBomb."""
@@ -18,7 +25,7 @@ def load_competitions():
         st.error(f"Erreur lors du chargement des compétitions : {e}")
         return pd.DataFrame()
 
-@st.cache_data
+@st.cache_data(ttl=MATCHES_TTL)
 def load_matches(competition_id: int, season_id: int):
     """Charge les matchs d'une compétition spécifique."""
     try:
@@ -77,3 +84,112 @@ def load_filtered_events(match_id: int, event_type: str = None, team_name: str =
     except Exception as e:
         st.error(f"Erreur lors du filtrage des événements : {e}")
         return pd.DataFrame()
+
+# -----------------------------
+# NORMALISATION DES ÉVÉNEMENTS
+# -----------------------------
+
+# Colonnes utilisées par les modules d'analyse : créées vides si un match ne les contient pas
+EVENT_COLUMNS = [
+    "id", "index", "period", "timestamp", "minute", "second", "type", "team", "player",
+    "position", "possession", "possession_team", "play_pattern", "location", "duration",
+    "pass_end_location", "pass_recipient", "pass_outcome", "carry_end_location",
+    "shot_end_location", "shot_outcome", "shot_statsbomb_xg", "ball_recovery_recovery_failure",
+    "interception_outcome", "duel_type", "duel_outcome", "pass_aerial_won", "clearance_aerial_won",
+    "shot_aerial_won", "miscontrol_aerial_won", "pass_shot_assist", "pass_goal_assist",
+    "shot_key_pass_id", "shot_type", "shot_body_part", "player_id", "tactics",
+    "substitution_replacement", "substitution_replacement_id", "related_events",
+    "pass_type", "dribble_outcome", "pass_height", "pass_cross", "ball_receipt_outcome",
+]
+
+# Décalage (en secondes) du début de chaque période sur l'horloge du match
+PERIOD_OFFSETS = {1: 0, 2: 45 * 60, 3: 90 * 60, 4: 105 * 60, 5: 120 * 60}
+
+# État du score du point de vue de l'équipe qui agit
+GAME_STATES = ["Mène", "Égalité", "Mené"]
+
+# La séance de tirs au but (période 5) ne compte pas dans le score
+SHOOTOUT_PERIOD = 5
+
+
+def split_coordinates(series: pd.Series):
+    """Sépare une colonne de listes [x, y(, z)] en deux séries de flottants (NaN si absente)."""
+    series = series.astype(object)
+    return series.str[0].astype(float), series.str[1].astype(float)
+
+
+def add_game_state(events: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute le score avant chaque événement pour l'équipe qui agit (`score_team`, `score_opponent`) et l'état du score.
+
+    Les événements doivent être triés ; le point de vue de l'acteur évite de deviner l'équipe qui reçoit.
+    """
+    scored = (
+        ((events["type"] == "Shot") & (events["shot_outcome"] == "Goal")) | (events["type"] == "Own Goal For")
+    ) & (events["period"] < SHOOTOUT_PERIOD)
+    teams = events["team"].dropna().unique()
+    is_first = (events["team"] == teams[0]).to_numpy() if len(teams) else np.zeros(len(events), dtype=bool)
+    first_goal = (scored & is_first).to_numpy(dtype=np.int16)
+    second_goal = (scored & ~is_first).to_numpy(dtype=np.int16)
+    # Score avant l'événement : somme cumulée moins le but de l'événement lui-même
+    first_score = np.cumsum(first_goal, dtype=np.int16) - first_goal
+    second_score = np.cumsum(second_goal, dtype=np.int16) - second_goal
+    events["score_team"] = np.where(is_first, first_score, second_score).astype(np.int16)
+    events["score_opponent"] = np.where(is_first, second_score, first_score).astype(np.int16)
+    difference = events["score_team"] - events["score_opponent"]
+    events["game_state"] = pd.Categorical(
+        np.select([difference > 0, difference < 0], ["Mène", "Mené"], default="Égalité"), categories=GAME_STATES
+    )
+    return events
+
+
+def normalize_events(events: pd.DataFrame) -> pd.DataFrame:
+    """Trie les événements et ajoute les colonnes dérivées communes (horloge, coordonnées, zones, score, passes, progression)."""
+    missing = [column for column in EVENT_COLUMNS if column not in events.columns]
+    events = events.assign(**{column: np.nan for column in missing})
+    events = events.sort_values("index").reset_index(drop=True)
+
+    events["match_seconds"] = (
+        events["period"].map(PERIOD_OFFSETS).fillna(0)
+        + pd.to_timedelta(events["timestamp"]).dt.total_seconds()
+    )
+    events["x"], events["y"] = split_coordinates(events["location"])
+    end_location = (
+        events["pass_end_location"]
+        .combine_first(events["carry_end_location"])
+        .combine_first(events["shot_end_location"])
+    )
+    events["end_x"], events["end_y"] = split_coordinates(end_location)
+    events = add_zones(events)
+    events = add_game_state(events)
+    events = classify_passes(events)
+    events = add_progression(events)
+    return events
+
+
+@st.cache_data
+def load_normalized_events(match_id: int):
+    """Charge les événements d'un match et applique l'étape de normalisation."""
+    try:
+        events = load_events(match_id)
+        if events.empty:
+            return events
+        events = normalize_events(events)
+        events["match_id"] = match_id
+        return events
+    except Exception as e:
+        st.error(f"Erreur lors de la normalisation des événements : {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(persist="disk")
+def load_season_events(competition_id: int, season_id: int):
+    """Charge la table normalisée de tous les événements d'une saison (persistée sur disque)."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        if matches.empty:
+            return pd.DataFrame()
+        frames = [load_normalized_events(match_id) for match_id in matches["match_id"]]
+        return pd.concat(frames, ignore_index=True)
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des événements de la saison : {e}")
+        return pd.DataFrame()
@@ -0,0 +1,170 @@
+#defensive
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_matches, load_normalized_events
+from utils.transitions import WON_OUTCOMES, FINAL_THIRD_X, get_recovery_mask, find_next_event
+
+# -----------------------------
+# MÉTRIQUES DÉFENSIVES ET PRESSING
+# -----------------------------
+
+# Actions comptées au dénominateur du PPDA (passes adverses par action défensive)
+PPDA_TYPES = ["Duel", "Interception", "Foul Committed"]
+
+# Actions défensives utilisées pour la heatmap et la hauteur moyenne
+DEFENSIVE_TYPES = ["Duel", "Interception", "Foul Committed", "Block", "Clearance", "Ball Recovery"]
+
+# Le PPDA classique ne compte que les 60 % du terrain les plus proches du but adverse
+PPDA_MIN_X = 48.0
+
+# Délai (sec) pour qu'une pression soit suivie d'une récupération
+PRESSURE_REGAIN_WINDOW = 5.0
+
+DEFENSIVE_ZONES = ["Défensif", "Médian", "Offensif"]
+
+AERIAL_COLUMNS = ["pass_aerial_won", "clearance_aerial_won", "shot_aerial_won", "miscontrol_aerial_won"]
+
+COUNT_COLUMNS = [
+    "tackles", "tackles_won", "interceptions", "duels_won", "aerials_won", "clearances", "blocks",
+    "fouls", "pressures", "pressure_regains", "recoveries", "high_turnovers", "defensive_actions",
+    "action_height_sum", "press_passes", "press_actions",
+]
+
+
+def get_opponents(events: pd.DataFrame) -> pd.Series:
+    """Retourne, pour chaque événement, l'équipe adverse de l'équipe qui agit."""
+    teams = events[["match_id", "team"]].dropna().drop_duplicates()
+    pairs = teams.merge(teams, on="match_id", suffixes=("", "_opponent"))
+    pairs = pairs[pairs["team"] != pairs["team_opponent"]]
+    opponent_of = pd.Series(
+        pairs["team_opponent"].to_numpy(), index=pd.MultiIndex.from_frame(pairs[["match_id", "team"]])
+    )
+    return pd.Series(
+        opponent_of.reindex(pd.MultiIndex.from_frame(events[["match_id", "team"]])).to_numpy(),
+        index=events.index,
+    )
+
+
+def get_pressure_regains(events: pd.DataFrame, window: float = PRESSURE_REGAIN_WINDOW) -> pd.Series:
+    """Indique, pour chaque pression, si l'équipe récupère le ballon dans les `window` secondes."""
+    columns = ["match_id", "team", "period", "match_seconds"]
+    pressures = events.loc[events["type"] == "Pressure", columns]
+    recoveries = events.loc[get_recovery_mask(events), columns]
+    delay, _ = find_next_event(pressures, recoveries)
+    regained = pd.Series(False, index=events.index)
+    regained.loc[pressures.index] = delay <= window
+    return regained
+
+
+def compute_defensive_metrics(events: pd.DataFrame) -> pd.DataFrame:
+    """Calcule les métriques défensives par match et par équipe en une seule agrégation."""
+    is_pass = events["type"] == "Pass"
+    is_duel = events["type"] == "Duel"
+    is_tackle = is_duel & (events["duel_type"] == "Tackle")
+    is_won = events["duel_outcome"].isin(WON_OUTCOMES)
+    is_recovery = get_recovery_mask(events)
+    is_ppda_action = events["type"].isin(PPDA_TYPES)
+    is_defensive = events["type"].isin(DEFENSIVE_TYPES)
+    is_aerial_won = events[AERIAL_COLUMNS].eq(True).any(axis=1)
+
+    # Les passes adverses sont créditées à l'équipe qui défend, dans son propre repère
+    team = events["team"].where(~is_pass, get_opponents(events))
+    pitch_x = events["x"].where(~is_pass, 120 - events["x"])
+
+    flags = pd.DataFrame({
+        "match_id": events["match_id"],
+        "team": team,
+        "zone": pd.cut(pitch_x, bins=[0, 40, 80, 120], labels=DEFENSIVE_ZONES, include_lowest=True),
+        "opponent_passes": is_pass,
+        "ppda_actions": is_ppda_action,
+        "tackles": is_tackle,
+        "tackles_won": is_tackle & is_won,
+        "interceptions": events["type"] == "Interception",
+        "duels_won": is_duel & is_won,
+        "aerials_won": is_aerial_won & ~is_pass,
+        "clearances": events["type"] == "Clearance",
+        "blocks": events["type"] == "Block",
+        "fouls": events["type"] == "Foul Committed",
+        "pressures": events["type"] == "Pressure",
+        "pressure_regains": get_pressure_regains(events),
+        "recoveries": is_recovery,
+        "high_turnovers": is_recovery & (pitch_x >= FINAL_THIRD_X),
+        "defensive_actions": is_defensive,
+        "action_height_sum": pitch_x.where(is_defensive, 0.0).fillna(0.0),
+        "press_passes": is_pass & (pitch_x >= PPDA_MIN_X),
+        "press_actions": is_ppda_action & (pitch_x >= PPDA_MIN_X),
+    })
+    flags = flags[flags["team"].notna()]
+
+    metrics = flags.groupby(["match_id", "team"])[COUNT_COLUMNS].sum()
+    # Duels aériens gagnés sur une passe : crédités à l'équipe du passeur, pas à l'équipe qui défend
+    pass_aerials = (is_aerial_won & is_pass).groupby([events["match_id"], events["team"]]).sum()
+    metrics["aerials_won"] = metrics["aerials_won"].add(pass_aerials, fill_value=0).reindex(metrics.index).astype(int)
+    by_zone = flags.groupby(["match_id", "team", "zone"], observed=False)[["opponent_passes", "ppda_actions"]].sum().unstack("zone")
+    by_zone.columns = [f"{column}_{zone}" for column, zone in by_zone.columns]
+    return metrics.join(by_zone).reset_index()
+
+
+def add_defensive_ratios(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute PPDA (global et par zone), taux de réussite des tacles et hauteur moyenne des actions."""
+    metrics = metrics.copy()
+    metrics["ppda"] = metrics["press_passes"] / metrics["press_actions"].replace(0, np.nan)
+    for zone in DEFENSIVE_ZONES:
+        metrics[f"ppda_{zone}"] = (
+            metrics[f"opponent_passes_{zone}"] / metrics[f"ppda_actions_{zone}"].replace(0, np.nan)
+        )
+    metrics["tackle_success"] = metrics["tackles_won"] / metrics["tackles"].replace(0, np.nan) * 100
+    metrics["pressure_regain_rate"] = metrics["pressure_regains"] / metrics["pressures"].replace(0, np.nan) * 100
+    metrics["action_height"] = metrics["action_height_sum"] / metrics["defensive_actions"].replace(0, np.nan)
+    return metrics
+
+
+def get_defensive_actions(events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les actions défensives (et récupérations) avec leurs coordonnées."""
+    actions = events.loc[
+        events["type"].isin(DEFENSIVE_TYPES) & events["x"].notna(),
+        ["match_id", "team", "player", "type", "x", "y"],
+    ].copy()
+    actions["is_recovery"] = get_recovery_mask(events).loc[actions.index]
+    return actions.reset_index(drop=True)
+
+
+@st.cache_data
+def load_match_defensive_metrics(match_id: int):
+    """Calcule (et met en cache) les métriques défensives et les actions d'un match."""
+    try:
+        events = load_normalized_events(match_id)
+        if events.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        return compute_defensive_metrics(events), get_defensive_actions(events)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des métriques défensives : {e}")
+        return pd.DataFrame(), pd.DataFrame()
+
+
+@st.cache_data
+def load_season_defensive_metrics(competition_id: int, season_id: int):
+    """Rassemble les métriques défensives et les actions de tous les matchs d'une saison."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        results = [load_match_defensive_metrics(match_id) for match_id in matches["match_id"]]
+        metrics = [result[0] for result in results if not result[0].empty]
+        actions = [result[1] for result in results if not result[1].empty]
+        if not metrics:
+            return pd.DataFrame(), pd.DataFrame()
+        return pd.concat(metrics, ignore_index=True), pd.concat(actions, ignore_index=True)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des métriques défensives de la saison : {e}")
+        return pd.DataFrame(), pd.DataFrame()
+
+
+def aggregate_defensive_metrics(metrics: pd.DataFrame) -> pd.DataFrame:
+    """Somme les comptes par équipe sur la saison puis recalcule les ratios."""
+    if metrics.empty:
+        zone_columns = [f"{column}_{zone}" for column in ["opponent_passes", "ppda_actions"] for zone in DEFENSIVE_ZONES]
+        return add_defensive_ratios(pd.DataFrame(columns=["matches"] + COUNT_COLUMNS + zone_columns, dtype=float))
+    summed = metrics.drop(columns="match_id").groupby("team").sum(numeric_only=True)
+    summed.insert(0, "matches", metrics.groupby("team")["match_id"].nunique())
+    return add_defensive_ratios(summed)
@@ -0,0 +1,163 @@
+#expected_points
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_matches, SHOOTOUT_PERIOD
+from utils.shots import load_season_shots
+
+# -----------------------------
+# POINTS ATTENDUS (xPts) ET PROJECTION DE LA SAISON
+# -----------------------------
+
+N_SIMULATIONS = 10000
+
+# Les simulations sont tirées par blocs pour borner la mémoire (tirs × bloc booléens)
+SIMULATION_CHUNK = 1000
+
+
+def get_played_mask(matches: pd.DataFrame) -> pd.Series:
+    """Indique les matchs joués (score connu et, si disponible, statut « available »)."""
+    played = matches["home_score"].notna() & matches["away_score"].notna()
+    if "match_status" in matches.columns:
+        played &= matches["match_status"] == "available"
+    return played
+
+
+def simulate_match_goals(shots: pd.DataFrame, matches: pd.DataFrame, n_simulations: int = N_SIMULATIONS, seed: int = 0):
+    """Simule les buts de chaque équipe comme une somme de Bernoulli de paramètre l'xG de ses tirs.
+
+    Retourne deux matrices (matchs × simulations) : buts à domicile et buts à l'extérieur.
+    """
+    rng = np.random.default_rng(seed)
+    n_matches = len(matches)
+    position = pd.Series(np.arange(n_matches), index=matches["match_id"].to_numpy())
+    shots = shots[shots["match_id"].isin(position.index)]
+    match_index = position.reindex(shots["match_id"].to_numpy()).to_numpy()
+    home_team = matches["home_team"].to_numpy()[match_index]
+
+    # Un groupe par (match, côté) : 2 * match pour le domicile, 2 * match + 1 pour l'extérieur
+    group = 2 * match_index + (shots["team"].astype(object).to_numpy() != home_team)
+    order = np.argsort(group, kind="stable")
+    xg = shots["xg"].to_numpy(dtype=np.float32)[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(group, minlength=2 * n_matches))])
+
+    goals = np.empty((2 * n_matches, n_simulations), dtype=np.int16)
+    for start in range(0, n_simulations, SIMULATION_CHUNK):
+        stop = min(start + SIMULATION_CHUNK, n_simulations)
+        scored = rng.random((len(xg), stop - start), dtype=np.float32) < xg[:, None]
+        # Somme par groupe via les bornes de la somme cumulée (une ligne de zéros en tête)
+        cumulative = np.zeros((len(xg) + 1, stop - start), dtype=np.int32)
+        np.cumsum(scored, axis=0, out=cumulative[1:])
+        goals[:, start:stop] = cumulative[bounds[1:]] - cumulative[bounds[:-1]]
+    return goals[0::2], goals[1::2]
+
+
+def compute_expected_points(shots: pd.DataFrame, matches: pd.DataFrame, n_simulations: int = N_SIMULATIONS, seed: int = 0) -> pd.DataFrame:
+    """Calcule probabilités de résultat et points attendus (xPts) de chaque match joué."""
+    # Les tirs au but ne comptent ni dans la simulation ni dans l'xG du match
+    shots = shots[shots["period"] < SHOOTOUT_PERIOD]
+    home_goals, away_goals = simulate_match_goals(shots, matches, n_simulations, seed)
+    home_win = (home_goals > away_goals).mean(axis=1)
+    draw = (home_goals == away_goals).mean(axis=1)
+    away_win = 1 - home_win - draw
+
+    match_xg = shots.groupby(["match_id", "team"], observed=True)["xg"].sum()
+    result = matches[["match_id", "home_team", "away_team", "home_score", "away_score"]].reset_index(drop=True)
+    result["home_xg"] = match_xg.reindex(pd.MultiIndex.from_frame(result[["match_id", "home_team"]])).fillna(0).to_numpy()
+    result["away_xg"] = match_xg.reindex(pd.MultiIndex.from_frame(result[["match_id", "away_team"]])).fillna(0).to_numpy()
+    result["home_win"] = home_win
+    result["draw"] = draw
+    result["away_win"] = away_win
+    result["home_xpts"] = 3 * home_win + draw
+    result["away_xpts"] = 3 * away_win + draw
+    return result
+
+
+def to_team_rows(match_xpts: pd.DataFrame) -> pd.DataFrame:
+    """Passe la table par match en une ligne par équipe et par match."""
+    sides = []
+    for side, opponent in [("home", "away"), ("away", "home")]:
+        sides.append(pd.DataFrame({
+            "match_id": match_xpts["match_id"],
+            "team": match_xpts[f"{side}_team"],
+            "goals_for": match_xpts[f"{side}_score"],
+            "goals_against": match_xpts[f"{opponent}_score"],
+            "xg_for": match_xpts[f"{side}_xg"],
+            "xg_against": match_xpts[f"{opponent}_xg"],
+            "xpts": match_xpts[f"{side}_xpts"],
+        }))
+    rows = pd.concat(sides, ignore_index=True)
+    rows["points"] = np.select(
+        [rows["goals_for"] > rows["goals_against"], rows["goals_for"] == rows["goals_against"]], [3, 1], default=0
+    )
+    return rows
+
+
+def build_xpts_table(match_xpts: pd.DataFrame) -> pd.DataFrame:
+    """Construit le classement aux points attendus, à comparer au classement réel."""
+    table = to_team_rows(match_xpts).groupby("team").agg(
+        matches=("match_id", "size"),
+        xg_for=("xg_for", "sum"),
+        xg_against=("xg_against", "sum"),
+        xpts=("xpts", "sum"),
+        points=("points", "sum"),
+    )
+    table["xg_difference"] = table["xg_for"] - table["xg_against"]
+    table["points_minus_xpts"] = table["points"] - table["xpts"]
+    return table.sort_values("xpts", ascending=False).reset_index()
+
+
+def project_remaining_fixtures(match_xpts: pd.DataFrame, fixtures: pd.DataFrame, n_simulations: int = N_SIMULATIONS, seed: int = 0) -> pd.DataFrame:
+    """Projette les points de fin de saison en simulant les matchs restants (Poisson sur l'xG moyen des équipes)."""
+    rows = to_team_rows(match_xpts)
+    strength = rows.groupby("team")[["xg_for", "xg_against"]].mean()
+    teams = pd.Index(sorted(set(strength.index) | set(fixtures["home_team"]) | set(fixtures["away_team"])))
+    strength = strength.reindex(teams).fillna(strength.mean())
+
+    rng = np.random.default_rng(seed)
+    current_points = rows.groupby("team")["points"].sum().reindex(teams, fill_value=0).to_numpy(dtype=np.int32)
+    points = np.repeat(current_points[:, None], n_simulations, axis=1)
+    home = teams.get_indexer(fixtures["home_team"])
+    away = teams.get_indexer(fixtures["away_team"])
+
+    if not fixtures.empty:
+        # Intensité attendue : moyenne de l'attaque de l'une et de la défense de l'autre
+        home_rate = (strength["xg_for"].to_numpy()[home] + strength["xg_against"].to_numpy()[away]) / 2
+        away_rate = (strength["xg_for"].to_numpy()[away] + strength["xg_against"].to_numpy()[home]) / 2
+        home_goals = rng.poisson(home_rate[:, None], size=(len(fixtures), n_simulations))
+        away_goals = rng.poisson(away_rate[:, None], size=(len(fixtures), n_simulations))
+        home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+        away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+        np.add.at(points, home, home_points)
+        np.add.at(points, away, away_points)
+
+    # Départage aléatoire des égalités de points pour la probabilité de titre
+    leader = np.argmax(points + rng.random(points.shape), axis=0)
+    projection = pd.DataFrame({
+        "team": teams,
+        "points": current_points,
+        "remaining_matches": np.bincount(np.concatenate([home, away]).astype(int), minlength=len(teams)),
+        "projected_points": points.mean(axis=1),
+        "projected_min": np.percentile(points, 5, axis=1),
+        "projected_max": np.percentile(points, 95, axis=1),
+        "title_probability": np.bincount(leader, minlength=len(teams)) / n_simulations * 100,
+    })
+    return projection.sort_values("projected_points", ascending=False).reset_index(drop=True)
+
+
+@st.cache_data
+def load_expected_points(competition_id: int, season_id: int, n_simulations: int = N_SIMULATIONS):
+    """Simule les matchs joués et restants d'une saison : xPts par match, classement xPts et projection."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        shots = load_season_shots(competition_id, season_id)
+        if matches.empty or shots.empty:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        played = get_played_mask(matches)
+        match_xpts = compute_expected_points(shots, matches[played], n_simulations)
+        projection = project_remaining_fixtures(match_xpts, matches[~played], n_simulations)
+        return match_xpts, build_xpts_table(match_xpts), projection
+    except Exception as e:
+        st.error(f"Erreur lors de la simulation des points attendus : {e}")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
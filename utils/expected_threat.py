@@ -0,0 +1,114 @@
+#expected_threat
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events
+
+# -----------------------------
+# EXPECTED THREAT (xT)
+# -----------------------------
+
+# Grille standard : 12 colonnes dans la longueur, 8 lignes dans la largeur
+XT_COLUMNS, XT_ROWS = 12, 8
+N_CELLS = XT_COLUMNS * XT_ROWS
+
+MOVE_TYPES = ["Pass", "Carry"]
+
+
+def get_cell_index(x: pd.Series, y: pd.Series) -> np.ndarray:
+    """Convertit des coordonnées StatsBomb en indice de cellule xT (-1 si absentes)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    column = np.clip(np.floor(np.nan_to_num(x) / 120 * XT_COLUMNS), 0, XT_COLUMNS - 1).astype(int)
+    row = np.clip(np.floor(np.nan_to_num(y) / 80 * XT_ROWS), 0, XT_ROWS - 1).astype(int)
+    return np.where(valid, row * XT_COLUMNS + column, -1)
+
+
+def fit_expected_threat(events: pd.DataFrame, max_iterations: int = 100, tolerance: float = 1e-6) -> np.ndarray:
+    """Ajuste la grille xT (8 × 12) par itération vectorisée de la matrice de transition."""
+    is_move = events["type"].isin(MOVE_TYPES).to_numpy()
+    is_shot = ((events["type"] == "Shot") & (events["shot_type"] != "Penalty")).to_numpy()
+    is_goal = is_shot & (events["shot_outcome"] == "Goal").to_numpy()
+    start = get_cell_index(events["x"], events["y"])
+    end = get_cell_index(events["end_x"], events["end_y"])
+
+    shots = np.bincount(start[is_shot & (start >= 0)], minlength=N_CELLS)
+    goals = np.bincount(start[is_goal & (start >= 0)], minlength=N_CELLS)
+    moves = np.bincount(start[is_move & (start >= 0)], minlength=N_CELLS)
+
+    # Transitions réussies : passes complètes et conduites, de la cellule de départ à la cellule d'arrivée
+    successful = is_move & events["pass_outcome"].isna().to_numpy() & (start >= 0) & (end >= 0)
+    transitions = np.bincount(
+        start[successful] * N_CELLS + end[successful], minlength=N_CELLS * N_CELLS
+    ).reshape(N_CELLS, N_CELLS).astype(float)
+
+    actions = shots + moves
+    shot_probability = np.divide(shots, actions, out=np.zeros(N_CELLS), where=actions > 0)
+    move_probability = np.divide(moves, actions, out=np.zeros(N_CELLS), where=actions > 0)
+    goal_probability = np.divide(goals, shots, out=np.zeros(N_CELLS), where=shots > 0)
+    transitions = np.divide(transitions, moves[:, None], out=np.zeros_like(transitions), where=moves[:, None] > 0)
+
+    xt = np.zeros(N_CELLS)
+    scoring = shot_probability * goal_probability
+    for _ in range(max_iterations):
+        updated = scoring + move_probability * (transitions @ xt)
+        converged = np.max(np.abs(updated - xt)) < tolerance
+        xt = updated
+        if converged:
+            break
+    return xt.reshape(XT_ROWS, XT_COLUMNS)
+
+
+def add_expected_threat(events: pd.DataFrame, grid: np.ndarray) -> pd.DataFrame:
+    """Ajoute la colonne `xt_added` (xT gagné) à chaque passe et conduite ; 0 pour une passe ratée."""
+    events = events.copy()
+    values = grid.ravel()
+    start = get_cell_index(events["x"], events["y"])
+    end = get_cell_index(events["end_x"], events["end_y"])
+    is_move = events["type"].isin(MOVE_TYPES).to_numpy()
+    successful = is_move & events["pass_outcome"].isna().to_numpy() & (start >= 0) & (end >= 0)
+    xt_added = np.where(successful, values[np.maximum(end, 0)] - values[np.maximum(start, 0)], 0.0)
+    events["xt_added"] = np.where(is_move, xt_added, np.nan)
+    return events
+
+
+@st.cache_data(persist="disk")
+def load_xt_grid(competition_id: int, season_id: int):
+    """Ajuste (et persiste) la grille xT d'une compétition/saison."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return np.zeros((XT_ROWS, XT_COLUMNS))
+        return fit_expected_threat(events)
+    except Exception as e:
+        st.error(f"Erreur lors de l'ajustement du modèle xT : {e}")
+        return np.zeros((XT_ROWS, XT_COLUMNS))
+
+
+@st.cache_data
+def load_xt_rankings(competition_id: int, season_id: int):
+    """Classe joueurs et équipes selon l'xT apporté par leurs passes et conduites sur la saison."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        moves = events.loc[events["type"].isin(MOVE_TYPES), ["match_id", "team", "player", "type", "x", "y", "end_x", "end_y", "pass_outcome"]]
+        moves = add_expected_threat(moves, load_xt_grid(competition_id, season_id))
+
+        players = moves.pivot_table(
+            index=["team", "player"], columns="type", values="xt_added", aggfunc="sum", fill_value=0.0
+        ).reindex(columns=MOVE_TYPES, fill_value=0.0)
+        players.columns = ["xt_pass", "xt_carry"]
+        players["xt_total"] = players["xt_pass"] + players["xt_carry"]
+
+        teams = players.groupby("team")[["xt_pass", "xt_carry", "xt_total"]].sum()
+        teams["xt_per_match"] = teams["xt_total"] / moves.groupby("team")["match_id"].nunique()
+        return (
+            players.reset_index().sort_values("xt_total", ascending=False),
+            teams.reset_index().sort_values("xt_total", ascending=False),
+        )
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des classements xT : {e}")
+        return pd.DataFrame(), pd.DataFrame()
@@ -0,0 +1,161 @@
+#formations
+import pandas as pd
+import numpy as np
+import streamlit as st
+from scipy.optimize import linear_sum_assignment
+
+from utils.data_loader import load_normalized_events, PERIOD_OFFSETS, SHOOTOUT_PERIOD
+
+# -----------------------------
+# DÉTECTION DES SYSTÈMES DE JEU
+# -----------------------------
+
+# Fenêtres de 15 minutes par période (le temps additionnel rejoint la dernière fenêtre)
+WINDOW_MINUTES = 15
+PERIOD_MINUTES = {1: 45, 2: 45, 3: 15, 4: 15}
+
+# Nombre minimal d'actions d'un joueur dans une fenêtre pour compter sa position
+MIN_WINDOW_EVENTS = 3
+# En dessous de ce nombre de joueurs de champ positionnés, la fenêtre n'est pas analysée
+MIN_WINDOW_PLAYERS = 8
+N_OUTFIELD = 10
+
+FORMATIONS = ["4-4-2", "4-3-3", "4-2-3-1", "4-1-4-1", "4-4-1-1", "3-5-2", "3-4-3", "3-4-2-1", "5-3-2", "5-4-1"]
+
+FORMATION_COLUMNS = ["match_id", "team", "period", "window", "start_minute", "players", "formation", "cost", "declared_formation"]
+
+
+def build_template(formation: str) -> np.ndarray:
+    """Construit les positions théoriques (10 joueurs de champ) d'un système « 4-3-3 », ligne par ligne."""
+    lines = [int(count) for count in formation.split("-")]
+    depths = np.linspace(25, 85, len(lines))
+    points = []
+    for depth, count in zip(depths, lines):
+        # Écart de 15 yards entre joueurs d'une même ligne, centré sur l'axe
+        widths = 40 + 15 * (np.arange(count) - (count - 1) / 2)
+        points.extend((depth, width) for width in widths)
+    return np.array(points)
+
+
+def standardize_shape(points: np.ndarray) -> np.ndarray:
+    """Centre et réduit un nuage de positions pour ne comparer que la forme, pas le bloc ni sa compacité."""
+    centered = points - points.mean(axis=0)
+    return centered / np.where(centered.std(axis=0) > 0, centered.std(axis=0), 1)
+
+
+# Gabarits standardisés empilés : (systèmes, 10, 2)
+TEMPLATES = np.stack([standardize_shape(build_template(formation)) for formation in FORMATIONS])
+
+
+def format_formation(code) -> str:
+    """Transforme le code StatsBomb (4231) en libellé (« 4-2-3-1 »)."""
+    if pd.isna(code):
+        return None
+    return "-".join(str(int(code)))
+
+
+def compute_window_positions(events: pd.DataFrame) -> pd.DataFrame:
+    """Calcule la position médiane de chaque joueur de champ par (équipe, période, fenêtre de 15 minutes)."""
+    events = events[
+        events["period"].isin(PERIOD_MINUTES)
+        & events["player_id"].notna()
+        & events["x"].notna()
+        & (events["position"] != "Goalkeeper")
+    ]
+    elapsed = events["match_seconds"] - events["period"].map(PERIOD_OFFSETS)
+    last_window = events["period"].map(PERIOD_MINUTES) // WINDOW_MINUTES - 1
+    window = np.minimum(elapsed // (WINDOW_MINUTES * 60), last_window).clip(lower=0).astype(int)
+    positions = (
+        events.assign(window=window)
+        .groupby(["match_id", "team", "period", "window", "player_id"])
+        .agg(player=("player", "last"), x=("x", "median"), y=("y", "median"), events=("x", "size"))
+        .reset_index()
+    )
+    positions = positions[positions["events"] >= MIN_WINDOW_EVENTS]
+    # Garder au plus 10 joueurs par fenêtre (les plus actifs, en cas de remplacement dans la fenêtre)
+    rank = positions.groupby(["match_id", "team", "period", "window"])["events"].rank(method="first", ascending=False)
+    return positions[rank <= N_OUTFIELD].reset_index(drop=True)
+
+
+def match_formation(points: np.ndarray):
+    """Associe un nuage de positions au gabarit le plus proche ; retourne (indice du système, coût, poste de chaque joueur)."""
+    shape = standardize_shape(points)
+    # Coûts joueur × poste pour tous les systèmes en une seule opération : (systèmes, joueurs, postes)
+    costs = ((shape[None, :, None, :] - TEMPLATES[:, None, :, :]) ** 2).sum(axis=-1)
+    best = (np.inf, -1, None)
+    for formation, cost in enumerate(costs):
+        players, slots = linear_sum_assignment(cost)
+        total = cost[players, slots].mean()
+        if total < best[0]:
+            best = (total, formation, slots)
+    return best[1], best[0], best[2]
+
+
+def get_declared_formations(events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les systèmes annoncés (composition de départ et changements tactiques) avec leur horaire."""
+    tactics = events[events["type"].isin(["Starting XI", "Tactical Shift"]) & events["tactics"].notna()]
+    return pd.DataFrame({
+        "team": tactics["team"].to_numpy(),
+        "match_seconds": tactics["match_seconds"].to_numpy(dtype=float),
+        "declared_formation": [format_formation(tactic.get("formation")) for tactic in tactics["tactics"]],
+    }).sort_values("match_seconds")
+
+
+def detect_formations(events: pd.DataFrame):
+    """Détecte le système de chaque équipe dans chaque fenêtre ; retourne (systèmes, positions avec poste attribué)."""
+    positions = compute_window_positions(events)
+    positions["slot"] = -1
+    rows = []
+    for (match_id, team, period, window), group in positions.groupby(["match_id", "team", "period", "window"]):
+        if len(group) < MIN_WINDOW_PLAYERS:
+            continue
+        formation, cost, slots = match_formation(group[["x", "y"]].to_numpy())
+        positions.loc[group.index, "slot"] = slots
+        rows.append((match_id, team, period, window, PERIOD_OFFSETS[period] / 60 + window * WINDOW_MINUTES, len(group), FORMATIONS[formation], cost))
+    formations = pd.DataFrame(rows, columns=FORMATION_COLUMNS[:-1])
+    positions = positions.merge(
+        formations[["match_id", "team", "period", "window", "formation"]], on=["match_id", "team", "period", "window"], how="left"
+    )
+
+    # Système annoncé en vigueur au début de chaque fenêtre
+    declared = get_declared_formations(events)
+    if formations.empty or declared.empty:
+        formations["declared_formation"] = None
+        return formations[FORMATION_COLUMNS], positions
+    formations = pd.merge_asof(
+        formations.assign(match_seconds=formations["start_minute"] * 60.0).sort_values("match_seconds"),
+        declared,
+        on="match_seconds",
+        by="team",
+    )
+    return formations.sort_values(["team", "start_minute"]).reset_index(drop=True)[FORMATION_COLUMNS], positions
+
+
+@st.cache_data
+def load_match_formations(match_id: int):
+    """Détecte (et met en cache) les systèmes de jeu des deux équipes d'un match."""
+    try:
+        events = load_normalized_events(match_id)
+        if events.empty:
+            return pd.DataFrame(columns=FORMATION_COLUMNS), pd.DataFrame()
+        return detect_formations(events[events["period"] < SHOOTOUT_PERIOD])
+    except Exception as e:
+        st.error(f"Erreur lors de la détection des systèmes de jeu : {e}")
+        return pd.DataFrame(columns=FORMATION_COLUMNS), pd.DataFrame()
+
+
+def collect_team_formations(match_ids, team_name: str) -> pd.DataFrame:
+    """Rassemble les systèmes détectés d'une équipe sur plusieurs matchs (chaque match est en cache)."""
+    frames = [load_match_formations(match_id)[0] for match_id in match_ids]
+    formations = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FORMATION_COLUMNS)
+    return formations[formations["team"] == team_name].reset_index(drop=True)
+
+
+def summarize_formations(formations: pd.DataFrame) -> pd.DataFrame:
+    """Retourne, pour chaque match, le nombre de fenêtres passées dans chaque système et le système principal."""
+    counts = formations.groupby(["match_id", "formation"]).size().unstack(fill_value=0)
+    counts["main_formation"] = counts.idxmax(axis=1)
+    counts["changes"] = formations.groupby("match_id")["formation"].agg(
+        lambda values: int((values != values.shift()).sum() - 1)
+    )
+    return counts.reset_index()
@@ -0,0 +1,149 @@
+#match_stats
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_matches, load_season_events
+from utils.transitions import WON_OUTCOMES, get_recovery_mask
+from utils.ratings import load_team_ratings
+
+# -----------------------------
+# STATISTIQUES PAR MATCH ET TABLES CONTEXTUELLES
+# -----------------------------
+
+MATCH_STAT_COLUMNS = [
+    "actions", "passes", "passes_completed", "shots", "goals", "xg", "assists", "key_passes",
+    "duels_won", "interceptions", "recoveries", "pressures", "progressive_passes", "progressive_carries",
+    "progressive_receptions",
+]
+
+VENUES = ["Domicile", "Extérieur"]
+RESULTS = ["Victoire", "Nul", "Défaite"]
+
+# Découpages contextuels : colonne → libellé affiché
+CONTEXT_SPLITS = {
+    "venue": "Domicile / Extérieur",
+    "result": "Résultat du match",
+    "opponent_tier": "Niveau de l'adversaire",
+    "game_state": "Score au moment de l'action",
+}
+
+
+def get_match_context(matches: pd.DataFrame, opponent_table: pd.DataFrame) -> pd.DataFrame:
+    """Retourne, par (match, équipe), le lieu, l'adversaire, le résultat et le niveau de l'adversaire."""
+    sides = []
+    for side, opponent in [("home", "away"), ("away", "home")]:
+        goal_difference = matches[f"{side}_score"] - matches[f"{opponent}_score"]
+        sides.append(pd.DataFrame({
+            "match_id": matches["match_id"],
+            "team": matches[f"{side}_team"],
+            "opponent": matches[f"{opponent}_team"],
+            "venue": VENUES[0] if side == "home" else VENUES[1],
+            "result": np.select([goal_difference > 0, goal_difference < 0], ["Victoire", "Défaite"], default="Nul"),
+        }))
+    context = pd.concat(sides, ignore_index=True)
+    context["venue"] = pd.Categorical(context["venue"], categories=VENUES)
+    context["result"] = pd.Categorical(context["result"], categories=RESULTS)
+    if opponent_table.empty:
+        context["opponent_tier"] = pd.Categorical([None] * len(context))
+        return context
+    return context.merge(opponent_table[["match_id", "team", "opponent_tier"]], on=["match_id", "team"], how="left")
+
+
+def get_stat_flags(events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne, pour chaque événement, ses clés (match, équipe, joueur, état du score) et ses indicateurs statistiques."""
+    is_pass = events["type"] == "Pass"
+    is_shot = events["type"] == "Shot"
+    return pd.DataFrame({
+        "match_id": events["match_id"],
+        "team": events["team"],
+        "player_id": events["player_id"],
+        "player": events["player"],
+        "game_state": events["game_state"],
+        "actions": events["x"].notna(),
+        "passes": is_pass,
+        "passes_completed": is_pass & events["pass_outcome"].isna(),
+        "shots": is_shot,
+        "goals": is_shot & (events["shot_outcome"] == "Goal"),
+        "xg": events["shot_statsbomb_xg"].where(is_shot, 0.0).fillna(0.0),
+        "assists": events["pass_goal_assist"].eq(True),
+        "key_passes": events["pass_shot_assist"].eq(True) | events["pass_goal_assist"].eq(True),
+        "duels_won": (events["type"] == "Duel") & events["duel_outcome"].isin(WON_OUTCOMES),
+        "interceptions": events["type"] == "Interception",
+        "recoveries": get_recovery_mask(events),
+        "pressures": events["type"] == "Pressure",
+        "progressive_passes": events["progressive_pass"],
+        "progressive_carries": events["progressive_carry"],
+        "progressive_receptions": events["progressive_reception"],
+    })
+
+
+def compute_state_stats(events: pd.DataFrame) -> pd.DataFrame:
+    """Agrège en un seul passage les statistiques par (match, équipe, joueur, état du score)."""
+    flags = get_stat_flags(events)
+    flags = flags[flags["player"].notna()]
+    return (
+        flags.groupby(["match_id", "team", "player_id", "player", "game_state"], observed=True)[MATCH_STAT_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+
+
+def aggregate_split(stats: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Somme les statistiques selon `keys` et compte les matchs distincts."""
+    grouped = stats.groupby(keys, observed=True)
+    table = grouped[MATCH_STAT_COLUMNS].sum()
+    table.insert(0, "matches", grouped["match_id"].nunique())
+    return table.reset_index()
+
+
+def build_split_tables(state_stats: pd.DataFrame, context: pd.DataFrame) -> dict:
+    """Précalcule les tables par joueur et par équipe pour chaque découpage contextuel."""
+    match_stats = (
+        state_stats.groupby(["match_id", "team", "player_id", "player"], observed=True)[MATCH_STAT_COLUMNS]
+        .sum()
+        .reset_index()
+        .merge(context, on=["match_id", "team"], how="left")
+    )
+    team_state_stats = state_stats.groupby(["match_id", "team", "game_state"], observed=True)[MATCH_STAT_COLUMNS].sum().reset_index()
+    team_match_stats = (
+        match_stats.groupby(["match_id", "team"], observed=True)[MATCH_STAT_COLUMNS]
+        .sum()
+        .reset_index()
+        .merge(context, on=["match_id", "team"], how="left")
+    )
+
+    tables = {"match_stats": match_stats, "players": {}, "teams": {}}
+    for split in CONTEXT_SPLITS:
+        player_source = state_stats if split == "game_state" else match_stats
+        team_source = team_state_stats if split == "game_state" else team_match_stats
+        tables["players"][split] = aggregate_split(player_source, ["team", "player_id", split])
+        tables["teams"][split] = aggregate_split(team_source, ["team", split])
+    return tables
+
+
+@st.cache_data
+def load_split_tables(competition_id: int, season_id: int):
+    """Construit (et met en cache) les statistiques par match et les tables contextuelles d'une saison."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        events = load_season_events(competition_id, season_id)
+        if matches.empty or events.empty:
+            return {}
+        _, _, opponent_table = load_team_ratings(competition_id, season_id)
+        state_stats = compute_state_stats(events)
+        return build_split_tables(state_stats, get_match_context(matches, opponent_table))
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des tables contextuelles : {e}")
+        return {}
+
+
+def get_split(tables: dict, split: str, team_name: str, player_id: float = None) -> pd.DataFrame:
+    """Lit dans les tables précalculées le découpage d'un joueur (ou d'une équipe si aucun joueur)."""
+    if not tables:
+        return pd.DataFrame()
+    if player_id is None:
+        table = tables["teams"][split]
+        return table[table["team"] == team_name].reset_index(drop=True)
+    table = tables["players"][split]
+    return table[(table["team"] == team_name) & (table["player_id"] == player_id)].reset_index(drop=True)
@@ -0,0 +1,191 @@
+#pass_network
+import pandas as pd
+import numpy as np
+import streamlit as st
+from scipy import sparse
+
+from utils.data_loader import load_matches, load_normalized_events
+
+# -----------------------------
+# RÉSEAU DE PASSES
+# -----------------------------
+
+def get_completed_passes(events: pd.DataFrame, team_name: str) -> pd.DataFrame:
+    """Retourne les passes réussies (outcome vide) d'une équipe avec un receveur connu."""
+    mask = (
+        (events["team"] == team_name)
+        & (events["type"] == "Pass")
+        & events["pass_outcome"].isna()
+        & events["pass_recipient"].notna()
+    )
+    return events.loc[mask, ["match_id", "player", "pass_recipient", "x", "y", "end_x", "end_y"]]
+
+
+def build_pass_matrix(passes: pd.DataFrame):
+    """Accumule la matrice creuse passeur × receveur à partir d'une table de passes."""
+    players = pd.Index(pd.unique(pd.concat([passes["player"], passes["pass_recipient"]])))
+    rows = players.get_indexer(passes["player"])
+    cols = players.get_indexer(passes["pass_recipient"])
+    matrix = sparse.coo_matrix(
+        (np.ones(len(passes)), (rows, cols)), shape=(len(players), len(players))
+    ).tocsr()  # les doublons (mêmes paires) sont additionnés lors de la conversion
+    return players, matrix
+
+
+def compute_average_positions(passes: pd.DataFrame) -> pd.DataFrame:
+    """Calcule la position moyenne de chaque joueur (passes données et reçues) par moyenne groupée."""
+    made = passes[["player", "x", "y"]]
+    received = passes[["pass_recipient", "end_x", "end_y"]].set_axis(["player", "x", "y"], axis=1)
+    positions = (
+        pd.concat([made, received], ignore_index=True)
+        .groupby("player")
+        .agg(x=("x", "mean"), y=("y", "mean"), touches=("x", "size"))
+    )
+    return positions.sort_values("touches", ascending=False)
+
+
+@st.cache_data
+def load_pass_network(match_ids: tuple, team_name: str):
+    """Construit le réseau de passes d'une équipe sur un ou plusieurs matchs."""
+    try:
+        frames = [get_completed_passes(load_normalized_events(match_id), team_name) for match_id in match_ids]
+        passes = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=["match_id", "player", "pass_recipient", "x", "y", "end_x", "end_y"]
+        )
+        players, matrix = build_pass_matrix(passes)
+        return {
+            "players": players.tolist(),
+            "matrix": matrix,
+            "positions": compute_average_positions(passes),
+        }
+    except Exception as e:
+        st.error(f"Erreur lors de la construction du réseau de passes : {e}")
+        return {"players": [], "matrix": sparse.csr_matrix((0, 0)), "positions": pd.DataFrame()}
+
+
+def get_network_edges(network: dict, players=None, min_passes: int = 1) -> pd.DataFrame:
+    """Retourne les connexions (passes dans les deux sens) entre joueurs, avec leurs coordonnées."""
+    columns = ["player_a", "player_b", "passes", "x_start", "y_start", "x_end", "y_end"]
+    if not network["players"]:
+        return pd.DataFrame(columns=columns)
+
+    index = pd.Index(network["players"])
+    matrix = network["matrix"]
+    if players is not None:
+        keep = index.get_indexer(pd.Index(players).intersection(index))
+        index = index[keep]
+        matrix = matrix[keep][:, keep]
+
+    pairs = sparse.triu(matrix + matrix.T, k=1).tocoo()
+    edges = pd.DataFrame({
+        "player_a": index[pairs.row],
+        "player_b": index[pairs.col],
+        "passes": pairs.data.astype(int),
+    })
+    edges = edges[edges["passes"] >= min_passes]
+
+    positions = network["positions"]
+    edges["x_start"] = positions["x"].reindex(edges["player_a"]).to_numpy()
+    edges["y_start"] = positions["y"].reindex(edges["player_a"]).to_numpy()
+    edges["x_end"] = positions["x"].reindex(edges["player_b"]).to_numpy()
+    edges["y_end"] = positions["y"].reindex(edges["player_b"]).to_numpy()
+    return edges[columns].reset_index(drop=True)
+
+
+# -----------------------------
+# CENTRALITÉ DU RÉSEAU
+# -----------------------------
+
+CENTRALITY_COLUMNS = ["degree", "in_degree", "out_degree", "betweenness", "eigenvector", "clustering"]
+
+
+def compute_centrality(players, matrix) -> pd.DataFrame:
+    """Calcule degré, intermédiarité pondérée, vecteur propre et clustering sur la matrice d'adjacence."""
+    weights = matrix.toarray() if sparse.issparse(matrix) else np.asarray(matrix, dtype=float)
+    n = len(players)
+    if n == 0:
+        return pd.DataFrame(columns=CENTRALITY_COLUMNS)
+
+    undirected = weights + weights.T
+    out_degree = weights.sum(axis=1)
+    in_degree = weights.sum(axis=0)
+
+    # Intermédiarité : distance = 1 / nombre de passes, plus courts chemins par Floyd-Warshall vectorisé
+    with np.errstate(divide="ignore"):
+        dist = np.where(weights > 0, 1.0 / weights, np.inf)
+    np.fill_diagonal(dist, 0.0)
+    for k in range(n):
+        dist = np.minimum(dist, dist[:, k, None] + dist[None, k, :])
+
+    # v est sur le plus court chemin s → t si d(s, v) + d(v, t) = d(s, t) (chemins supposés uniques)
+    on_path = np.isclose(dist[:, :, None] + dist[None, :, :], dist[:, None, :]) & np.isfinite(dist[:, None, :])
+    idx = np.arange(n)
+    on_path[idx, idx, :] = False
+    on_path[:, idx, idx] = False
+    on_path[idx, :, idx] = False
+    betweenness = on_path.sum(axis=(0, 2)) / max((n - 1) * (n - 2), 1)
+
+    # Centralité de vecteur propre : vecteur propre dominant de la matrice symétrisée
+    _, vectors = np.linalg.eigh(undirected)
+    eigenvector = np.abs(vectors[:, -1])
+    if eigenvector.max() > 0:
+        eigenvector = eigenvector / eigenvector.max()
+
+    # Clustering pondéré (Onnela) : diagonale de (W^(1/3))^3 rapportée aux triangles possibles
+    scaled = np.cbrt(undirected / undirected.max()) if undirected.max() > 0 else undirected
+    triangles = np.diag(scaled @ scaled @ scaled)
+    neighbours = (undirected > 0).sum(axis=1)
+    possible = neighbours * (neighbours - 1)
+    clustering = np.divide(triangles, possible, out=np.zeros(n), where=possible > 0)
+
+    return pd.DataFrame(
+        {
+            "degree": out_degree + in_degree,
+            "in_degree": in_degree,
+            "out_degree": out_degree,
+            "betweenness": betweenness,
+            "eigenvector": eigenvector,
+            "clustering": clustering,
+        },
+        index=pd.Index(players, name="player"),
+    )
+
+
+@st.cache_data
+def load_match_centrality(match_id: int, team_name: str):
+    """Calcule (et met en cache) la centralité des joueurs d'une équipe pour un match."""
+    try:
+        passes = get_completed_passes(load_normalized_events(match_id), team_name)
+        players, matrix = build_pass_matrix(passes)
+        centrality = compute_centrality(players, matrix).reset_index()
+        centrality.insert(0, "team", team_name)
+        centrality.insert(0, "match_id", match_id)
+        return centrality
+    except Exception as e:
+        st.error(f"Erreur lors du calcul de la centralité : {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data
+def load_season_centrality(competition_id: int, season_id: int):
+    """Rassemble la centralité de toutes les équipes sur tous les matchs d'une saison."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        frames = [
+            load_match_centrality(match["match_id"], team)
+            for _, match in matches.iterrows()
+            for team in (match["home_team"], match["away_team"])
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    except Exception as e:
+        st.error(f"Erreur lors du calcul de la centralité de la saison : {e}")
+        return pd.DataFrame()
+
+
+def aggregate_centrality(centrality: pd.DataFrame) -> pd.DataFrame:
+    """Moyenne les métriques de centralité par joueur sur la saison."""
+    if centrality.empty:
+        return pd.DataFrame(columns=["team", "player", "matches"] + CENTRALITY_COLUMNS)
+    aggregated = centrality.groupby(["team", "player"])[CENTRALITY_COLUMNS].mean()
+    aggregated.insert(0, "matches", centrality.groupby(["team", "player"]).size())
+    return aggregated.reset_index().sort_values("betweenness", ascending=False)
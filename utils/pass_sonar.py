@@ -0,0 +1,112 @@
+#pass_sonar
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events, SHOOTOUT_PERIOD
+from utils.chance_creation import DEAD_BALL_PASS_TYPES
+from utils.passes import PASS_LENGTH_CLASSES
+
+# -----------------------------
+# SONARS DE PASSES (HISTOGRAMMES POLAIRES)
+# -----------------------------
+
+# Secteurs d'angle : le secteur 0 est centré sur la direction de l'attaque (angle 0)
+N_ANGLE_BINS = 12
+ANGLE_WIDTH = 2 * np.pi / N_ANGLE_BINS
+ANGLE_EDGES = np.linspace(0, 2 * np.pi, N_ANGLE_BINS + 1)
+
+# Entités pour lesquelles un sonar est calculé → colonnes qui les identifient
+SONAR_ENTITIES = {
+    "player": ["team", "player_id", "player"],
+    "team": ["team"],
+    "zone": ["team", "zone18"],
+}
+
+SONAR_COLUMNS = ["angle", "theta1", "theta2", "passes", "share", "completion", "mean_length"] + PASS_LENGTH_CLASSES
+
+
+def get_open_play_passes(events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les passes dans le jeu (remises en jeu exclues) dont le départ et l'arrivée sont connus."""
+    return events[
+        (events["type"] == "Pass")
+        & ~events["pass_type"].isin(DEAD_BALL_PASS_TYPES)
+        & events["x"].notna()
+        & events["end_x"].notna()
+        & (events["period"] < SHOOTOUT_PERIOD)
+    ]
+
+
+def get_pass_angles(passes: pd.DataFrame) -> np.ndarray:
+    """Angle de chaque passe dans [0, 2π), décalé d'un demi-secteur pour centrer le secteur 0 vers l'avant."""
+    angle = np.arctan2(passes["end_y"] - passes["y"], passes["end_x"] - passes["x"]).to_numpy()
+    return (angle + ANGLE_WIDTH / 2) % (2 * np.pi)
+
+
+def build_pass_sonars(events: pd.DataFrame, entity: str) -> dict:
+    """Calcule les sonars de toutes les entités en une passe : histogrammes 2D (entité × secteur d'angle)."""
+    passes = get_open_play_passes(events)
+    keys = SONAR_ENTITIES[entity]
+    passes = passes.dropna(subset=keys)
+    grouped = passes.groupby(keys, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    table = grouped.agg(passes=("x", "size"), x=("x", "mean"), y=("y", "mean")).reset_index()
+    n_entities = len(table)
+    angles = get_pass_angles(passes)
+
+    def histogram(first, n_rows, weights=None):
+        counts, _, _ = np.histogram2d(first, angles, bins=[np.arange(n_rows + 1), ANGLE_EDGES], weights=weights)
+        return counts.astype(np.float32)
+
+    # Classe de longueur intégrée à la première dimension : (entité × classe) puis remise en forme
+    length_class = pd.Categorical(passes["pass_length_class"], categories=PASS_LENGTH_CLASSES).codes
+    n_classes = len(PASS_LENGTH_CLASSES)
+    by_length = histogram(codes * n_classes + np.maximum(length_class, 0), n_entities * n_classes)
+    return {
+        "entity": entity,
+        "keys": table,
+        "counts": histogram(codes, n_entities),
+        "completed": histogram(codes, n_entities, passes["pass_completed"].to_numpy(dtype=float)),
+        "distance": histogram(codes, n_entities, passes["pass_distance"].fillna(0.0).to_numpy(dtype=float)),
+        "by_length": by_length.reshape(n_entities, n_classes, N_ANGLE_BINS),
+    }
+
+
+@st.cache_data(persist="disk")
+def load_pass_sonars(competition_id: int, season_id: int, entity: str = "player") -> dict:
+    """Calcule (et persiste) les sonars de passes d'une saison pour un type d'entité (joueur, équipe, zone)."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return {}
+        return build_pass_sonars(events, entity)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des sonars de passes : {e}")
+        return {}
+
+
+def get_sonar_rows(sonars: dict, team_name: str, **filters) -> pd.DataFrame:
+    """Retourne les entités d'une équipe (avec leur ligne dans les histogrammes), filtrées sur d'autres clés."""
+    keys = sonars["keys"].assign(row=np.arange(len(sonars["keys"])))
+    mask = keys["team"] == team_name
+    for column, value in filters.items():
+        mask &= keys[column] == value
+    return keys[mask]
+
+
+def get_sonar(sonars: dict, row: int) -> pd.DataFrame:
+    """Retourne le sonar d'une entité : un secteur par ligne (angles en degrés, volume, réussite, longueur)."""
+    counts = sonars["counts"][row]
+    centers = np.degrees(np.arange(N_ANGLE_BINS) * ANGLE_WIDTH)
+    sonar = pd.DataFrame({
+        "angle": centers,
+        "theta1": centers - np.degrees(ANGLE_WIDTH) / 2,
+        "theta2": centers + np.degrees(ANGLE_WIDTH) / 2,
+        "passes": counts,
+        "share": counts / counts.max() if counts.max() > 0 else counts,
+        "completion": np.divide(sonars["completed"][row], counts, out=np.full_like(counts, np.nan), where=counts > 0),
+        "mean_length": np.divide(sonars["distance"][row], counts, out=np.full_like(counts, np.nan), where=counts > 0),
+    })
+    for length_class, values in zip(PASS_LENGTH_CLASSES, sonars["by_length"][row]):
+        sonar[length_class] = values
+    return sonar[SONAR_COLUMNS]
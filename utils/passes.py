@@ -0,0 +1,68 @@
+#passes
+import pandas as pd
+import numpy as np
+
+# -----------------------------
+# CLASSIFICATION DES PASSES
+# -----------------------------
+
+# Centre du but adverse (coordonnées StatsBomb, 120 × 80)
+GOAL_X, GOAL_Y = 120.0, 40.0
+
+# Seuils de longueur (en yards, unité StatsBomb)
+SHORT_PASS_MAX = 15.0
+LONG_PASS_MIN = 30.0
+
+FINAL_THIRD_X = 80.0
+BOX_X, BOX_Y_MIN, BOX_Y_MAX = 102.0, 18.0, 62.0
+
+PASS_LENGTH_CLASSES = ["Courte", "Moyenne", "Longue"]
+PASS_DIRECTIONS = ["Vers l'avant", "Latérale", "Vers l'arrière"]
+
+
+def in_box(x: pd.Series, y: pd.Series) -> pd.Series:
+    """Indique si des coordonnées se trouvent dans la surface de réparation adverse."""
+    return (x >= BOX_X) & (y >= BOX_Y_MIN) & (y <= BOX_Y_MAX)
+
+
+def goal_progress(x, y, end_x, end_y):
+    """Distance gagnée vers le centre du but adverse entre le point de départ et le point d'arrivée."""
+    return np.hypot(GOAL_X - x, GOAL_Y - y) - np.hypot(GOAL_X - end_x, GOAL_Y - end_y)
+
+
+def classify_passes(events: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute les colonnes de classification des passes (longueur, direction, progression, entrées, xA)."""
+    is_pass = events["type"] == "Pass"
+    dx = events["end_x"] - events["x"]
+    dy = events["end_y"] - events["y"]
+    distance = np.hypot(dx, dy)
+    angle = np.degrees(np.abs(np.arctan2(dy, dx)))
+
+    events["pass_completed"] = is_pass & events["pass_outcome"].isna()
+    events["pass_distance"] = distance.where(is_pass)
+    events["pass_length_class"] = pd.Series(
+        np.select(
+            [distance < SHORT_PASS_MAX, distance < LONG_PASS_MIN, distance >= LONG_PASS_MIN],
+            PASS_LENGTH_CLASSES,
+            default=None,
+        ),
+        index=events.index,
+    ).where(is_pass)
+    events["pass_direction"] = pd.Series(
+        np.select([angle <= 45, angle < 135, angle >= 135], PASS_DIRECTIONS, default=None),
+        index=events.index,
+    ).where(is_pass)
+    events["pass_progress"] = goal_progress(events["x"], events["y"], events["end_x"], events["end_y"]).where(is_pass)
+    events["pass_into_final_third"] = is_pass & (events["x"] < FINAL_THIRD_X) & (events["end_x"] >= FINAL_THIRD_X)
+    events["pass_into_box"] = (
+        is_pass & in_box(events["end_x"], events["end_y"]) & ~in_box(events["x"], events["y"])
+    )
+    events["pass_key"] = is_pass & (
+        events["pass_shot_assist"].eq(True) | events["pass_goal_assist"].eq(True)
+    )
+
+    # xA : xG du tir préparé par la passe (jointure sur shot_key_pass_id)
+    shots = events.loc[events["type"] == "Shot", ["shot_key_pass_id", "shot_statsbomb_xg"]].dropna()
+    xa_by_pass = shots.groupby("shot_key_pass_id")["shot_statsbomb_xg"].sum()
+    events["pass_xa"] = events["id"].map(xa_by_pass).fillna(0.0).where(is_pass, 0.0)
+    return events
@@ -0,0 +1,168 @@
+#percentiles
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events, SHOOTOUT_PERIOD
+from utils.match_stats import MATCH_STAT_COLUMNS, get_stat_flags
+
+# -----------------------------
+# TEMPS DE JEU, STATISTIQUES PAR 90 MINUTES ET PERCENTILES
+# -----------------------------
+
+# Seuil de temps de jeu pour entrer dans la population de référence
+MIN_MINUTES = 300
+
+# Regroupement des postes StatsBomb : premier mot-clé trouvé dans le nom du poste
+POSITION_GROUPS = [
+    ("Goalkeeper", "Gardien"),
+    ("Center Back", "Défenseur central"),
+    ("Back", "Latéral"),
+    ("Defensive Midfield", "Milieu défensif"),
+    ("Center Midfield", "Milieu central"),
+    ("Attacking Midfield", "Milieu offensif / Ailier"),
+    ("Wing", "Milieu offensif / Ailier"),
+    ("Midfield", "Milieu offensif / Ailier"),
+    ("Forward", "Attaquant"),
+    ("Striker", "Attaquant"),
+]
+
+# Métriques par 90 minutes proposées dans les comparaisons
+PER90_METRICS = {
+    "goals": "Buts",
+    "xg": "xG",
+    "shots": "Tirs",
+    "assists": "Passes décisives",
+    "key_passes": "Passes clés",
+    "passes_completed": "Passes réussies",
+    "progressive_passes": "Passes progressives",
+    "progressive_carries": "Conduites progressives",
+    "progressive_receptions": "Réceptions progressives",
+    "duels_won": "Duels gagnés",
+    "interceptions": "Interceptions",
+    "recoveries": "Récupérations",
+    "pressures": "Pressions",
+}
+
+
+def get_position_group(position: pd.Series) -> pd.Series:
+    """Associe chaque poste StatsBomb à un groupe de postes."""
+    conditions = [position.str.contains(keyword, na=False) for keyword, _ in POSITION_GROUPS]
+    labels = [label for _, label in POSITION_GROUPS]
+    return pd.Series(np.select(conditions, labels, default=None), index=position.index)
+
+
+def compute_minutes_played(events: pd.DataFrame) -> pd.DataFrame:
+    """Calcule les minutes jouées par (match, équipe, joueur, poste) depuis les compositions et les remplacements."""
+    events = events[events["period"] < SHOOTOUT_PERIOD]
+    match_end = events.groupby("match_id")["match_seconds"].max()
+
+    # Titulaires : une ligne par joueur de la composition de départ
+    starting = events.loc[events["type"] == "Starting XI", ["match_id", "team", "tactics"]]
+    lineups = starting.assign(lineup=starting["tactics"].str["lineup"]).explode("lineup").dropna(subset=["lineup"])
+    starters = pd.DataFrame({
+        "match_id": lineups["match_id"].to_numpy(),
+        "team": lineups["team"].to_numpy(),
+        "player_id": lineups["lineup"].str["player"].str["id"].to_numpy(),
+        "player": lineups["lineup"].str["player"].str["name"].to_numpy(),
+        "position": lineups["lineup"].str["position"].str["name"].to_numpy(),
+        "start": 0.0,
+    })
+
+    # Remplaçants : entrent au poste du joueur remplacé
+    substitutions = events[events["type"] == "Substitution"]
+    replacements = pd.DataFrame({
+        "match_id": substitutions["match_id"].to_numpy(),
+        "team": substitutions["team"].to_numpy(),
+        "player_id": substitutions["substitution_replacement_id"].to_numpy(),
+        "player": substitutions["substitution_replacement"].to_numpy(),
+        "position": substitutions["position"].to_numpy(),
+        "start": substitutions["match_seconds"].to_numpy(),
+    })
+    appearances = pd.concat([starters, replacements], ignore_index=True)
+
+    exits = substitutions.groupby(["match_id", "player_id"])["match_seconds"].min()
+    exit_time = exits.reindex(pd.MultiIndex.from_frame(appearances[["match_id", "player_id"]])).to_numpy()
+    end = np.where(np.isnan(exit_time), appearances["match_id"].map(match_end).to_numpy(), exit_time)
+    appearances["minutes"] = np.maximum(end - appearances["start"].to_numpy(), 0) / 60
+    return appearances.drop(columns="start")
+
+
+def build_player_season_table(events: pd.DataFrame) -> pd.DataFrame:
+    """Construit la table saison par joueur : poste principal, minutes, totaux et valeurs par 90 minutes."""
+    appearances = compute_minutes_played(events)
+    appearances["player_id"] = appearances["player_id"].astype(float)
+
+    # Poste principal : celui où le joueur a le plus joué ; équipe principale de même
+    by_position = appearances.groupby(["player_id", "position"])["minutes"].sum().reset_index()
+    primary_position = by_position.sort_values("minutes").groupby("player_id")["position"].last()
+    by_team = appearances.groupby(["player_id", "team"])["minutes"].sum().reset_index()
+    primary_team = by_team.sort_values("minutes").groupby("player_id")["team"].last()
+
+    players = appearances.groupby("player_id").agg(
+        player=("player", "last"),
+        matches=("match_id", "nunique"),
+        minutes=("minutes", "sum"),
+    )
+    players["team"] = primary_team
+    players["position"] = primary_position
+    players["position_group"] = get_position_group(players["position"])
+
+    flags = get_stat_flags(events)
+    totals = flags[flags["player_id"].notna()].groupby("player_id")[MATCH_STAT_COLUMNS].sum()
+    players = players.join(totals.set_axis(totals.index.astype(float)), how="left")
+    players[MATCH_STAT_COLUMNS] = players[MATCH_STAT_COLUMNS].fillna(0)
+    for metric in PER90_METRICS:
+        players[f"{metric}_p90"] = players[metric] / players["minutes"].replace(0, np.nan) * 90
+    return players.reset_index()
+
+
+@st.cache_data(persist="disk")
+def load_player_season_table(competition_id: int, season_id: int):
+    """Construit (et persiste) la table saison par joueur d'une compétition."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return pd.DataFrame()
+        return build_player_season_table(events)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des statistiques par 90 minutes : {e}")
+        return pd.DataFrame()
+
+
+def build_percentile_index(players: pd.DataFrame, min_minutes: float = MIN_MINUTES) -> dict:
+    """Trie, pour chaque groupe de postes et chaque métrique, les valeurs par 90 de la population de référence."""
+    eligible = players[(players["minutes"] >= min_minutes) & players["position_group"].notna()]
+    index = {}
+    for group, peers in eligible.groupby("position_group"):
+        for metric in PER90_METRICS:
+            index[(group, metric)] = np.sort(peers[f"{metric}_p90"].to_numpy(dtype=float))
+    return index
+
+
+@st.cache_data
+def load_percentile_index(competition_id: int, season_id: int, min_minutes: float = MIN_MINUTES):
+    """Retourne (et met en cache) les tableaux triés servant au calcul des percentiles."""
+    players = load_player_season_table(competition_id, season_id)
+    if players.empty:
+        return {}
+    return build_percentile_index(players, min_minutes)
+
+
+def get_percentile(index: dict, position_group: str, metric: str, value: float) -> float:
+    """Rang percentile d'une valeur parmi les joueurs du même groupe de postes (recherche dichotomique)."""
+    values = index.get((position_group, metric))
+    if values is None or len(values) == 0 or pd.isna(value):
+        return np.nan
+    # Les ex-aequo comptent pour moitié
+    below = np.searchsorted(values, value, side="left")
+    at_or_below = np.searchsorted(values, value, side="right")
+    return (below + at_or_below) / 2 / len(values) * 100
+
+
+def get_player_percentiles(index: dict, player: pd.Series) -> pd.Series:
+    """Retourne les percentiles d'un joueur (ligne de la table saison) pour toutes les métriques par 90."""
+    return pd.Series({
+        metric: get_percentile(index, player["position_group"], metric, player[f"{metric}_p90"])
+        for metric in PER90_METRICS
+    })
@@ -0,0 +1,112 @@
+#player_index
+import bisect
+import threading
+import unicodedata
+
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import load_season_events
+from utils.percentiles import compute_minutes_played
+
+# -----------------------------
+# INDEX GLOBAL DES JOUEURS
+# -----------------------------
+
+INDEX_COLUMNS = ["player_id", "player", "team", "competition_id", "season_id"]
+
+# L'index est partagé entre les sessions : ses mises à jour sont sérialisées
+_INDEX_LOCK = threading.Lock()
+
+
+def normalize_name(name: str) -> str:
+    """Met un nom en minuscules et retire les accents pour la recherche."""
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower().strip()
+
+
+def get_name_variants(events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les couples (joueur, nom) distincts vus dans les événements et les compositions d'une saison."""
+    appearances = compute_minutes_played(events)[["player_id", "player"]]
+    acting = events.loc[events["player_id"].notna(), ["player_id", "player"]]
+    names = pd.concat([appearances, acting], ignore_index=True).dropna()
+    names["player_id"] = names["player_id"].astype(float)
+    return names.drop_duplicates().reset_index(drop=True)
+
+
+def build_season_entries(events: pd.DataFrame, competition_id: int, season_id: int) -> pd.DataFrame:
+    """Construit les lignes (joueur, nom, équipe, saison) d'une saison pour l'index global."""
+    teams = compute_minutes_played(events)[["player_id", "team"]].dropna().drop_duplicates()
+    teams["player_id"] = teams["player_id"].astype(float)
+    entries = get_name_variants(events).merge(teams, on="player_id", how="left")
+    return entries.assign(competition_id=competition_id, season_id=season_id)[INDEX_COLUMNS]
+
+
+def new_player_index() -> dict:
+    """Crée un index vide : saisons indexées, table des joueurs et liste triée (préfixe, joueur)."""
+    return {"seasons": set(), "players": pd.DataFrame(columns=INDEX_COLUMNS), "keys": []}
+
+
+def add_season_to_player_index(index: dict, entries: pd.DataFrame, competition_id: int, season_id: int) -> dict:
+    """Ajoute une saison à l'index et y insère chaque mot de chaque nom comme point d'entrée de recherche."""
+    if (competition_id, season_id) in index["seasons"]:
+        return index
+    index["players"] = pd.concat([index["players"], entries], ignore_index=True)
+    # « Lionel Andrés Messi » est retrouvé par « lio », « andr » ou « messi »
+    keys = set(index["keys"])
+    for player_id, name in entries[["player_id", "player"]].drop_duplicates().itertuples(index=False):
+        words = normalize_name(name).split()
+        keys.update((" ".join(words[start:]), player_id) for start in range(len(words)))
+    index["keys"] = sorted(keys)
+    index["seasons"].add((competition_id, season_id))
+    return index
+
+
+@st.cache_resource
+def get_player_index() -> dict:
+    """Retourne l'index global des joueurs partagé entre les sessions."""
+    return new_player_index()
+
+
+def load_player_index(competition_id: int, season_id: int) -> dict:
+    """Garantit que la saison est indexée et retourne l'index global."""
+    index = get_player_index()
+    if (competition_id, season_id) not in index["seasons"]:
+        events = load_season_events(competition_id, season_id)
+        if not events.empty:
+            entries = build_season_entries(events, competition_id, season_id)
+            # La saison est revérifiée sous le verrou : une autre session a pu l'ajouter entre-temps
+            with _INDEX_LOCK:
+                add_season_to_player_index(index, entries, competition_id, season_id)
+    return index
+
+
+def search_players(index: dict, query: str, limit: int = 20) -> pd.DataFrame:
+    """Recherche par préfixe (dichotomie sur les clés triées) et retourne une ligne par joueur et par saison."""
+    prefix = normalize_name(query)
+    if not prefix:
+        return pd.DataFrame(columns=INDEX_COLUMNS)
+    keys = index["keys"]
+    position = bisect.bisect_left(keys, (prefix,))
+    player_ids = []
+    while position < len(keys) and keys[position][0].startswith(prefix) and len(player_ids) < limit:
+        if keys[position][1] not in player_ids:
+            player_ids.append(keys[position][1])
+        position += 1
+    players = index["players"]
+    found = players[players["player_id"].isin(player_ids)]
+    # Un nom d'affichage par joueur : la variante la plus fréquente
+    display_name = found.groupby("player_id")["player"].agg(lambda names: names.value_counts().index[0])
+    return (
+        found.drop(columns="player")
+        .drop_duplicates(["player_id", "team", "competition_id", "season_id"])
+        .assign(player=lambda frame: frame["player_id"].map(display_name))
+        .sort_values(["player", "season_id"])
+        .reset_index(drop=True)[INDEX_COLUMNS]
+    )
+
+
+def get_name_list(index: dict, player_id: float) -> list:
+    """Retourne toutes les variantes de nom connues d'un joueur."""
+    players = index["players"]
+    return sorted(players.loc[players["player_id"] == player_id, "player"].unique().tolist())
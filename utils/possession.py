@@ -0,0 +1,104 @@
+#possession
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_matches, load_normalized_events
+
+# -----------------------------
+# SÉQUENCES DE POSSESSION
+# -----------------------------
+
+CHAIN_OUTCOMES = ["But", "Tir", "Perte de balle", "Conservée", "Fin de période"]
+
+
+def build_possession_chains(events: pd.DataFrame) -> pd.DataFrame:
+    """Construit la table des séquences de possession d'un match en un seul groupby vectorisé."""
+    events = events[events["possession"].notna()]
+    # Les coordonnées StatsBomb sont relatives à l'équipe qui agit : on ne garde que celles de l'équipe en possession
+    own = events["team"] == events["possession_team"]
+    is_shot = own & (events["type"] == "Shot")
+    flags = pd.DataFrame({
+        "match_id": events["match_id"],
+        "possession": events["possession"],
+        "team": events["possession_team"],
+        "period": events["period"],
+        "play_pattern": events["play_pattern"],
+        "match_seconds": events["match_seconds"],
+        "own_x": events["x"].where(own),
+        "own_y": events["y"].where(own),
+        # Point atteint : fin de passe/conduite, position du tir pour un tir
+        "reach_x": events["end_x"].mask(is_shot).fillna(events["x"]).where(own),
+        "reach_y": events["end_y"].mask(is_shot).fillna(events["y"]).where(own),
+        "is_pass": own & (events["type"] == "Pass"),
+        "is_shot": is_shot,
+        "is_goal": is_shot & (events["shot_outcome"] == "Goal"),
+        "xg": events["shot_statsbomb_xg"].where(is_shot, 0.0).fillna(0.0),
+    })
+
+    chains = flags.groupby(["match_id", "possession"], sort=True).agg(
+        team=("team", "first"),
+        period=("period", "first"),
+        play_pattern=("play_pattern", "first"),
+        start_time=("match_seconds", "min"),
+        end_time=("match_seconds", "max"),
+        start_x=("own_x", "first"),
+        start_y=("own_y", "first"),
+        end_x=("reach_x", "last"),
+        end_y=("reach_y", "last"),
+        events=("team", "size"),
+        passes=("is_pass", "sum"),
+        shots=("is_shot", "sum"),
+        goals=("is_goal", "sum"),
+        xg=("xg", "sum"),
+    ).reset_index()
+    chains["duration"] = chains["end_time"] - chains["start_time"]
+
+    # Issue de la séquence : tir/but, sinon selon l'équipe de la séquence suivante
+    next_team = chains.groupby("match_id")["team"].shift(-1)
+    next_period = chains.groupby("match_id")["period"].shift(-1)
+    chains["outcome"] = np.select(
+        [
+            chains["goals"] > 0,
+            chains["shots"] > 0,
+            next_team.isna() | (next_period != chains["period"]),
+            next_team == chains["team"],
+        ],
+        ["But", "Tir", "Fin de période", "Conservée"],
+        default="Perte de balle",
+    )
+    return chains
+
+
+@st.cache_data(persist="disk")
+def load_possession_chains(match_id: int):
+    """Calcule (et persiste) la table des séquences de possession d'un match."""
+    try:
+        events = load_normalized_events(match_id)
+        if events.empty:
+            return pd.DataFrame()
+        return build_possession_chains(events)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des séquences de possession : {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(persist="disk")
+def load_season_possession_chains(competition_id: int, season_id: int):
+    """Rassemble les séquences de possession de tous les matchs d'une saison."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        frames = [load_possession_chains(match_id) for match_id in matches["match_id"]]
+        frames = [frame for frame in frames if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    except Exception as e:
+        st.error(f"Erreur lors du chargement des séquences de la saison : {e}")
+        return pd.DataFrame()
+
+
+def compute_possession_share(chains: pd.DataFrame) -> pd.Series:
+    """Retourne la part du temps de possession (%) de chaque équipe à partir des séquences."""
+    if chains.empty:
+        return pd.Series(dtype=float)
+    durations = chains.groupby("team")["duration"].sum()
+    return durations / durations.sum() * 100
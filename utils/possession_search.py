@@ -0,0 +1,148 @@
+#possession_search
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events, SHOOTOUT_PERIOD
+from utils.possession import load_season_possession_chains
+
+# -----------------------------
+# RECHERCHE DE POSSESSIONS SIMILAIRES
+# -----------------------------
+
+# Trajet du ballon rééchantillonné en un nombre fixe de points (à distance égale le long du trajet)
+N_PATH_POINTS = 12
+
+# Résumé de la séquence ajouté au trajet, et son poids relatif dans la distance
+SUMMARY_COLUMNS = ["duration", "passes", "events", "xg"]
+SUMMARY_WEIGHT = 0.5
+
+CHAIN_COLUMNS = [
+    "match_id", "possession", "team", "period", "play_pattern", "start_time",
+    "duration", "passes", "events", "xg", "outcome",
+]
+
+
+def get_ball_points(events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les points successifs du ballon de chaque possession : départ des actions puis point atteint."""
+    events = events[
+        (events["period"] < SHOOTOUT_PERIOD)
+        & (events["team"] == events["possession_team"])
+        & events["x"].notna()
+    ]
+    starts = pd.DataFrame({
+        "match_id": events["match_id"].to_numpy(),
+        "possession": events["possession"].to_numpy(),
+        "order": np.arange(len(events), dtype=float),
+        "x": events["x"].to_numpy(),
+        "y": events["y"].to_numpy(),
+    })
+    # Dernier point : arrivée de la dernière passe/conduite (position du tir pour un tir)
+    last = events.groupby(["match_id", "possession"]).tail(1)
+    is_shot = (last["type"] == "Shot").to_numpy()
+    reach = pd.DataFrame({
+        "match_id": last["match_id"].to_numpy(),
+        "possession": last["possession"].to_numpy(),
+        "order": np.flatnonzero(events.index.isin(last.index)) + 0.5,
+        "x": np.where(is_shot, last["x"], last["end_x"].fillna(last["x"])),
+        "y": np.where(is_shot, last["y"], last["end_y"].fillna(last["y"])),
+    })
+    points = pd.concat([starts, reach], ignore_index=True)
+    return points.sort_values(["match_id", "possession", "order"]).reset_index(drop=True)
+
+
+def resample_paths(points: pd.DataFrame, n_points: int = N_PATH_POINTS):
+    """Rééchantillonne le trajet de chaque possession en `n_points` points, sans boucle sur les possessions.
+
+    L'abscisse curviligne est normalisée dans [0, 1] par possession puis décalée de 2 × numéro de groupe :
+    une seule recherche dichotomique sur le tableau global trouve alors le segment de chaque point cible.
+    """
+    groups = points.groupby(["match_id", "possession"], sort=False).ngroup().to_numpy()
+    x, y = points["x"].to_numpy(), points["y"].to_numpy()
+    same_group = np.r_[False, groups[1:] == groups[:-1]]
+    step = np.where(same_group, np.hypot(np.diff(x, prepend=x[0]), np.diff(y, prepend=y[0])), 0.0)
+    arc = pd.Series(step).groupby(groups).cumsum().to_numpy()
+    total = pd.Series(arc).groupby(groups).transform("max").to_numpy()
+    progress = np.divide(arc, total, out=np.zeros_like(arc), where=total > 0)
+    position = groups * 2.0 + progress
+
+    n_groups = groups.max() + 1 if len(groups) else 0
+    targets = (np.arange(n_groups)[:, None] * 2.0 + np.linspace(0, 1, n_points)[None, :]).ravel()
+    group_first = np.searchsorted(groups, np.arange(n_groups))
+    group_last = np.r_[group_first[1:], len(groups)] - 1
+    right = np.searchsorted(position, targets, side="left")
+    right = np.clip(right, np.repeat(group_first, n_points), np.repeat(group_last, n_points))
+    left = np.maximum(right - 1, np.repeat(group_first, n_points))
+    span = position[right] - position[left]
+    weight = np.divide(targets - position[left], span, out=np.zeros_like(span), where=span > 0).clip(0, 1)
+    path_x = x[left] + weight * (x[right] - x[left])
+    path_y = y[left] + weight * (y[right] - y[left])
+    keys = points.iloc[group_first][["match_id", "possession"]].reset_index(drop=True)
+    paths = np.stack([path_x, path_y], axis=-1).reshape(n_groups, n_points, 2).astype(np.float32)
+    return keys, paths
+
+
+def encode_possessions(chains: pd.DataFrame, paths: np.ndarray) -> np.ndarray:
+    """Construit la matrice (contiguë, float32) des vecteurs : trajet normalisé puis résumé centré-réduit."""
+    path_part = (paths / np.array([120.0, 80.0], dtype=np.float32)).reshape(len(paths), -1)
+    summary = chains[SUMMARY_COLUMNS].fillna(0).to_numpy(dtype=float)
+    std = summary.std(axis=0)
+    summary = (summary - summary.mean(axis=0)) / np.where(std > 0, std, 1)
+    # Variance totale du résumé = SUMMARY_WEIGHT × variance totale du trajet
+    summary = summary * np.sqrt(SUMMARY_WEIGHT * path_part.var(axis=0).sum() / len(SUMMARY_COLUMNS))
+    return np.ascontiguousarray(np.hstack([path_part, summary]), dtype=np.float32)
+
+
+def build_possession_index(events: pd.DataFrame, chains: pd.DataFrame) -> dict:
+    """Construit l'index : métadonnées des possessions, trajets rééchantillonnés, vecteurs et normes."""
+    keys, paths = resample_paths(get_ball_points(events))
+    chains = keys.merge(chains[CHAIN_COLUMNS], on=["match_id", "possession"], how="left")
+    vectors = encode_possessions(chains, paths)
+    return {
+        "chains": chains,
+        "paths": paths,
+        "vectors": vectors,
+        "norms": (vectors ** 2).sum(axis=1),
+    }
+
+
+@st.cache_data(persist="disk")
+def load_possession_index(competition_id: int, season_id: int) -> dict:
+    """Construit (et persiste) l'index de recherche des possessions d'une saison."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        chains = load_season_possession_chains(competition_id, season_id)
+        if events.empty or chains.empty:
+            return {}
+        return build_possession_index(events, chains)
+    except Exception as e:
+        st.error(f"Erreur lors de la construction de l'index des possessions : {e}")
+        return {}
+
+
+def find_similar_possessions(index: dict, match_id: int, possession: int, k: int = 20, exclude_match: bool = False) -> pd.DataFrame:
+    """Retourne les `k` possessions les plus proches (distance euclidienne) d'une possession de l'index."""
+    chains = index["chains"]
+    match = np.flatnonzero((chains["match_id"] == match_id).to_numpy() & (chains["possession"] == possession).to_numpy())
+    if len(match) == 0:
+        return pd.DataFrame()
+    row = match[0]
+    # ‖a − q‖² = ‖a‖² − 2 a·q + ‖q‖² : un seul produit matrice-vecteur sur la matrice contiguë
+    distances = index["norms"] - 2 * (index["vectors"] @ index["vectors"][row]) + index["norms"][row]
+    distances[row] = np.inf
+    if exclude_match:
+        distances[(chains["match_id"] == match_id).to_numpy()] = np.inf
+    k = min(k, int(np.isfinite(distances).sum()))
+    if k == 0:
+        return pd.DataFrame()
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.argsort(distances[nearest])]
+    return chains.iloc[nearest].assign(
+        distance=np.sqrt(np.maximum(distances[nearest], 0)),
+        row=nearest,
+    ).reset_index(drop=True)
+
+
+def get_possession_path(index: dict, row: int) -> np.ndarray:
+    """Retourne le trajet rééchantillonné (points x, y) d'une possession de l'index."""
+    return index["paths"][row]
@@ -0,0 +1,45 @@
+#progression
+import pandas as pd
+import numpy as np
+
+from utils.passes import goal_progress
+
+# -----------------------------
+# ACTIONS PROGRESSIVES
+# -----------------------------
+
+# Seuils usuels (en mètres) convertis en yards, l'unité StatsBomb
+YARDS_PER_METRE = 1.0936
+OWN_HALF_MIN_PROGRESS = 30 * YARDS_PER_METRE
+CROSS_HALF_MIN_PROGRESS = 15 * YARDS_PER_METRE
+OPPONENT_HALF_MIN_PROGRESS = 10 * YARDS_PER_METRE
+
+HALFWAY_X = 60.0
+
+
+def get_progress_threshold(x: pd.Series, end_x: pd.Series) -> np.ndarray:
+    """Distance minimale à gagner selon les moitiés de terrain de départ et d'arrivée."""
+    start_own = x < HALFWAY_X
+    end_own = end_x < HALFWAY_X
+    return np.select(
+        [start_own & end_own, start_own & ~end_own],
+        [OWN_HALF_MIN_PROGRESS, CROSS_HALF_MIN_PROGRESS],
+        default=OPPONENT_HALF_MIN_PROGRESS,
+    )
+
+
+def add_progression(events: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute la distance gagnée vers le but et les indicateurs de passes, conduites et réceptions progressives."""
+    is_pass = events["type"] == "Pass"
+    is_carry = events["type"] == "Carry"
+    progress = goal_progress(events["x"], events["y"], events["end_x"], events["end_y"])
+    is_progressive = progress >= get_progress_threshold(events["x"], events["end_x"])
+
+    events["progress_distance"] = progress.where(is_pass | is_carry)
+    events["progressive_pass"] = is_pass & events["pass_outcome"].isna() & is_progressive
+    events["progressive_carry"] = is_carry & is_progressive
+
+    # Réception progressive : la réception liée (related_events) à une passe progressive
+    related = events.loc[events["progressive_pass"], "related_events"].explode().dropna()
+    events["progressive_reception"] = (events["type"] == "Ball Receipt*") & events["id"].isin(related)
+    return events
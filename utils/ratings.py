@@ -0,0 +1,145 @@
+#ratings
+import threading
+
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_matches, MATCHES_TTL
+
+# -----------------------------
+# CLASSEMENT ELO DES ÉQUIPES
+# -----------------------------
+
+ELO_START = 1500.0
+ELO_K = 20.0
+
+# Avantage du terrain, en points Elo, ajouté à l'équipe qui reçoit
+HOME_ADVANTAGE = 60.0
+
+# L'état Elo est partagé entre les sessions : ses mises à jour sont sérialisées
+_STATE_LOCK = threading.Lock()
+
+OPPONENT_TIERS = ["Haut de tableau", "Milieu de tableau", "Bas de tableau"]
+
+HISTORY_COLUMNS = [
+    "match_id", "match_date", "home_team", "away_team", "home_score", "away_score",
+    "home_rating_before", "away_rating_before", "home_expected", "home_rating_after", "away_rating_after",
+]
+
+
+def new_rating_state() -> dict:
+    """Crée un état Elo vide : notes courantes, matchs déjà traités et historique."""
+    return {"ratings": {}, "processed": set(), "last_date": None, "history": []}
+
+
+def sort_matches(matches: pd.DataFrame) -> pd.DataFrame:
+    """Ordonne les matchs chronologiquement (date puis heure du coup d'envoi)."""
+    columns = [column for column in ["match_date", "kick_off", "match_id"] if column in matches.columns]
+    return matches.sort_values(columns, kind="stable")
+
+
+def goal_difference_multiplier(goal_difference: int) -> float:
+    """Multiplicateur de K selon l'écart de buts (formule du World Football Elo)."""
+    if goal_difference <= 1:
+        return 1.0
+    if goal_difference == 2:
+        return 1.5
+    return (11 + goal_difference) / 8
+
+
+def update_ratings(state: dict, matches: pd.DataFrame) -> dict:
+    """Met à jour l'état Elo avec les seuls matchs joués pas encore traités.
+
+    Si un nouveau match est antérieur au dernier match traité, l'état est vidé sur place puis recalculé
+    depuis le début : l'objet en cache reste celui qui est mis à jour.
+    """
+    played = matches[matches["home_score"].notna() & matches["away_score"].notna()]
+    new_matches = sort_matches(played[~played["match_id"].isin(state["processed"])])
+    if new_matches.empty:
+        return state
+    if state["last_date"] is not None and new_matches["match_date"].iloc[0] < state["last_date"]:
+        state.clear()
+        state.update(new_rating_state())
+        return update_ratings(state, matches)
+
+    ratings = state["ratings"]
+    for match in new_matches.itertuples(index=False):
+        home_before = ratings.get(match.home_team, ELO_START)
+        away_before = ratings.get(match.away_team, ELO_START)
+        home_expected = 1 / (1 + 10 ** ((away_before - home_before - HOME_ADVANTAGE) / 400))
+        home_result = 1.0 if match.home_score > match.away_score else 0.5 if match.home_score == match.away_score else 0.0
+        change = ELO_K * goal_difference_multiplier(abs(int(match.home_score - match.away_score))) * (home_result - home_expected)
+        ratings[match.home_team] = home_before + change
+        ratings[match.away_team] = away_before - change
+        state["history"].append((
+            match.match_id, match.match_date, match.home_team, match.away_team, match.home_score, match.away_score,
+            home_before, away_before, home_expected, ratings[match.home_team], ratings[match.away_team],
+        ))
+        state["processed"].add(match.match_id)
+    state["last_date"] = new_matches["match_date"].iloc[-1]
+    return state
+
+
+@st.cache_resource
+def get_rating_state(competition_id: int, season_id: int) -> dict:
+    """Retourne l'état Elo (mutable) partagé d'une compétition/saison."""
+    return new_rating_state()
+
+
+def assign_tiers(ratings: pd.Series) -> pd.Series:
+    """Répartit les équipes en trois niveaux selon leur note Elo."""
+    if ratings.empty:
+        return pd.Series(dtype=object)
+    rank = ratings.rank(ascending=False, method="first")
+    tier = np.minimum(((rank - 1) * len(OPPONENT_TIERS) // len(ratings)).astype(int), len(OPPONENT_TIERS) - 1)
+    return pd.Series(np.array(OPPONENT_TIERS)[tier], index=ratings.index)
+
+
+def build_opponent_table(history: pd.DataFrame, tiers: pd.Series) -> pd.DataFrame:
+    """Table de jointure (match, équipe) → adversaire, note de l'adversaire avant le match et niveau."""
+    sides = []
+    for side, opponent in [("home", "away"), ("away", "home")]:
+        sides.append(pd.DataFrame({
+            "match_id": history["match_id"],
+            "team": history[f"{side}_team"],
+            "opponent": history[f"{opponent}_team"],
+            "is_home": side == "home",
+            "team_rating": history[f"{side}_rating_before"],
+            "opponent_rating": history[f"{opponent}_rating_before"],
+        }))
+    table = pd.concat(sides, ignore_index=True)
+    table["opponent_tier"] = pd.Categorical(table["opponent"].map(tiers), categories=OPPONENT_TIERS)
+    return table
+
+
+@st.cache_data(ttl=MATCHES_TTL)
+def load_team_ratings(competition_id: int, season_id: int):
+    """Retourne le classement Elo, l'historique des notes et la table des adversaires d'une saison."""
+    try:
+        matches = load_matches(competition_id, season_id)
+        if matches.empty:
+            return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+        with _STATE_LOCK:
+            state = update_ratings(get_rating_state(competition_id, season_id), matches)
+            history = pd.DataFrame(state["history"], columns=HISTORY_COLUMNS)
+            ratings = pd.Series(state["ratings"], name="rating").sort_values(ascending=False)
+
+        tiers = assign_tiers(ratings)
+        table = ratings.rename_axis("team").reset_index()
+        table["tier"] = table["team"].map(tiers)
+        return table, history, build_opponent_table(history, tiers)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des notes Elo : {e}")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+
+def get_rating_timeline(history: pd.DataFrame, team_name: str) -> pd.DataFrame:
+    """Retourne l'évolution de la note Elo d'une équipe, match après match."""
+    home = history[history["home_team"] == team_name]
+    away = history[history["away_team"] == team_name]
+    timeline = pd.concat([
+        pd.DataFrame({"match_date": home["match_date"], "opponent": home["away_team"], "rating": home["home_rating_after"]}),
+        pd.DataFrame({"match_date": away["match_date"], "opponent": away["home_team"], "rating": away["away_rating_after"]}),
+    ])
+    return timeline.sort_index().reset_index(drop=True)
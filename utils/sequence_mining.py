@@ -0,0 +1,209 @@
+#sequence_mining
+import threading
+
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_matches, load_normalized_events, SHOOTOUT_PERIOD
+from utils.zones import THIRDS, CHANNELS
+
+# -----------------------------
+# ENCHAÎNEMENTS FRÉQUENTS (N-GRAMMES DE POSSESSION)
+# -----------------------------
+
+# Postes StatsBomb → rôle abrégé
+POSITION_ROLES = {
+    "Goalkeeper": "GK",
+    "Right Back": "RB", "Right Wing Back": "RB",
+    "Left Back": "LB", "Left Wing Back": "LB",
+    "Right Center Back": "CB", "Center Back": "CB", "Left Center Back": "CB",
+    "Right Defensive Midfield": "DM", "Center Defensive Midfield": "DM", "Left Defensive Midfield": "DM",
+    "Right Center Midfield": "CM", "Center Midfield": "CM", "Left Center Midfield": "CM",
+    "Right Midfield": "RM", "Left Midfield": "LM",
+    "Right Attacking Midfield": "AM", "Center Attacking Midfield": "AM", "Left Attacking Midfield": "AM",
+    "Right Wing": "RW", "Left Wing": "LW",
+    "Right Center Forward": "ST", "Striker": "ST", "Left Center Forward": "ST", "Secondary Striker": "ST",
+}
+ROLES = list(dict.fromkeys(POSITION_ROLES.values())) + ["?"]
+
+# Zones : tiers × couloir (identifiants calculés à la normalisation)
+ZONE_TOKENS = [f"{third} · {channel}" for third in THIRDS for channel in CHANNELS] + ["?"]
+
+TOKEN_MODES = {"Poste": ROLES, "Zone": ZONE_TOKENS}
+
+# Actions retenues ; la passe simple n'est pas écrite (« CB → DM → RW centre »)
+ACTIONS = ["passe", "centre", "conduite", "dribble", "tir"]
+
+MIN_NGRAM, MAX_NGRAM = 2, 4
+# Chaque jeton occupe 8 bits de la clé ; l'équipe occupe les bits au-dessus des n-grammes
+TOKEN_BITS = 8
+TEAM_SHIFT = TOKEN_BITS * MAX_NGRAM
+
+# Count-min sketch : profondeur × largeur compteurs (taille fixe quel que soit le volume)
+SKETCH_DEPTH = 4
+SKETCH_WIDTH_BITS = 18
+# Nombre maximal de n-grammes candidats conservés par équipe et par longueur
+TOP_CAPACITY = 200
+
+# L'état de comptage est partagé entre les sessions : ses mises à jour sont sérialisées
+_STATE_LOCK = threading.Lock()
+
+_HASH_MULTIPLIERS = (np.random.default_rng(2024).integers(1, 2 ** 62, size=SKETCH_DEPTH, dtype=np.int64) * 2 + 1).astype(np.uint64)
+
+
+def new_sequence_state() -> dict:
+    """Crée un état vide : sketch de comptage, candidats par équipe, équipes et matchs traités."""
+    return {
+        "sketch": np.zeros((SKETCH_DEPTH, 2 ** SKETCH_WIDTH_BITS), dtype=np.int32),
+        "candidates": np.empty(0, dtype=np.int64),
+        "teams": {},
+        "team_matches": {},
+        "processed": set(),
+    }
+
+
+def get_action_ids(events: pd.DataFrame) -> np.ndarray:
+    """Retourne l'identifiant d'action de chaque événement (-1 s'il n'entre pas dans les séquences)."""
+    is_pass = events["type"] == "Pass"
+    return np.select(
+        [
+            is_pass & events["pass_cross"].eq(True),
+            is_pass,
+            events["progressive_carry"],
+            (events["type"] == "Dribble") & (events["dribble_outcome"] == "Complete"),
+            events["type"] == "Shot",
+        ],
+        [ACTIONS.index(action) for action in ["centre", "passe", "conduite", "dribble", "tir"]],
+        default=-1,
+    )
+
+
+def get_place_ids(events: pd.DataFrame, token_mode: str) -> np.ndarray:
+    """Retourne l'identifiant du lieu de chaque action : rôle du joueur ou zone (tiers × couloir)."""
+    if token_mode == "Poste":
+        roles = events["position"].map(POSITION_ROLES).fillna("?")
+        return pd.Categorical(roles, categories=ROLES).codes
+    zone = events["third"].to_numpy(dtype=np.int64) * len(CHANNELS) + events["channel"].to_numpy(dtype=np.int64)
+    return np.where(events["third"].to_numpy() >= 0, zone, len(ZONE_TOKENS) - 1)
+
+
+def extract_ngrams(events: pd.DataFrame, token_mode: str) -> pd.DataFrame:
+    """Découpe chaque possession en jetons (lieu, action) et retourne les n-grammes encodés en entiers."""
+    events = events[(events["period"] < SHOOTOUT_PERIOD) & (events["team"] == events["possession_team"])]
+    actions = get_action_ids(events)
+    events, actions = events[actions >= 0], actions[actions >= 0]
+    tokens = get_place_ids(events, token_mode).astype(np.int64) * len(ACTIONS) + actions
+    possession = events["possession"].to_numpy()
+    teams = events["team"].to_numpy()
+
+    frames = []
+    for length in range(MIN_NGRAM, MAX_NGRAM + 1):
+        starts = np.arange(len(tokens) - length + 1)
+        # Fenêtre glissante restreinte à une seule possession (événements contigus)
+        valid = possession[starts] == possession[starts + length - 1]
+        starts = starts[valid]
+        keys = np.zeros(len(starts), dtype=np.int64)
+        for offset in range(length):
+            keys |= (tokens[starts + offset] + 1) << (TOKEN_BITS * offset)
+        frames.append(pd.DataFrame({"team": teams[starts], "key": keys}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_sketch_columns(keys: np.ndarray) -> np.ndarray:
+    """Hachage multiplicatif des clés : une colonne du sketch par ligne de profondeur."""
+    keys = keys.astype(np.uint64)
+    return np.stack([(keys * multiplier) >> np.uint64(64 - SKETCH_WIDTH_BITS) for multiplier in _HASH_MULTIPLIERS]).astype(np.int64)
+
+
+def get_ngram_lengths(keys: np.ndarray) -> np.ndarray:
+    """Longueur de chaque n-gramme encodé (nombre de jetons non vides)."""
+    lengths = np.zeros(len(keys), dtype=int)
+    for offset in range(MAX_NGRAM):
+        lengths += ((keys >> (TOKEN_BITS * offset)) & (2 ** TOKEN_BITS - 1)) > 0
+    return lengths
+
+
+def query_sketch(state: dict, keys: np.ndarray) -> np.ndarray:
+    """Estimation (par excès) du nombre d'occurrences de chaque clé : minimum sur les lignes du sketch."""
+    columns = get_sketch_columns(keys)
+    return state["sketch"][np.arange(SKETCH_DEPTH)[:, None], columns].min(axis=0)
+
+
+def add_match_to_state(state: dict, match_id: int, events: pd.DataFrame, token_mode: str) -> dict:
+    """Ajoute les n-grammes d'un match au sketch puis ne garde que les meilleurs candidats de chaque équipe."""
+    if match_id in state["processed"]:
+        return state
+    ngrams = extract_ngrams(events, token_mode)
+    for team in events["team"].dropna().unique():
+        state["teams"].setdefault(team, len(state["teams"]))
+        state["team_matches"][team] = state["team_matches"].get(team, 0) + 1
+    keys = ngrams["key"].to_numpy() | (ngrams["team"].map(state["teams"]).to_numpy(dtype=np.int64) << TEAM_SHIFT)
+
+    columns = get_sketch_columns(keys)
+    for depth in range(SKETCH_DEPTH):
+        state["sketch"][depth] += np.bincount(columns[depth], minlength=state["sketch"].shape[1]).astype(np.int32)
+
+    # Candidats : anciens et nouveaux n-grammes, réévalués puis bornés à TOP_CAPACITY par équipe et longueur
+    candidates = np.union1d(state["candidates"], keys)
+    ranked = pd.DataFrame({
+        "team": candidates >> TEAM_SHIFT,
+        "length": get_ngram_lengths(candidates),
+        "key": candidates,
+        "count": query_sketch(state, candidates),
+    }).sort_values("count", ascending=False, kind="stable")
+    state["candidates"] = ranked.groupby(["team", "length"]).head(TOP_CAPACITY)["key"].to_numpy()
+    state["processed"].add(match_id)
+    return state
+
+
+@st.cache_resource
+def get_sequence_state(competition_id: int, season_id: int, token_mode: str) -> dict:
+    """Retourne l'état de comptage (mutable) partagé d'une compétition/saison et d'un type de jeton."""
+    return new_sequence_state()
+
+
+def load_sequence_state(competition_id: int, season_id: int, token_mode: str = "Poste") -> dict:
+    """Traite, match par match, ceux qui ne sont pas encore dans l'état et retourne celui-ci."""
+    state = get_sequence_state(competition_id, season_id, token_mode)
+    try:
+        matches = load_matches(competition_id, season_id)
+        for match_id in matches["match_id"]:
+            if match_id not in state["processed"]:
+                events = load_normalized_events(match_id)
+                if not events.empty:
+                    # Le match est revérifié sous le verrou : une autre session a pu l'ajouter entre-temps
+                    with _STATE_LOCK:
+                        add_match_to_state(state, match_id, events, token_mode)
+    except Exception as e:
+        st.error(f"Erreur lors du comptage des enchaînements : {e}")
+    return state
+
+
+def decode_key(key: int, token_mode: str) -> str:
+    """Retrouve le libellé d'un n-gramme à partir de sa clé (« CB → DM → RW centre »)."""
+    places = TOKEN_MODES[token_mode]
+    labels = []
+    for offset in range(MAX_NGRAM):
+        token = (int(key) >> (TOKEN_BITS * offset)) & (2 ** TOKEN_BITS - 1)
+        if token == 0:
+            break
+        place, action = divmod(token - 1, len(ACTIONS))
+        labels.append(places[place] if ACTIONS[action] == "passe" else f"{places[place]} {ACTIONS[action]}")
+    return " → ".join(labels)
+
+
+def get_top_sequences(state: dict, team_name: str, token_mode: str, length: int = None, k: int = 20) -> pd.DataFrame:
+    """Retourne les `k` enchaînements les plus fréquents d'une équipe (optionnellement d'une longueur donnée)."""
+    columns = ["sequence", "length", "count", "per_match"]
+    if team_name not in state["teams"]:
+        return pd.DataFrame(columns=columns)
+    candidates = state["candidates"][(state["candidates"] >> TEAM_SHIFT) == state["teams"][team_name]]
+    ngram_keys = candidates & ((1 << TEAM_SHIFT) - 1)
+    top = pd.DataFrame({"key": ngram_keys, "length": get_ngram_lengths(ngram_keys), "count": query_sketch(state, candidates)})
+    if length is not None:
+        top = top[top["length"] == length]
+    top = top.nlargest(k, "count")
+    top["sequence"] = [decode_key(key, token_mode) for key in top["key"]]
+    top["per_match"] = top["count"] / state["team_matches"][team_name]
+    return top[columns].reset_index(drop=True)
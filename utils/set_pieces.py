@@ -0,0 +1,165 @@
+#set_pieces
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events, SHOOTOUT_PERIOD
+from utils.possession import load_season_possession_chains
+from utils.defensive import get_opponents
+from utils.passes import in_box
+
+# -----------------------------
+# COUPS DE PIED ARRÊTÉS
+# -----------------------------
+
+# Type de phase arrêtée : motif de jeu de la possession → libellé, et type de passe de la remise en jeu
+SET_PIECE_PATTERNS = {"From Corner": "Corner", "From Free Kick": "Coup franc", "From Throw In": "Touche"}
+SET_PIECE_PASS_TYPES = {"Corner": "Corner", "Free Kick": "Coup franc", "Throw-in": "Touche"}
+SET_PIECES = list(SET_PIECE_PATTERNS.values())
+
+# Zones d'arrivée du ballon, dans le repère de l'équipe qui tire (poteaux relatifs au côté du tireur)
+DELIVERY_ZONES = [
+    "Premier poteau", "Devant le but", "Second poteau", "Point de penalty",
+    "Entrée de surface", "Jouée courte", "Hors surface",
+]
+SIX_YARD_X, PENALTY_SPOT_X = 114.0, 108.0
+NEAR_POST_Y, FAR_POST_Y = 36.0, 44.0
+SHORT_DELIVERY_MAX = 20.0
+
+FIRST_CONTACTS = ["Tir direct", "Premier contact offensif", "Premier contact défensif", "Aucun contact"]
+
+# Événements qui constituent une prise de balle (pressions et réceptions manquées exclues)
+CONTACT_TYPES = [
+    "Ball Receipt*", "Shot", "Pass", "Carry", "Clearance", "Goal Keeper", "Interception",
+    "Duel", "Block", "Ball Recovery", "Miscontrol", "Dribble",
+]
+
+DELIVERY_COLUMNS = [
+    "match_id", "possession", "team", "opponent", "set_piece", "side", "player",
+    "x", "y", "end_x", "end_y", "delivery_zone", "first_contact",
+    "shots", "goals", "xg", "outcome",
+]
+
+
+def get_delivery_zones(deliveries: pd.DataFrame) -> np.ndarray:
+    """Classe le point d'arrivée de chaque remise en jeu dans une zone (indice dans DELIVERY_ZONES)."""
+    end_x, end_y = deliveries["end_x"], deliveries["end_y"]
+    # Distance au côté du tireur : le premier poteau est toujours du côté du ballon
+    side_y = np.where(deliveries["y"] < 40, end_y, 80 - end_y)
+    box = in_box(end_x, end_y)
+    deep = box & (end_x >= PENALTY_SPOT_X)
+    central = (end_y >= 30) & (end_y <= 50)
+    distance = np.hypot(end_x - deliveries["x"], end_y - deliveries["y"])
+    zone = np.select(
+        [
+            deep & (side_y < NEAR_POST_Y),
+            deep & (side_y > FAR_POST_Y),
+            box & (end_x >= SIX_YARD_X),
+            deep & central,
+            box,
+            distance < SHORT_DELIVERY_MAX,
+        ],
+        [DELIVERY_ZONES.index(zone) for zone in [
+            "Premier poteau", "Second poteau", "Devant le but", "Point de penalty", "Entrée de surface", "Jouée courte",
+        ]],
+        default=DELIVERY_ZONES.index("Hors surface"),
+    )
+    return np.where(end_x.isna(), DELIVERY_ZONES.index("Hors surface"), zone)
+
+
+def get_first_contacts(events: pd.DataFrame, delivery_rows: np.ndarray) -> np.ndarray:
+    """Qualifie le premier contact après chaque remise en jeu (recherche dichotomique, sans boucle)."""
+    is_contact = events["type"].isin(CONTACT_TYPES) & ~(
+        (events["type"] == "Ball Receipt*") & events["ball_receipt_outcome"].notna()
+    )
+    contact_rows = np.flatnonzero(is_contact.to_numpy())
+    position = np.searchsorted(contact_rows, delivery_rows, side="right")
+    found = position < len(contact_rows)
+    next_rows = contact_rows[np.minimum(position, len(contact_rows) - 1)]
+
+    match = events["match_id"].to_numpy()
+    period = events["period"].to_numpy()
+    team = events["team"].to_numpy()
+    event_type = events["type"].to_numpy()
+    found &= (match[next_rows] == match[delivery_rows]) & (period[next_rows] == period[delivery_rows])
+    same_team = team[next_rows] == team[delivery_rows]
+    # Un coup franc tiré directement est lui-même le tir
+    direct = event_type[delivery_rows] == "Shot"
+    return np.select(
+        [direct, found & same_team & (event_type[next_rows] == "Shot"), found & same_team, found],
+        ["Tir direct", "Tir direct", "Premier contact offensif", "Premier contact défensif"],
+        default="Aucun contact",
+    )
+
+
+def build_delivery_table(events: pd.DataFrame, chains: pd.DataFrame) -> pd.DataFrame:
+    """Indexe la remise en jeu de chaque possession arrêtée avec sa zone d'arrivée, son premier contact et son issue."""
+    events = events[events["period"] < SHOOTOUT_PERIOD].reset_index(drop=True)
+    is_delivery = (
+        ((events["type"] == "Pass") & events["pass_type"].isin(SET_PIECE_PASS_TYPES))
+        | ((events["type"] == "Shot") & (events["shot_type"] == "Free Kick"))
+    ) & events["play_pattern"].isin(SET_PIECE_PATTERNS)
+    # Une seule remise en jeu par possession : la première
+    first = events[is_delivery].drop_duplicates(["match_id", "possession"])
+    rows = first.index.to_numpy()
+
+    deliveries = pd.DataFrame({
+        "match_id": first["match_id"].to_numpy(),
+        "possession": first["possession"].to_numpy(),
+        "team": first["team"].to_numpy(),
+        "opponent": get_opponents(events).to_numpy()[rows],
+        "set_piece": first["play_pattern"].map(SET_PIECE_PATTERNS).to_numpy(),
+        "side": np.where(first["y"] < 40, "Gauche", "Droite"),
+        "player": first["player"].to_numpy(),
+        "x": first["x"].to_numpy(),
+        "y": first["y"].to_numpy(),
+        "end_x": first["end_x"].to_numpy(),
+        "end_y": first["end_y"].to_numpy(),
+    })
+    deliveries["delivery_zone"] = pd.Categorical.from_codes(get_delivery_zones(deliveries), categories=DELIVERY_ZONES)
+    deliveries["first_contact"] = pd.Categorical(get_first_contacts(events, rows), categories=FIRST_CONTACTS)
+
+    outcomes = chains[["match_id", "possession", "shots", "goals", "xg", "outcome"]]
+    deliveries = deliveries.merge(outcomes, on=["match_id", "possession"], how="left")
+    deliveries[["shots", "goals", "xg"]] = deliveries[["shots", "goals", "xg"]].fillna(0)
+    return deliveries[DELIVERY_COLUMNS].sort_values(["team", "set_piece", "match_id", "possession"]).reset_index(drop=True)
+
+
+def summarize_set_pieces(deliveries: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """Retourne, par équipe et type de phase arrêtée, volumes, tirs, buts et xG obtenus et concédés."""
+    matches = events.groupby("team")["match_id"].nunique()
+    keys = ["set_piece"]
+    generated = deliveries.groupby(["team"] + keys, observed=True).agg(
+        count=("possession", "size"), shots=("shots", "sum"), goals=("goals", "sum"), xg=("xg", "sum")
+    )
+    conceded = deliveries.groupby(["opponent"] + keys, observed=True).agg(
+        count_against=("possession", "size"), shots_against=("shots", "sum"),
+        goals_against=("goals", "sum"), xg_against=("xg", "sum"),
+    ).rename_axis(["team"] + keys)
+    summary = generated.join(conceded, how="outer").fillna(0).reset_index()
+    summary["matches"] = summary["team"].map(matches)
+    summary["per_match"] = summary["count"] / summary["matches"]
+    summary["xg_per_set_piece"] = summary["xg"] / summary["count"].replace(0, np.nan)
+    summary["xg_against_per_set_piece"] = summary["xg_against"] / summary["count_against"].replace(0, np.nan)
+    return summary
+
+
+@st.cache_data(persist="disk")
+def load_set_piece_tables(competition_id: int, season_id: int):
+    """Calcule (et persiste) la table des remises en jeu et le résumé par équipe d'une saison."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        chains = load_season_possession_chains(competition_id, season_id)
+        if events.empty or chains.empty:
+            return pd.DataFrame(columns=DELIVERY_COLUMNS), pd.DataFrame()
+        deliveries = build_delivery_table(events, chains)
+        return deliveries, summarize_set_pieces(deliveries, events)
+    except Exception as e:
+        st.error(f"Erreur lors de l'analyse des coups de pied arrêtés : {e}")
+        return pd.DataFrame(columns=DELIVERY_COLUMNS), pd.DataFrame()
+
+
+def get_team_set_pieces(deliveries: pd.DataFrame, team_name: str, set_piece: str, against: bool = False) -> pd.DataFrame:
+    """Retourne les remises en jeu d'une équipe (ou de ses adversaires) pour un type de phase arrêtée."""
+    side = "opponent" if against else "team"
+    return deliveries[(deliveries[side] == team_name) & (deliveries["set_piece"] == set_piece)]
@@ -0,0 +1,67 @@
+#shots
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events, SHOOTOUT_PERIOD
+
+# -----------------------------
+# TIRS ET xG
+# -----------------------------
+
+@st.cache_data(persist="disk")
+def load_season_shots(competition_id: int, season_id: int):
+    """Extrait une seule fois par saison tous les tirs sous forme de colonnes compactes."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return pd.DataFrame()
+        # Les tirs au but ne sont pas des occasions de match
+        shots = events[(events["type"] == "Shot") & (events["period"] < SHOOTOUT_PERIOD)]
+        return pd.DataFrame({
+            "id": shots["id"].to_numpy(),
+            "match_id": shots["match_id"].to_numpy(),
+            "team": shots["team"].astype("category").to_numpy(),
+            "player_id": shots["player_id"].to_numpy(dtype=float),
+            "player": shots["player"].astype("category").to_numpy(),
+            "period": shots["period"].to_numpy(dtype=np.int8),
+            "minute": (shots["match_seconds"] / 60).to_numpy(dtype=np.float32),
+            "x": shots["x"].to_numpy(dtype=np.float32),
+            "y": shots["y"].to_numpy(dtype=np.float32),
+            "xg": shots["shot_statsbomb_xg"].fillna(0).to_numpy(dtype=np.float32),
+            "outcome": shots["shot_outcome"].astype("category").to_numpy(),
+            "body_part": shots["shot_body_part"].astype("category").to_numpy(),
+            "shot_type": shots["shot_type"].astype("category").to_numpy(),
+            "is_goal": (shots["shot_outcome"] == "Goal").to_numpy(),
+        })
+    except Exception as e:
+        st.error(f"Erreur lors de l'extraction des tirs : {e}")
+        return pd.DataFrame()
+
+
+def build_xg_timeline(shots: pd.DataFrame, match_id: int, teams) -> pd.DataFrame:
+    """Construit les courbes en escalier de l'xG cumulé de chaque équipe pour un match."""
+    match_shots = shots[shots["match_id"] == match_id].sort_values("minute")
+    end_minute = max(90.0, float(match_shots["minute"].max()) if not match_shots.empty else 90.0)
+    frames = []
+    for team in teams:
+        team_shots = match_shots[match_shots["team"] == team]
+        frames.append(pd.DataFrame({
+            "team": team,
+            "minute": np.concatenate([[0.0], team_shots["minute"].to_numpy(), [end_minute]]),
+            "cumulative_xg": np.concatenate([[0.0], team_shots["xg"].cumsum().to_numpy(), [team_shots["xg"].sum()]]),
+            "is_goal": np.concatenate([[False], team_shots["is_goal"].to_numpy(), [False]]),
+            "player": np.concatenate([[None], team_shots["player"].astype(object).to_numpy(), [None]]),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize_team_xg(shots: pd.DataFrame) -> pd.DataFrame:
+    """Retourne les tirs, buts et xG de chaque équipe pour chaque match."""
+    if shots.empty:
+        return pd.DataFrame(columns=["match_id", "team", "shots", "goals", "xg"])
+    return (
+        shots.groupby(["match_id", "team"], observed=True)
+        .agg(shots=("xg", "size"), goals=("is_goal", "sum"), xg=("xg", "sum"))
+        .reset_index()
+    )
@@ -0,0 +1,91 @@
+#similarity
+import threading
+
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.percentiles import MIN_MINUTES, PER90_METRICS, load_player_season_table
+
+# -----------------------------
+# RECHERCHE DE JOUEURS SIMILAIRES
+# -----------------------------
+
+FEATURE_COLUMNS = [f"{metric}_p90" for metric in PER90_METRICS]
+
+PLAYER_COLUMNS = ["player_id", "player", "team", "position", "position_group", "minutes"]
+
+# L'index est partagé entre les sessions : ses mises à jour sont sérialisées
+_INDEX_LOCK = threading.Lock()
+
+
+def new_similarity_index() -> dict:
+    """Crée un index vide : saisons chargées, joueurs, vecteurs bruts et vecteurs normalisés."""
+    return {
+        "seasons": set(),
+        "players": pd.DataFrame(columns=PLAYER_COLUMNS + ["competition_id", "season_id"]),
+        "features": np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32),
+        "vectors": np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32),
+    }
+
+
+def normalize_features(features: np.ndarray) -> np.ndarray:
+    """Standardise chaque métrique sur l'ensemble de l'index puis ramène chaque vecteur à une norme unitaire."""
+    std = features.std(axis=0)
+    scaled = (features - features.mean(axis=0)) / np.where(std > 0, std, 1)
+    norms = np.linalg.norm(scaled, axis=1, keepdims=True)
+    return (scaled / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+
+def add_season_to_index(index: dict, players: pd.DataFrame, competition_id: int, season_id: int, min_minutes: float = MIN_MINUTES) -> dict:
+    """Ajoute les joueurs d'une saison à l'index (une seule fois par saison) et renormalise les vecteurs."""
+    if (competition_id, season_id) in index["seasons"] or players.empty:
+        return index
+    eligible = players[players["minutes"] >= min_minutes]
+    new_players = eligible[PLAYER_COLUMNS].assign(competition_id=competition_id, season_id=season_id)
+    index["players"] = pd.concat([index["players"], new_players], ignore_index=True)
+    index["features"] = np.vstack([index["features"], eligible[FEATURE_COLUMNS].fillna(0).to_numpy(dtype=np.float32)])
+    index["vectors"] = normalize_features(index["features"])
+    index["seasons"].add((competition_id, season_id))
+    return index
+
+
+@st.cache_resource
+def get_similarity_index() -> dict:
+    """Retourne l'index de similarité partagé, enrichi au fil des saisons chargées."""
+    return new_similarity_index()
+
+
+def load_similarity_index(competition_id: int, season_id: int) -> dict:
+    """Garantit que la saison est dans l'index partagé et retourne celui-ci."""
+    index = get_similarity_index()
+    if (competition_id, season_id) not in index["seasons"]:
+        players = load_player_season_table(competition_id, season_id)
+        # La saison est revérifiée sous le verrou : une autre session a pu l'ajouter entre-temps
+        with _INDEX_LOCK:
+            add_season_to_index(index, players, competition_id, season_id)
+    return index
+
+
+def find_similar_players(index: dict, player_id: float, competition_id: int, season_id: int, k: int = 10, same_position: bool = False) -> pd.DataFrame:
+    """Retourne les `k` joueurs les plus proches (similarité cosinus) d'un joueur de l'index."""
+    players = index["players"]
+    match = np.flatnonzero(
+        (players["player_id"] == player_id).to_numpy()
+        & (players["competition_id"] == competition_id).to_numpy()
+        & (players["season_id"] == season_id).to_numpy()
+    )
+    if len(match) == 0:
+        return pd.DataFrame()
+    row = match[0]
+    similarity = index["vectors"] @ index["vectors"][row]
+    similarity[row] = -np.inf
+    if same_position:
+        similarity[(players["position_group"] != players["position_group"].iloc[row]).to_numpy()] = -np.inf
+
+    k = min(k, int(np.isfinite(similarity).sum()))
+    if k == 0:
+        return pd.DataFrame()
+    top = np.argpartition(-similarity, k - 1)[:k]
+    top = top[np.argsort(-similarity[top])]
+    return players.iloc[top].assign(similarity=similarity[top] * 100).reset_index(drop=True)
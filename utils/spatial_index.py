@@ -0,0 +1,89 @@
+#spatial_index
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events
+from utils.zones import ZONE18_X_EDGES, ZONE18_Y_EDGES, N_ZONE18_COLUMNS
+
+# -----------------------------
+# INDEX SPATIAL PAR CASES
+# -----------------------------
+
+# Cases de 5 × 5 yards : 24 colonnes × 16 lignes sur le terrain StatsBomb (120 × 80)
+CELL_SIZE = 5.0
+N_CELL_COLUMNS, N_CELL_ROWS = int(120 / CELL_SIZE), int(80 / CELL_SIZE)
+
+
+def get_cells(x: np.ndarray, y: np.ndarray):
+    """Retourne colonne et ligne de case de chaque point (bornées au terrain)."""
+    column = np.clip((x // CELL_SIZE).astype(int), 0, N_CELL_COLUMNS - 1)
+    row = np.clip((y // CELL_SIZE).astype(int), 0, N_CELL_ROWS - 1)
+    return column, row
+
+
+def build_spatial_index(x: pd.Series, y: pd.Series) -> dict:
+    """Trie les lignes par case et calcule les décalages de début de chaque case.
+
+    Les lignes sans coordonnées ne sont pas indexées.
+    """
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    rows = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    column, row = get_cells(x[rows], y[rows])
+    cell = row * N_CELL_COLUMNS + column
+    order = np.argsort(cell, kind="stable")
+    offsets = np.zeros(N_CELL_COLUMNS * N_CELL_ROWS + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cell, minlength=N_CELL_COLUMNS * N_CELL_ROWS), out=offsets[1:])
+    return {
+        "rows": rows[order].astype(np.int32),
+        "x": x[rows][order],
+        "y": y[rows][order],
+        "offsets": offsets,
+    }
+
+
+def query_rectangle(index: dict, x_min: float, x_max: float, y_min: float, y_max: float, half_open: bool = False) -> np.ndarray:
+    """Retourne (triés) les indices de lignes dont le point est dans le rectangle, sans parcourir toute la table.
+
+    Avec `half_open`, les bords supérieurs sont exclus sauf en bord de terrain (même convention que les zones).
+    """
+    column_min, row_min = get_cells(np.array([x_min]), np.array([y_min]))
+    column_max, row_max = get_cells(np.array([x_max]), np.array([y_max]))
+    offsets = index["offsets"]
+    # Sur chaque ligne de cases, les cases couvertes sont contiguës : une tranche par ligne
+    slices = [
+        np.arange(offsets[row * N_CELL_COLUMNS + column_min[0]], offsets[row * N_CELL_COLUMNS + column_max[0] + 1])
+        for row in range(row_min[0], row_max[0] + 1)
+    ]
+    positions = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+    # Filtrage exact, utile seulement pour les cases du bord du rectangle
+    x, y = index["x"][positions], index["y"][positions]
+    below_x_max = x < x_max if half_open and x_max < 120 else x <= x_max
+    below_y_max = y < y_max if half_open and y_max < 80 else y <= y_max
+    inside = (x >= x_min) & below_x_max & (y >= y_min) & below_y_max
+    return np.sort(index["rows"][positions[inside]])
+
+
+def get_zone18_bounds(zone: int):
+    """Retourne le rectangle (x_min, x_max, y_min, y_max) d'une zone de la grille 18 zones."""
+    column, row = zone % N_ZONE18_COLUMNS, zone // N_ZONE18_COLUMNS
+    return ZONE18_X_EDGES[column], ZONE18_X_EDGES[column + 1], ZONE18_Y_EDGES[row], ZONE18_Y_EDGES[row + 1]
+
+
+def query_zone18(index: dict, zone: int) -> np.ndarray:
+    """Retourne les indices de lignes dont le point est dans une zone de la grille 18 zones."""
+    return query_rectangle(index, *get_zone18_bounds(zone), half_open=True)
+
+
+@st.cache_data
+def load_season_spatial_index(competition_id: int, season_id: int) -> dict:
+    """Construit (et met en cache) l'index spatial des points de départ des événements d'une saison."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return build_spatial_index(np.empty(0), np.empty(0))
+        return build_spatial_index(events["x"], events["y"])
+    except Exception as e:
+        st.error(f"Erreur lors de la construction de l'index spatial : {e}")
+        return build_spatial_index(np.empty(0), np.empty(0))
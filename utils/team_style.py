@@ -0,0 +1,238 @@
+#team_style
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_season_events
+from utils.possession import load_season_possession_chains
+from utils.defensive import load_season_defensive_metrics, aggregate_defensive_metrics
+
+# -----------------------------
+# PROFILS DE JEU DES ÉQUIPES (ACP + K-MEANS)
+# -----------------------------
+
+SET_PIECE_PATTERNS = ["From Corner", "From Free Kick", "From Throw In"]
+
+# Séquence longue : au moins ce nombre de passes
+LONG_CHAIN_PASSES = 10
+
+# Métriques de style (par match ou en proportion) et leur libellé
+STYLE_METRICS = {
+    "possession": "Possession (%)",
+    "passes": "Passes par match",
+    "pass_completion": "Réussite des passes (%)",
+    "short_pass_share": "Part de passes courtes (%)",
+    "long_pass_share": "Part de passes longues (%)",
+    "forward_pass_share": "Part de passes vers l'avant (%)",
+    "mean_pass_length": "Longueur moyenne des passes",
+    "high_pass_share": "Part de passes aériennes (%)",
+    "cross_rate": "Centres pour 100 passes",
+    "progressive_passes": "Passes progressives par match",
+    "final_third_entries": "Entrées dans le dernier tiers par match",
+    "box_entries": "Entrées dans la surface par match",
+    "carries": "Conduites par match",
+    "progressive_carries": "Conduites progressives par match",
+    "dribbles": "Dribbles par match",
+    "shots": "Tirs par match",
+    "xg": "xG par match",
+    "xg_per_shot": "xG par tir",
+    "xg_against": "xG concédés par match",
+    "set_piece_shot_share": "Part de tirs sur coups de pied arrêtés (%)",
+    "passes_per_chain": "Passes par séquence",
+    "long_chain_share": "Part de séquences de 10 passes ou plus (%)",
+    "directness": "Verticalité (yards gagnés par seconde)",
+    "chain_start_height": "Hauteur moyenne de début de séquence",
+    "counter_share": "Part de séquences en contre (%)",
+    "ppda": "PPDA",
+    "pressures": "Pressions par match",
+    "pressure_regain_rate": "Pressions suivies d'une récupération (%)",
+    "high_turnovers": "Récupérations hautes par match",
+    "defensive_height": "Hauteur moyenne des actions défensives",
+}
+
+# Variance expliquée visée pour choisir les composantes utilisées par le k-means
+CLUSTER_VARIANCE = 0.8
+N_KMEANS_INIT = 10
+KMEANS_MAX_ITER = 100
+
+
+def compute_event_metrics(events: pd.DataFrame) -> pd.DataFrame:
+    """Calcule les métriques de style issues des événements par équipe, en une seule agrégation."""
+    is_pass = events["type"] == "Pass"
+    is_shot = events["type"] == "Shot"
+    flags = pd.DataFrame({
+        "team": events["team"],
+        "match_id": events["match_id"],
+        "passes": is_pass,
+        "passes_completed": events["pass_completed"],
+        "short_passes": events["pass_length_class"] == "Courte",
+        "long_passes": events["pass_length_class"] == "Longue",
+        "forward_passes": events["pass_direction"] == "Vers l'avant",
+        "pass_distance": events["pass_distance"].fillna(0.0),
+        "high_passes": is_pass & (events["pass_height"] == "High Pass"),
+        "crosses": is_pass & events["pass_cross"].eq(True),
+        "progressive_passes": events["progressive_pass"],
+        "final_third_entries": events["pass_completed"] & events["pass_into_final_third"],
+        "box_entries": events["pass_completed"] & events["pass_into_box"],
+        "carries": events["type"] == "Carry",
+        "progressive_carries": events["progressive_carry"],
+        "dribbles": events["type"] == "Dribble",
+        "shots": is_shot,
+        "xg": events["shot_statsbomb_xg"].where(is_shot, 0.0).fillna(0.0),
+        "set_piece_shots": is_shot & events["play_pattern"].isin(SET_PIECE_PATTERNS),
+    })
+    totals = flags[flags["team"].notna()].groupby("team").agg(
+        matches=("match_id", "nunique"), **{column: (column, "sum") for column in flags.columns[2:]}
+    )
+    passes = totals["passes"].replace(0, np.nan)
+    shots = totals["shots"].replace(0, np.nan)
+    return pd.DataFrame({
+        "matches": totals["matches"],
+        "passes": totals["passes"] / totals["matches"],
+        "pass_completion": totals["passes_completed"] / passes * 100,
+        "short_pass_share": totals["short_passes"] / passes * 100,
+        "long_pass_share": totals["long_passes"] / passes * 100,
+        "forward_pass_share": totals["forward_passes"] / passes * 100,
+        "mean_pass_length": totals["pass_distance"] / passes,
+        "high_pass_share": totals["high_passes"] / passes * 100,
+        "cross_rate": totals["crosses"] / passes * 100,
+        "progressive_passes": totals["progressive_passes"] / totals["matches"],
+        "final_third_entries": totals["final_third_entries"] / totals["matches"],
+        "box_entries": totals["box_entries"] / totals["matches"],
+        "carries": totals["carries"] / totals["matches"],
+        "progressive_carries": totals["progressive_carries"] / totals["matches"],
+        "dribbles": totals["dribbles"] / totals["matches"],
+        "shots": totals["shots"] / totals["matches"],
+        "xg": totals["xg"] / totals["matches"],
+        "xg_per_shot": totals["xg"] / shots,
+        "set_piece_shot_share": totals["set_piece_shots"] / shots * 100,
+    })
+
+
+def compute_chain_metrics(chains: pd.DataFrame) -> pd.DataFrame:
+    """Calcule possession, longueur, verticalité et xG concédés à partir des séquences de possession."""
+    by_match = chains.groupby(["match_id", "team"]).agg(duration=("duration", "sum"), xg=("xg", "sum")).reset_index()
+    match_totals = by_match.groupby("match_id")[["duration", "xg"]].transform("sum")
+    by_match["possession"] = by_match["duration"] / match_totals["duration"].replace(0, np.nan) * 100
+    by_match["xg_against"] = match_totals["xg"] - by_match["xg"]
+
+    with_passes = chains[chains["passes"] > 0]
+    directness = (with_passes["end_x"] - with_passes["start_x"]) / with_passes["duration"].clip(lower=1.0)
+    grouped = chains.groupby("team")
+    return pd.DataFrame({
+        "possession": by_match.groupby("team")["possession"].mean(),
+        "xg_against": by_match.groupby("team")["xg_against"].mean(),
+        "passes_per_chain": grouped["passes"].mean(),
+        "long_chain_share": grouped["passes"].apply(lambda passes: (passes >= LONG_CHAIN_PASSES).mean() * 100),
+        "directness": directness.groupby(with_passes["team"]).mean(),
+        "chain_start_height": grouped["start_x"].mean(),
+        "counter_share": grouped["play_pattern"].apply(lambda patterns: (patterns == "From Counter").mean() * 100),
+    })
+
+
+def build_team_style_table(events: pd.DataFrame, chains: pd.DataFrame, defensive: pd.DataFrame) -> pd.DataFrame:
+    """Assemble la matrice équipes × métriques de style de la saison."""
+    table = compute_event_metrics(events).join(compute_chain_metrics(chains), how="left")
+    defensive_per_match = pd.DataFrame({
+        "ppda": defensive["ppda"],
+        "pressures": defensive["pressures"] / defensive["matches"],
+        "pressure_regain_rate": defensive["pressure_regain_rate"],
+        "high_turnovers": defensive["high_turnovers"] / defensive["matches"],
+        "defensive_height": defensive["action_height"],
+    })
+    table = table.join(defensive_per_match.astype(float), how="left")
+    return table[["matches"] + list(STYLE_METRICS)]
+
+
+def standardize_metrics(table: pd.DataFrame) -> np.ndarray:
+    """Centre-réduit chaque métrique ; valeurs manquantes et métriques constantes valent 0."""
+    values = table[list(STYLE_METRICS)].to_numpy(dtype=float)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    scaled = (values - mean) / np.where(std > 0, std, 1)
+    return np.nan_to_num(scaled, nan=0.0)
+
+
+def compute_pca(matrix: np.ndarray):
+    """ACP par décomposition en valeurs singulières ; retourne (coordonnées, part de variance, axes)."""
+    _, singular_values, components = np.linalg.svd(matrix, full_matrices=False)
+    # Signe fixé : la métrique la plus contributive de chaque axe a un poids positif
+    signs = np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])
+    components = components * signs[:, None]
+    variance = singular_values ** 2
+    explained = variance / variance.sum() if variance.sum() > 0 else variance
+    return matrix @ components.T, explained, components
+
+
+def run_kmeans(points: np.ndarray, n_clusters: int, seed: int = 0):
+    """K-means (initialisation k-means++, plusieurs départs) ; retourne (étiquettes, centres)."""
+    rng = np.random.default_rng(seed)
+    best = (np.inf, None, None)
+    for _ in range(N_KMEANS_INIT):
+        centers = points[[rng.integers(len(points))]]
+        while len(centers) < n_clusters:
+            distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1).min(axis=1)
+            probabilities = distances / distances.sum() if distances.sum() > 0 else None
+            centers = np.vstack([centers, points[rng.choice(len(points), p=probabilities)]])
+        for _ in range(KMEANS_MAX_ITER):
+            labels = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1).argmin(axis=1)
+            new_centers = np.array([
+                points[labels == cluster].mean(axis=0) if (labels == cluster).any() else centers[cluster]
+                for cluster in range(n_clusters)
+            ])
+            if np.allclose(new_centers, centers):
+                break
+            centers = new_centers
+        inertia = ((points - centers[labels]) ** 2).sum()
+        if inertia < best[0]:
+            best = (inertia, labels, centers)
+    return best[1], best[2]
+
+
+def describe_clusters(matrix: np.ndarray, labels: np.ndarray, n_traits: int = 2) -> dict:
+    """Nomme chaque groupe par ses métriques les plus au-dessus de la moyenne de la ligue."""
+    names = list(STYLE_METRICS.values())
+    descriptions = {}
+    for cluster in np.unique(labels):
+        profile = matrix[labels == cluster].mean(axis=0)
+        traits = np.argsort(profile)[::-1][:n_traits]
+        descriptions[cluster] = " · ".join(f"{names[trait]} ↑" for trait in traits)
+    return descriptions
+
+
+def build_style_map(table: pd.DataFrame, n_clusters: int) -> dict:
+    """Projette les équipes sur les deux premiers axes de l'ACP et les regroupe par k-means."""
+    matrix = standardize_metrics(table)
+    scores, explained, components = compute_pca(matrix)
+    # Le k-means travaille sur les axes expliquant l'essentiel de la variance
+    n_components = int(np.searchsorted(np.cumsum(explained), CLUSTER_VARIANCE) + 1)
+    n_clusters = max(1, min(n_clusters, len(table)))
+    labels, _ = run_kmeans(scores[:, :n_components], n_clusters)
+    descriptions = describe_clusters(matrix, labels)
+    teams = pd.DataFrame({
+        "team": table.index,
+        "pc1": scores[:, 0],
+        "pc2": scores[:, 1] if scores.shape[1] > 1 else 0.0,
+        "cluster": labels + 1,
+        "cluster_label": [f"Groupe {label + 1} : {descriptions[label]}" for label in labels],
+    })
+    loadings = pd.DataFrame(components[:2].T, index=list(STYLE_METRICS), columns=["pc1", "pc2"][:len(components[:2])])
+    return {"table": table, "teams": teams, "explained": explained, "loadings": loadings}
+
+
+@st.cache_data(persist="disk")
+def load_team_style(competition_id: int, season_id: int, n_clusters: int = 4):
+    """Calcule (et persiste) la carte des profils de jeu des équipes d'une saison."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return {}
+        chains = load_season_possession_chains(competition_id, season_id)
+        defensive = aggregate_defensive_metrics(load_season_defensive_metrics(competition_id, season_id)[0])
+        table = build_team_style_table(events, chains, defensive)
+        if len(table) < 2:
+            return {}
+        return build_style_map(table, n_clusters)
+    except Exception as e:
+        st.error(f"Erreur lors du calcul des profils de jeu : {e}")
+        return {}
@@ -0,0 +1,158 @@
+#transitions
+import pandas as pd
+import numpy as np
+import streamlit as st
+
+from utils.data_loader import load_normalized_events, load_season_events
+
+# -----------------------------
+# DÉTECTION DES TRANSITIONS
+# -----------------------------
+
+# Issues StatsBomb indiquant que le ballon a été gagné
+WON_OUTCOMES = ["Won", "Success", "Success In Play", "Success Out"]
+
+# Abscisse du début du dernier tiers (coordonnées StatsBomb, 120 × 80)
+FINAL_THIRD_X = 80.0
+
+# Écart de temps entre deux groupes (match, équipe, période) sur l'axe des temps composé
+_GROUP_SPAN = 1e5
+
+
+def get_recovery_mask(events: pd.DataFrame) -> pd.Series:
+    """Masque des récupérations : ballon récupéré, interception gagnée ou tacle gagné."""
+    recovery = (events["type"] == "Ball Recovery") & (events["ball_recovery_recovery_failure"] != True)
+    interception = (events["type"] == "Interception") & events["interception_outcome"].isin(WON_OUTCOMES)
+    tackle = (
+        (events["type"] == "Duel")
+        & (events["duel_type"] == "Tackle")
+        & events["duel_outcome"].isin(WON_OUTCOMES)
+    )
+    return recovery | interception | tackle
+
+
+def find_next_event(sources: pd.DataFrame, targets: pd.DataFrame):
+    """Trouve, pour chaque événement source, la première cible du même groupe qui le suit (searchsorted)."""
+    if targets.empty:
+        return np.full(len(sources), np.inf), np.zeros(len(sources), dtype=int)
+
+    # Axe des temps composé : chaque groupe (match, équipe, période) occupe son propre intervalle
+    group_columns = ["match_id", "team", "period"]
+    keys = pd.MultiIndex.from_frame(pd.concat([sources[group_columns], targets[group_columns]]).drop_duplicates())
+    codes = keys.get_indexer(pd.MultiIndex.from_frame(targets[group_columns]))
+    target_time = codes * _GROUP_SPAN + targets["match_seconds"].to_numpy()
+    order = np.argsort(target_time, kind="stable")
+    target_time = target_time[order]
+
+    source_codes = keys.get_indexer(pd.MultiIndex.from_frame(sources[group_columns]))
+    source_time = source_codes * _GROUP_SPAN + sources["match_seconds"].to_numpy()
+    position = np.searchsorted(target_time, source_time, side="right")
+
+    found = position < len(target_time)
+    position = np.minimum(position, len(target_time) - 1)
+    delay = np.where(found, target_time[position] - source_time, np.inf)
+    # Un délai supérieur à la moitié de l'écart entre groupes signifie que la cible appartient à un autre groupe
+    delay = np.where(delay < _GROUP_SPAN / 2, delay, np.inf)
+    return delay, order[position]
+
+
+def detect_transitions(events: pd.DataFrame, window: float = 15.0) -> pd.DataFrame:
+    """Détecte les récupérations suivies d'un tir ou d'une entrée dans le dernier tiers en moins de `window` secondes."""
+    columns = ["match_id", "team", "period", "possession", "match_seconds", "x", "y"]
+    recoveries = events.loc[get_recovery_mask(events), columns].reset_index(drop=True)
+
+    shots = events.loc[events["type"] == "Shot", columns + ["shot_outcome", "shot_statsbomb_xg"]]
+    entries = events.loc[
+        events["type"].isin(["Pass", "Carry"])
+        & events["pass_outcome"].isna()
+        & (events["x"] < FINAL_THIRD_X)
+        & (events["end_x"] >= FINAL_THIRD_X),
+        columns + ["end_x", "end_y"],
+    ]
+    shots = shots.reset_index(drop=True)
+    entries = entries.reset_index(drop=True)
+
+    # Tir : la cible doit appartenir à la même possession et arriver dans la fenêtre
+    shot_delay, shot_row = find_next_event(recoveries, shots)
+    if len(shots):
+        same_possession = shots["possession"].to_numpy()[shot_row] == recoveries["possession"].to_numpy()
+        shot_delay = np.where(same_possession & (shot_delay <= window), shot_delay, np.inf)
+
+    entry_delay, entry_row = find_next_event(recoveries, entries)
+    if len(entries):
+        same_possession = entries["possession"].to_numpy()[entry_row] == recoveries["possession"].to_numpy()
+        entry_delay = np.where(same_possession & (entry_delay <= window), entry_delay, np.inf)
+
+    recoveries["led_to_shot"] = np.isfinite(shot_delay)
+    recoveries["led_to_entry"] = np.isfinite(entry_delay)
+    recoveries["goal"] = False
+    recoveries["xg"] = 0.0
+    recoveries["end_x"] = np.nan
+    recoveries["end_y"] = np.nan
+
+    # Point de finalisation : le tir s'il existe, sinon l'entrée dans le dernier tiers
+    if len(entries):
+        has_entry = recoveries["led_to_entry"].to_numpy()
+        recoveries.loc[has_entry, "end_x"] = entries["end_x"].to_numpy()[entry_row][has_entry]
+        recoveries.loc[has_entry, "end_y"] = entries["end_y"].to_numpy()[entry_row][has_entry]
+    if len(shots):
+        has_shot = recoveries["led_to_shot"].to_numpy()
+        recoveries.loc[has_shot, "end_x"] = shots["x"].to_numpy()[shot_row][has_shot]
+        recoveries.loc[has_shot, "end_y"] = shots["y"].to_numpy()[shot_row][has_shot]
+        recoveries.loc[has_shot, "goal"] = shots["shot_outcome"].to_numpy()[shot_row][has_shot] == "Goal"
+        recoveries.loc[has_shot, "xg"] = shots["shot_statsbomb_xg"].fillna(0).to_numpy()[shot_row][has_shot]
+
+    recoveries["transition_time"] = np.where(recoveries["led_to_shot"], shot_delay, entry_delay)
+    recoveries["is_transition"] = recoveries["led_to_shot"] | recoveries["led_to_entry"]
+    recoveries.loc[~recoveries["is_transition"], "transition_time"] = np.nan
+    recoveries["distance"] = np.hypot(recoveries["end_x"] - recoveries["x"], recoveries["end_y"] - recoveries["y"])
+    recoveries["progression"] = recoveries["end_x"] - recoveries["x"]
+    recoveries["speed"] = recoveries["distance"] / recoveries["transition_time"].where(recoveries["transition_time"] > 0)
+    return recoveries
+
+
+@st.cache_data
+def load_match_transitions(match_id: int, window: float = 15.0):
+    """Détecte (et met en cache) les transitions d'un match."""
+    try:
+        events = load_normalized_events(match_id)
+        if events.empty:
+            return pd.DataFrame()
+        return detect_transitions(events, window)
+    except Exception as e:
+        st.error(f"Erreur lors de la détection des transitions : {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data
+def load_season_transitions(competition_id: int, season_id: int, window: float = 15.0):
+    """Détecte les transitions de toute une saison en une seule passe vectorisée."""
+    try:
+        events = load_season_events(competition_id, season_id)
+        if events.empty:
+            return pd.DataFrame()
+        return detect_transitions(events, window)
+    except Exception as e:
+        st.error(f"Erreur lors de la détection des transitions de la saison : {e}")
+        return pd.DataFrame()
+
+
+def summarize_transitions(transitions: pd.DataFrame) -> pd.DataFrame:
+    """Agrège les transitions par équipe (comptes, temps, distances, vitesses)."""
+    if transitions.empty:
+        return pd.DataFrame()
+    grouped = transitions.groupby("team")
+    summary = pd.DataFrame({
+        "recoveries": grouped.size(),
+        "transitions": grouped["is_transition"].sum(),
+        "counter_attacks": grouped["led_to_shot"].sum(),
+        "final_third_entries": grouped["led_to_entry"].sum(),
+        "goals": grouped["goal"].sum(),
+        "xg": grouped["xg"].sum(),
+        "mean_time": grouped["transition_time"].mean(),
+        "mean_distance": grouped["distance"].mean(),
+        "mean_progression": grouped["progression"].mean(),
+        "mean_speed": grouped["speed"].mean(),
+    })
+    summary["success_rate"] = summary["transitions"] / summary["recoveries"] * 100
+    return summary
@@ -0,0 +1,55 @@
+#zones
+import pandas as pd
+import numpy as np
+
+# -----------------------------
+# ZONES DU TERRAIN
+# -----------------------------
+
+# Grille 18 zones : 6 bandes dans la longueur × 3 couloirs dans la largeur
+ZONE18_X_EDGES = np.array([0.0, 20.0, 40.0, 60.0, 80.0, 100.0, 120.0])
+ZONE18_Y_EDGES = np.array([0.0, 80 / 3, 160 / 3, 80.0])
+N_ZONE18_COLUMNS, N_ZONE18_ROWS = len(ZONE18_X_EDGES) - 1, len(ZONE18_Y_EDGES) - 1
+
+# 5 couloirs verticaux, délimités par la surface (y = 18 / 62) et les demi-espaces
+CHANNEL_Y_EDGES = np.array([0.0, 18.0, 30.0, 50.0, 62.0, 80.0])
+CHANNELS = ["Couloir gauche", "Demi-espace gauche", "Axe", "Demi-espace droit", "Couloir droit"]
+
+THIRD_X_EDGES = np.array([0.0, 40.0, 80.0, 120.0])
+THIRDS = ["Tiers défensif", "Tiers médian", "Tiers offensif"]
+
+# Colonnes ajoutées à la normalisation (départ puis arrivée)
+ZONE_COLUMNS = ["zone18", "channel", "third", "zone18_end", "channel_end", "third_end"]
+
+
+def digitize(values: pd.Series, edges: np.ndarray) -> np.ndarray:
+    """Numéro de l'intervalle contenant chaque valeur (bornes extérieures incluses)."""
+    values = np.asarray(values, dtype=float)
+    return np.clip(np.digitize(values, edges[1:-1]), 0, len(edges) - 2)
+
+
+def get_zone_ids(x: pd.Series, y: pd.Series):
+    """Retourne les identifiants (int8, -1 si coordonnées absentes) de zone 18, de couloir et de tiers."""
+    missing = np.isnan(np.asarray(x, dtype=float)) | np.isnan(np.asarray(y, dtype=float))
+    zone18 = digitize(y, ZONE18_Y_EDGES) * N_ZONE18_COLUMNS + digitize(x, ZONE18_X_EDGES)
+    channel = digitize(y, CHANNEL_Y_EDGES)
+    third = digitize(x, THIRD_X_EDGES)
+    return tuple(np.where(missing, -1, ids).astype(np.int8) for ids in (zone18, channel, third))
+
+
+def add_zones(events: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute les identifiants de zones des points de départ et d'arrivée de chaque événement."""
+    events["zone18"], events["channel"], events["third"] = get_zone_ids(events["x"], events["y"])
+    events["zone18_end"], events["channel_end"], events["third_end"] = get_zone_ids(events["end_x"], events["end_y"])
+    return events
+
+
+def count_by_zone(zone_ids: pd.Series, n_zones: int) -> np.ndarray:
+    """Compte les événements par zone (un simple bincount sur les identifiants valides)."""
+    zone_ids = np.asarray(zone_ids)
+    return np.bincount(zone_ids[zone_ids >= 0], minlength=n_zones)
+
+
+def zone18_grid(counts: np.ndarray) -> np.ndarray:
+    """Met les comptes des 18 zones sous forme de grille (couloirs × bandes)."""
+    return counts.reshape(N_ZONE18_ROWS, N_ZONE18_COLUMNS)